@@ -6,99 +6,48 @@ y las sentencias SQL embebidas. Genera representaciones visuales y textuales del
 
 # Módulos estándar necesarios
 import traceback  # Para manejo de errores detallado
-import sys        # Para acceder a argumentos de línea de comandos y el tracer de funciones
+import sys        # Para acceder a argumentos de línea de comandos
 import os         # Para manipulación de rutas de archivos
-import re         # Para expresiones regulares en el análisis
 import argparse   # Gestion de parametros
-
-# Módulo externo necesario (instalar con: pip install graphviz)
-from graphviz import Digraph  # Para generación de diagramas
-
-#para debug del modulo ... Define el tracer
-def tracer(frame, event, arg):
-    if event == 'call':  # Solo para llamadas a funciones
-        co = frame.f_code
-        func_name = co.co_name
-        #if func_name != '<module>':  # Ignora el módulo principal
-        print(f"-->: {func_name} (línea {frame.f_lineno})")
-    return tracer  # Continúa el trace
-    
-def extraer_sentencias_sql(bloque_sql):
-    """
-    Extrae las sentencias SQL de un bloque de código SQL.
-
-    Parámetros:
-        bloque_sql (str): Texto completo del bloque SQL a analizar
-
-    Retorna:
-        list: Lista de tuplas con (tipo_sentencia, objeto_relacionado) encontradas
-    """
-    sentencias = []
-
-    # Normalizamos el texto
-    bloque_sql = bloque_sql.upper()
-
-    # SELECT ... FROM tabla
-    for match in re.finditer(r"SELECT .*?FROM\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("SELECT", match.group(1)))
-
-    # INSERT INTO tabla
-    for match in re.finditer(r"INSERT\s+INTO\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("INSERT", match.group(1)))
-
-    # UPDATE tabla
-    for match in re.finditer(r"UPDATE\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("UPDATE", match.group(1)))
-
-    # DELETE FROM tabla
-    for match in re.finditer(r"DELETE\s+FROM\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("DELETE", match.group(1)))
-
-    # OPEN cursor
-    for match in re.finditer(r"OPEN\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("OPEN CURSOR", match.group(1)))
-
-    # CLOSE cursor
-    for match in re.finditer(r"CLOSE\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("CLOSE CURSOR", match.group(1)))
-
-    # FETCH cursor
-    for match in re.finditer(r"FETCH\s+(\w+)", bloque_sql, re.IGNORECASE):
-        sentencias.append(("FETCH CURSOR", match.group(1)))
-
-    # COMMIT
-    if 'COMMIT' in bloque_sql:
-        sentencias.append(("COMMIT", ''))
-
-    # ROLLBACK
-    if 'ROLLBACK' in bloque_sql:
-        sentencias.append(("ROLLBACK", ''))
-
-    return sentencias
-
-def procesar_bloque_sql(archivo, parrafo_actual, selects_por_parrafo):
+import atexit     # Para escribir el perfil (--profile) al terminar, aunque falle el render
+import io         # Para generar el DOT en memoria (construir_grafo_dot)
+
+# Módulos auxiliares del mismo directorio (caché persistente, grafo compacto, fuentes)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cache_analisis import CacheAnalisis, clave_analisis
+from grafo_parrafos import GrafoParrafos
+from fuentes_cobol import contenido_bytes, es_ruta
+from perfilador import activar, fase, informar
+from cache_render import CacheRender, renderizar_archivo
+from escritor_dot import EscritorDot
+from parrafos_muertos import informes_biblioteca, guardar_csv
+
+# Lexer, reconocedor SQL y extracción de tablas/llamadas (motor_cobol.py en el mismo directorio)
+from motor_cobol import (
+    TK_COMENTARIO, TK_PROCEDURE, TK_PARRAFO, TK_SECCION, TK_PERFORM, TK_PERFORM_THRU, TK_ENTRADA,
+    TK_EXEC_SQL, TK_OTRA,
+    RE_PARRAFO, INICIOS_NO_PARRAFO, PARRAFOS_OMITIDOS, EXCLUIDOS_PARRAFO, EXCLUIDOS_PERFORM,
+    clasificar_linea, extraer_destino_perform, extraer_hasta_thru, leer_bloque_sql, segmentar_bloques_sql, tokenizar_cobol,
+    RE_TOKEN_SQL, ORDEN_SENTENCIAS_SQL, ORIENTACIONES_FETCH, nombre_objeto_sql,
+    reconocer_sentencias_sql, extraer_sentencias_sql, extraer_tablas_db2,
+    analizar_programa, calls_directorio, calls_xplain,
+)
+
+# Versión del analizador: cambiarla invalida los resultados guardados en caché
+VERSION_ANALIZADOR = '08.3'
+
+def procesar_bloque_sql(bloque_completo, parrafo_actual, selects_por_parrafo):
     """
     Procesa un bloque SQL completo (desde EXEC SQL hasta END-EXEC).
     
     Parámetros:
-        archivo (file): Objeto archivo abierto que se está analizando
+        bloque_completo (str): Texto del bloque SQL ya unido y en mayúsculas (token TK_EXEC_SQL)
         parrafo_actual (str): Nombre del párrafo COBOL donde se encontró el SQL
         selects_por_parrafo (dict): Diccionario para acumular los resultados
         
     Efecto:
         Modifica selects_por_parrafo añadiendo las sentencias encontradas
     """
-    bloque_sql = []
-    
-    # Leer líneas hasta encontrar END-EXEC
-    for linea in archivo:
-        bloque_sql.append(linea.strip())
-        if 'END-EXEC' in linea.upper():
-            break
-    
-    # Unir todo el bloque y convertirlo a mayúsculas
-    bloque_completo = ' '.join(bloque_sql).upper()
-    
     # Extraer y almacenar las sentencias SQL encontradas
     for tipo, tabla in extraer_sentencias_sql(bloque_completo):
         selects_por_parrafo.setdefault(parrafo_actual, [])
@@ -121,7 +70,7 @@ def detectar_parrafo(linea):
     """
     Detecta si una línea marca el inicio de un nuevo párrafo en COBOL.
 
-    Reglas que aplica:
+    Reglas que aplica (ver clasificar_linea):
     - Ignora líneas vacías y comentarios (columna 7 = '*' en formato fijo).
     - Extrae el posible nombre de párrafo desde el inicio del área de código
       (columna 8, índice 7) o desde el comienzo si la línea es muy corta.
@@ -129,47 +78,10 @@ def detectar_parrafo(linea):
     - Requiere que el nombre vaya seguido de '.' o de la palabra 'SECTION'.
     - Excluye palabras clave que no son nombres de párrafo.
     """
-    import re
-
-    if not linea or not linea.strip():
-        return None
-
-    # Si la columna 7 (índice 6) es '*' -> comentario
-    if len(linea) >= 7 and linea[6] == '*':
+    if not linea or not linea.strip() or es_linea_ignorable(linea):
         return None
-
-    # Tomar el área de código: columna 8 (índice 7) en adelante si existe,
-    # en caso contrario usar la línea sin los espacios a la izquierda.
-    code_area = linea[7:] if len(linea) > 7 else linea.lstrip()
-
-    
-    # Evitar confundir líneas que empiezan por PERFORM u otras sentencias
-    if code_area.strip().upper().startswith(('PERFORM ', 'IF ', 'ELSE ', 'EVALUATE ', 'MOVE ', 'SET ' , 'DISPLAY', 'TO' )):
-        return None
-    
-    # Omitir parrafos comunes de error o log que no aportan a la logica funcional del SW
-    if code_area.strip().upper().startswith(('TRALOG-ZL-LEVEL5', 'PROGRAMMFEHLER', 'DB2-FEHLER', 'TRALOG-ZEILE'),4):
-        return None
-        
-
-    # Buscar un posible label al inicio del área de código:
-    # nombre compuesto por letras, dígitos y '-', seguido opcionalmente de espacios
-    # y luego un '.' o la palabra 'SECTION' (p.ej. "PAR1." o "PAR1 SECTION").
-    m = re.match(r'^\s*([A-Z0-9][A-Z0-9-]{0,60})\s*(?:\.|\bSECTION\b)', code_area, flags=re.IGNORECASE)
-    if not m:
-        return None
-
-    posible_parrafo = m.group(1).strip()
-
-    # Excluir tokens que son palabras reservadas y no nombres de párrafo
-    excluidos = {
-        'VARYING', 'UNTIL', 'WITH', 'END-IF', 'END-EXEC', 'STOP', 'STOP-RUN',
-        'EXIT', 'CONTINUE', 'PERFORM', 'EVALUATE', 'IF', 'ELSE', 'MOVE', 'SET'
-    }
-    if posible_parrafo.upper() in excluidos:
-        return None
-
-    return posible_parrafo
+    tipo, valor = clasificar_linea(linea.upper())
+    return valor if tipo in (TK_PARRAFO, TK_SECCION) else None
 
 
 def detectar_perform(linea):
@@ -182,158 +94,88 @@ def detectar_perform(linea):
     Retorna:
         str/None: Nombre del párrafo destino si se detecta PERFORM, None si no
     """
-    if 'PERFORM' in linea.upper():
-        partes = linea.strip().upper().split()
-        try:
-            # Buscar la posición de PERFORM en la línea
-            idx = partes.index('PERFORM')
-            destino = partes[idx + 1].rstrip('.')
-            
-            # Excluir ciertas palabras clave que no son nombres de párrafo
-            if destino in ['VARYING', 'UNTIL', 'WITH', 'END-IF', 'END-EXEC', 'STOP RUN', 'EXIT', 'CONTINUE']:
-                return None
-            # Omitir parrafos comunes de error o log que no aportan a la logica funcional del SW
-            if destino.strip().upper().startswith(('TRALOG-ZL-LEVEL5', 'PROGRAMMFEHLER', 'DB2-FEHLER', 'TRALOG-ZEILE'),4):
-                return None
-
-            return destino
-        except (IndexError, ValueError):
-            return None
-    return None
+    linea = linea.upper()
+    if 'PERFORM' not in linea:
+        return None
+    return extraer_destino_perform(linea)
 
 def filtrar_desde_parrafo_inicio(llamadas, parrafo_inicio):
     """
     Filtra el diccionario de llamadas para mostrar solo los párrafos accesibles
-    desde el párrafo inicial especificado.
+    desde el párrafo inicial especificado (una búsqueda en amplitud y extracción
+    del subgrafo inducido, en tiempo lineal).
     
     Parámetros:
-        llamadas (dict): Diccionario completo de relaciones entre párrafos
+        llamadas (dict/GrafoParrafos): Relaciones completas entre párrafos
         parrafo_inicio (str): Párrafo desde el cual comenzar el análisis
         
     Retorna:
-        dict: Subconjunto filtrado del diccionario original
+        GrafoParrafos: Subgrafo con el párrafo inicial como primera clave ({} si no existe)
     """
-    if parrafo_inicio not in llamadas:
+    grafo = GrafoParrafos.desde_diccionario(llamadas)
+    if parrafo_inicio not in grafo:
         print(f"El parrafo '{parrafo_inicio}' no existe en el archivo")
         return {}
-
-    # Inicializar resultado con el párrafo de inicio
-    resultado = {parrafo_inicio: llamadas.get(parrafo_inicio, [])}
-    
-    # Búsqueda en profundidad para encontrar todos los párrafos accesibles
-    for origen, destinos in list(llamadas.items()):
-        pendientes = destinos.copy()
-        while pendientes:
-            destino = pendientes.pop()
-            if destino in resultado:
-                continue
-            if destino in llamadas:
-                resultado[origen].append(destino)
-            else:
-                pendientes.extend(llamadas.get(destino, []))
-    return resultado
+    return grafo.subgrafo_alcanzable(parrafo_inicio)
 
 def obtener_parrafos_accesibles(llamadas, parrafo_inicio):
     """
     Obtiene todos los párrafos accesibles desde un párrafo inicial dado.
     
     Parámetros:
-        llamadas (dict): Diccionario de relaciones entre párrafos
+        llamadas (dict/GrafoParrafos): Relaciones entre párrafos
         parrafo_inicio (str): Párrafo desde el cual comenzar
         
     Retorna:
         set: Conjunto de nombres de párrafos accesibles
     """
-    accesibles = set()
-    pendientes = [parrafo_inicio or '__START__']
+    grafo = GrafoParrafos.desde_diccionario(llamadas)
+    raiz = parrafo_inicio or '__START__'
+    if raiz not in grafo.ids:
+        return {raiz}
+    return {grafo.nombres[i] for i in grafo.alcanzables(grafo.ids[raiz])}
+
+def aplicar_parrafo_inicio(llamadas, selects_por_parrafo, parrafo_inicio):
+    """
+    Restringe un resultado completo de analizar_cobol a lo accesible desde un párrafo.
+    Sobre el mismo grafo los conjuntos alcanzables se reutilizan, así que cambiar de
+    párrafo inicial no requiere volver a parsear el fuente.
     
-    # Búsqueda en amplitud para encontrar todos los párrafos accesibles
-    while pendientes:
-        actual = pendientes.pop()
-        if actual in accesibles:
-            continue
-        accesibles.add(actual)
-        pendientes.extend(llamadas.get(actual, []))
-    return accesibles
+    Parámetros:
+        llamadas (dict/GrafoParrafos): Relaciones completas entre párrafos
+        selects_por_parrafo (dict): Sentencias SQL por párrafo
+        parrafo_inicio (str): Párrafo inicial (None o vacío = sin filtrar)
+        
+    Retorna:
+        tuple: (llamadas, selects_por_parrafo) filtrados
+    """
+    if not parrafo_inicio:
+        return llamadas, selects_por_parrafo
+    llamadas = filtrar_desde_parrafo_inicio(llamadas, parrafo_inicio)
+    selects_por_parrafo = {k: v for k, v in selects_por_parrafo.items() if k in llamadas or k == '__START__'}
+    return llamadas, selects_por_parrafo
 
-def analizar_cobol(ruta_archivo, parrafo_inicio=None, analizar_sql=False):
+def analizar_cobol(fuente, parrafo_inicio=None, analizar_sql=False):
     """
     Función principal que analiza un archivo COBOL y extrae su estructura.
     
     Parámetros:
-        ruta_archivo (str): Ruta al archivo COBOL a analizar
+        fuente: Ruta al archivo COBOL, o su contenido en memoria (bytes, str,
+                objeto archivo o iterable de líneas)
         parrafo_inicio (str): Opcional, párrafo desde el cual comenzar
         analizar_sql (bool): Si es True, extrae y analiza sentencias SQL
         
     Retorna:
-        tuple: (diccionario_llamadas, bloques_exec_sql, selects_por_parrafo)
+        tuple: (grafo_llamadas (GrafoParrafos, se usa como dict), bloques_exec_sql, selects_por_parrafo)
     """
-    llamadas = {}  # Almacenará las relaciones PERFORM entre párrafos
-    selects_por_parrafo = {}  # Almacenará las sentencias SQL por párrafo
-    en_procedure_division = False  # Flag para saber si estamos en PROCEDURE DIVISION
-    parrafo_actual = '__START__'  # Párrafo actual durante el análisis
-    bloque_sql_count = 0  # Contador de bloques EXEC SQL encontrados
-
     try:
-        with open(ruta_archivo, 'r', encoding='latin-1') as archivo:
-            for linea in archivo:
-                linea=linea.upper()
-                # Saltar líneas ignorables (comentarios, vacías)
-                if es_linea_ignorable(linea):
-                    continue
-
-                # Procesar bloques SQL si está activado el análisis SQL
-                if analizar_sql and 'EXEC SQL' in linea.upper():
-                    bloque_sql_count += 1
-                    procesar_bloque_sql(archivo, parrafo_actual, selects_por_parrafo)
-                    continue
-                '''
-                # Marcar cuando entramos en PROCEDURE DIVISION
-                if 'PROCEDURE DIVISION' in linea.upper():
-                    en_procedure_division = True
-                    continue
-
-                # Ignorar todo antes de PROCEDURE DIVISION
-                if not en_procedure_division:
-                    continue
-                # Detectar PROCEDURE DIVISION y descartar líneas hasta el primer punto real
-                '''
-                # Detectar PROCEDURE DIVISION y descartar líneas hasta el primer punto real
-                if not en_procedure_division:
-                    if 'PROCEDURE DIVISION' in linea.upper():
-                        en_procedure_division = True
-                        # Si el punto está en la misma línea, no hay que esperar más
-                        if '.' in linea:
-                            esperar_punto_despues_de_proc = False
-                        else:
-                            esperar_punto_despues_de_proc = True
-                        continue
-                    else:
-                        # Ignorar todo antes de PROCEDURE DIVISION
-                        continue
-                
-                # Si estamos dentro de PROCEDURE DIVISION pero aún esperando el primer punto
-                if en_procedure_division and 'esperar_punto_despues_de_proc' in locals() and esperar_punto_despues_de_proc:
-                    if '.' in linea:
-                        # Hemos llegado al final de la cabecera, comienza el código real
-                        esperar_punto_despues_de_proc = False
-                    continue  # Ignorar todas estas líneas, incluso la del punto
-
-                # Detectar inicio de nuevos párrafos
-                nuevo_parrafo = detectar_parrafo(linea)
-                if nuevo_parrafo:
-                    parrafo_actual = nuevo_parrafo
-                    if parrafo_actual not in llamadas:
-                        llamadas[parrafo_actual] = []
-                        # ~ print(f"llamadas 1 {llamadas}")
-                    continue
-
-                # Detectar llamadas PERFORM dentro del párrafo actual
-                if parrafo_actual:
-                    destino = detectar_perform(linea)
-                    if destino:
-                        llamadas.setdefault(parrafo_actual, []).append(destino)
-                        # ~ print(f"llamadas 2 {llamadas}")
+        # Una sola lectura del fuente con el motor común (párrafos, PERFORM y SQL por párrafo)
+        resultado = analizar_programa(fuente, parrafos=True, sql=bool(analizar_sql), calls=False)
+        llamadas = resultado['llamadas']  # Relaciones PERFORM entre párrafos
+        bloque_sql_count = resultado['bloques_sql']  # Bloques EXEC SQL encontrados
+        # Sentencias SQL por párrafo con el formato "TIPO ... OBJETO"
+        selects_por_parrafo = {parrafo: [f"{tipo} ... {tabla}" for tipo, tabla in sentencias]
+                               for parrafo, sentencias in resultado['sql_por_parrafo'].items()}
 
         # Filtrar por párrafo inicial si se especificó
         if parrafo_inicio:
@@ -359,51 +201,109 @@ def analizar_cobol(ruta_archivo, parrafo_inicio=None, analizar_sql=False):
     print(f"@@llamadas al final de analizar_cobol {llamadas}")
     return llamadas, bloque_sql_count, selects_por_parrafo
 
-def imprimir_arbol_llamadas(diccionario, selects_por_parrafo, nodo='', nivel=0, visitados=None, archivo=None):
+def analizar_cobol_cache(fuente, parrafo_inicio=None, analizar_sql=False, cache=None, contenido=None):
+    """
+    Igual que analizar_cobol pero sirviendo el resultado desde la caché persistente
+    si el mismo fuente ya se analizó con la misma versión y opciones. En la caché se
+    guarda el análisis completo y el párrafo inicial se aplica después en memoria,
+    por lo que cambiar de párrafo inicial no vuelve a parsear el fuente.
+
+    Parámetros:
+        fuente: Ruta al archivo COBOL, o su contenido en memoria (ver analizar_cobol)
+        parrafo_inicio (str): Opcional, párrafo desde el cual comenzar
+        analizar_sql (bool): Si es True, extrae y analiza sentencias SQL
+        cache (CacheAnalisis): Caché a utilizar (None = caché en el directorio por defecto)
+        contenido (bytes): Opcional, bytes del fuente si ya se tienen en memoria
+
+    Retorna:
+        tuple: (diccionario_llamadas, bloques_exec_sql, selects_por_parrafo)
+    """
+    if cache is None:
+        cache = CacheAnalisis()
+    if contenido is None:
+        contenido = contenido_bytes(fuente)
+    if not es_ruta(fuente):
+        # Los objetos archivo e iterables ya se han consumido: se analizan los bytes leídos
+        fuente = contenido
+
+    clave = clave_analisis(contenido, VERSION_ANALIZADOR, parrafo_inicio=None, analizar_sql=bool(analizar_sql))
+    with fase('cache'):
+        resultado = cache.obtener(clave)
+    if resultado is not None:
+        llamadas, bloque_sql_count, selects_por_parrafo = resultado
+        with fase('grafo'):
+            llamadas = GrafoParrafos.desde_diccionario(llamadas)
+    else:
+        llamadas, bloque_sql_count, selects_por_parrafo = analizar_cobol(fuente, None, analizar_sql)
+        # Si el análisis falló, analizar_cobol ya informó del error y devuelve un dict vacío
+        # (no un GrafoParrafos): no se guarda, para reintentarlo en la siguiente ejecución
+        if isinstance(llamadas, GrafoParrafos):
+            # En la caché se guarda como dict JSON, repitiendo cada llamada según su multiplicidad
+            serializable = llamadas.a_diccionario(con_multiplicidad=True)
+            with fase('cache'):
+                cache.guardar(clave, (serializable, bloque_sql_count, selects_por_parrafo))
+
+    llamadas, selects_por_parrafo = aplicar_parrafo_inicio(llamadas, selects_por_parrafo, parrafo_inicio)
+    return llamadas, bloque_sql_count, selects_por_parrafo
+
+def imprimir_arbol_llamadas(diccionario, selects_por_parrafo, nodo='', nivel=0, visitados=None, archivo=None, profundidad_maxima=None):
     """
     Imprime o guarda en archivo la jerarquía de llamadas en formato de árbol.
+    El recorrido es iterativo (pila explícita) y cada párrafo se despliega una sola vez:
+    las siguientes apariciones (subárboles compartidos o ciclos) se escriben con la marca
+    '(ver arriba)', por lo que la salida es lineal en número de párrafos y llamadas.
     
     Parámetros:
         diccionario (dict): Relaciones entre párrafos
         selects_por_parrafo (dict): Sentencias SQL por párrafo
-        nodo (str): Nodo actual en la recursión
-        nivel (int): Nivel de anidamiento actual
-        visitados (set): Nodos ya visitados (para evitar ciclos)
-        archivo (file): Objeto archivo donde escribir (si es None, imprime a consola)
+        nodo (str): Nodo raíz (por defecto el primer párrafo del diccionario)
+        nivel (int): Nivel de anidamiento de la raíz
+        visitados (set): Párrafos que se consideran ya mostrados
+        archivo (file): Objeto archivo donde escribir (si es None, se escribe en consola)
+        profundidad_maxima (int): Opcional, niveles a desplegar por debajo de la raíz
     """
+    escritor = archivo if archivo is not None else sys.stdout
+
     if not nodo:
         if diccionario:
             nodo = next(iter(diccionario))
         else:
-            salida = "Diccionario vacio. No hay llamadas que mostrar.\n"
-            print(salida)
-            if archivo: archivo.write(salida)
+            escritor.write("Diccionario vacio. No hay llamadas que mostrar.\n")
             return
 
-    if visitados is None:
-        visitados = set()
-
-    # Formatear línea con indentación según nivel
-    indent = '   ' * nivel
-    linea = f"{indent}{nodo}"
-    print(linea)
-    if archivo: archivo.write(linea + "\n")
-
-    visitados.add(nodo)
-
-    # Mostrar sentencias SQL asociadas al párrafo si existen
-    if nodo in selects_por_parrafo:
-        for sel in selects_por_parrafo[nodo]:
-            linea = f"{indent}   - {sel}"
-            print(linea)
-            if archivo: archivo.write(linea + "\n")
-
-    # Recursión para los párrafos llamados desde este
-    for hijo in diccionario.get(nodo, []):
-        if hijo not in visitados:
-            imprimir_arbol_llamadas(diccionario, selects_por_parrafo, hijo, nivel + 1, visitados.copy(), archivo)
-
-def guardar_arbol_llamadas(diccionario, selects_por_parrafo, nombre_archivo_salida):
+    mostrados = set(visitados) if visitados else set()
+    buffer = []  # Las líneas se escriben por bloques, no una a una
+    pila = [(nodo, nivel)]
+    while pila:
+        actual, nivel_actual = pila.pop()
+        # Formatear línea con indentación según nivel
+        indent = '   ' * nivel_actual
+        if actual in mostrados:
+            buffer.append(f"{indent}{actual} (ver arriba)\n")
+        else:
+            mostrados.add(actual)
+            buffer.append(f"{indent}{actual}\n")
+
+            # Mostrar sentencias SQL asociadas al párrafo si existen
+            for sel in selects_por_parrafo.get(actual, ()):
+                buffer.append(f"{indent}   - {sel}\n")
+
+            # Apilar los párrafos llamados (en orden inverso para escribirlos en su orden)
+            hijos = diccionario.get(actual, [])
+            if hijos:
+                if profundidad_maxima is not None and nivel_actual - nivel >= profundidad_maxima:
+                    buffer.append(f"{indent}   ... ({len(hijos)} llamadas sin desplegar)\n")
+                    # No cuenta como mostrado: se podrá desplegar en otra rama menos profunda
+                    mostrados.discard(actual)
+                else:
+                    pila.extend((hijo, nivel_actual + 1) for hijo in reversed(hijos))
+
+        if len(buffer) >= 4096:
+            escritor.write(''.join(buffer))
+            buffer.clear()
+    escritor.write(''.join(buffer))
+
+def guardar_arbol_llamadas(diccionario, selects_por_parrafo, nombre_archivo_salida, profundidad_maxima=None):
     """
     Guarda la jerarquía de llamadas en un archivo de texto.
     
@@ -411,17 +311,168 @@ def guardar_arbol_llamadas(diccionario, selects_por_parrafo, nombre_archivo_sali
         diccionario (dict): Relaciones entre párrafos
         selects_por_parrafo (dict): Sentencias SQL por párrafo
         nombre_archivo_salida (str): Nombre base para el archivo de salida
+        profundidad_maxima (int): Opcional, niveles a desplegar por debajo de la raíz
         
     Retorna:
         str: Nombre del archivo generado
     """
     archivo_salida = f"{nombre_archivo_salida}_jerarquia.txt"
     with open(archivo_salida, 'w', encoding='utf-8') as f:
-        imprimir_arbol_llamadas(diccionario, selects_por_parrafo, archivo=f)
+        imprimir_arbol_llamadas(diccionario, selects_por_parrafo, archivo=f, profundidad_maxima=profundidad_maxima)
     print(f"Jerarquia de llamadas guardada en: {archivo_salida}")
     return archivo_salida
 
-def generar_grafo(diccionario, selects_por_parrafo, archivo_salida, analizar_sql=False):
+def escribir_grafo_dot(salida, diccionario, selects_por_parrafo, analizar_sql=False):
+    """
+    Escribe en flujo el grafo DOT de las llamadas entre párrafos y sentencias SQL, sin
+    construirlo en memoria ni renderizarlo. Los atributos comunes se declaran una vez
+    como valores por defecto del grafo o de cada subgrafo; el resultado es equivalente
+    al que generaba graphviz.Digraph con los atributos en cada nodo y arista.
+    
+    Parámetros:
+        salida: Objeto con write() (archivo, StringIO, socket.makefile('w'))
+        diccionario (dict): Relaciones entre párrafos
+        selects_por_parrafo (dict): Sentencias SQL por párrafo
+        analizar_sql (bool): Si es True, incluye nodos para sentencias SQL
+    """
+    with EscritorDot(salida, comentario='Llamadas COBOL') as dot:
+        dot.atributos_grafo(dpi='300', rankdir='TB', nodesep='1.0', ranksep='1.5', splines='ortho')  # Configuración para orientación, espaciado y aristas ortogonales
+        # ~ dot.atributos_grafo(dpi='300', rankdir='LR', nodesep='1.0', ranksep='0.25', splines='ortho')  # Configuración para orientación, espaciado y aristas ortogonales
+        dot.atributos_nodo(shape='box', style='filled', fontname='Helvetica', fontsize='10')
+
+        # El recorrido se hace sobre los ids enteros del grafo compacto
+        grafo = GrafoParrafos.desde_diccionario(diccionario)
+        if not len(grafo):
+            return
+        nombres = grafo.nombres
+
+        # Determinar nodo raíz (__START__ o el primer párrafo)
+        nodo_raiz = '__START__'
+        # ~ nodo_raiz = 'A20-VERARBEITUNG'
+        if nodo_raiz not in grafo:
+            nodo_raiz = next(iter(grafo))
+        # Orden de visita y llamadas numeradas (una arista por llamada distinta)
+        niveles, orden_llamadas = grafo.recorrido_niveles(grafo.ids[nodo_raiz])
+        # Nivel de cada párrafo: camino más largo con los ciclos de PERFORM condensados,
+        # estable aunque cambie el orden de visita
+        rango, _ = grafo.rangos_condensados(grafo.ids[nodo_raiz])
+
+        # Organizar nodos por nivel para alinearlos en el gráfico
+        niveles_invertido = {}
+        for nodo in niveles:
+            niveles_invertido.setdefault(rango[nodo], []).append(nombres[nodo])
+
+        # Nodos de cada nivel alineados; los párrafos con SQL en otro color
+        for nivel in sorted(niveles_invertido):
+            with dot.subgrafo(rank='same'):
+                dot.atributos_nodo(fillcolor='lightblue')  # Color normal para párrafos
+                for nodo in niveles_invertido[nivel]:
+                    if analizar_sql and nodo in selects_por_parrafo:
+                        dot.nodo(nodo, fillcolor='lightgreen')  # Color para párrafos con SQL
+                    else:
+                        dot.nodo(nodo)
+
+        # Añadir las relaciones (edges) entre párrafos
+        if orden_llamadas:
+            with dot.subgrafo():
+                dot.atributos_arista(color='blue', style='solid', arrowsize='0.5')
+                for origen, destino, numero, veces in orden_llamadas:
+                    etiqueta = str(numero) if veces == 1 else f"{numero} (x{veces})"
+                    dot.arista(nombres[origen], nombres[destino], xlabel=etiqueta)
+
+        # Añadir nodos para sentencias SQL si está activado
+        if analizar_sql:
+            declarados = {nombres[nodo] for nodo in niveles}
+            pendientes = [(parrafo, selects) for parrafo, selects in selects_por_parrafo.items() if selects]
+            i = 0
+            while i < len(pendientes):
+                parrafo, selects = pendientes[i]
+                if parrafo not in declarados:
+                    # Párrafo con SQL fuera del recorrido: lo crea la arista de su primera sentencia,
+                    # así que va en el grafo raíz con atributos explícitos para que no sea una nota
+                    for idx, sel in enumerate(selects):
+                        nodo_select = f"{parrafo}_SQL_{idx+1}"
+                        dot.nodo(nodo_select, etiqueta=sel, shape='note', fillcolor='yellow')
+                        dot.arista(parrafo, nodo_select, style='dashed', color='orange')
+                    i += 1
+                    continue
+                # Párrafos consecutivos ya declarados: sentencias con los atributos comunes del subgrafo
+                with dot.subgrafo():
+                    dot.atributos_nodo(shape='note', fillcolor='yellow')
+                    dot.atributos_arista(style='dashed', color='orange')
+                    while i < len(pendientes) and pendientes[i][0] in declarados:
+                        parrafo, selects = pendientes[i]
+                        for idx, sel in enumerate(selects):
+                            nodo_select = f"{parrafo}_SQL_{idx+1}"
+                            dot.nodo(nodo_select, etiqueta=sel)
+                            dot.arista(parrafo, nodo_select)
+                        i += 1
+
+def ciclos_perform(diccionario):
+    """
+    Ciclos de PERFORM (recursión directa o indirecta) alcanzables desde la raíz del grafo.
+
+    Retorna:
+        list: Un ciclo por componente fuerte, como lista de párrafos en orden de visita
+    """
+    grafo = GrafoParrafos.desde_diccionario(diccionario)
+    if not len(grafo):
+        return []
+    nodo_raiz = '__START__' if '__START__' in grafo else next(iter(grafo))
+    _, ciclos = grafo.rangos_condensados(grafo.ids[nodo_raiz])
+    return [[grafo.nombres[nodo] for nodo in ciclo] for ciclo in ciclos]
+
+def informe_parrafos_muertos(ruta, entradas=(), jobs=1):
+    """
+    Modo --muertos: párrafos inalcanzables desde el inicio de la PROCEDURE DIVISION o
+    desde cualquier entrada declarada, de un programa o de todos los de un directorio.
+    Muestra el resumen por consola y guarda el detalle en CSV.
+
+    Parámetros:
+        ruta (str): Programa o directorio de fuentes (.cob, .cbl, .cobol)
+        entradas (iterable): Párrafos adicionales a considerar punto de entrada
+        jobs (int): Procesos para un directorio (0 = todos los núcleos)
+
+    Retorna:
+        str: Ruta del CSV generado
+    """
+    if os.path.isdir(ruta):
+        archivos = sorted(os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(ruta)
+                          for nombre in nombres if nombre.lower().endswith(('.cob', '.cbl', '.cobol')))
+        ruta_csv = os.path.join(ruta, 'parrafos_muertos.csv')
+    else:
+        archivos = [ruta]
+        ruta_csv = f"{os.path.splitext(ruta)[0]}_muertos.csv"
+
+    def mostrar(informes):
+        for informe in informes:
+            if informe.ignoradas:
+                print(f"{informe.programa}: entradas que no son parrafos del programa: {', '.join(informe.ignoradas)}")
+            if informe.muertos:
+                print(f"{informe.programa}: {len(informe.muertos)} de {informe.parrafos} parrafos inalcanzables "
+                      f"({informe.lineas_muertas} de {informe.lineas} lineas)")
+                for parrafo, lineas in informe.muertos:
+                    print(f"    {parrafo} ({lineas} lineas)")
+            yield informe
+
+    with fase('muertos'):
+        programas, muertos, lineas = guardar_csv(mostrar(informes_biblioteca(archivos, entradas, jobs)), ruta_csv)
+    print(f"Programas analizados: {programas}; parrafos inalcanzables: {muertos} ({lineas} lineas)")
+    print(f"Informe guardado en: {ruta_csv}")
+    return ruta_csv
+
+def construir_grafo_dot(diccionario, selects_por_parrafo, analizar_sql=False):
+    """
+    Genera en memoria el código DOT de escribir_grafo_dot.
+    
+    Retorna:
+        str: Código DOT del grafo
+    """
+    salida = io.StringIO()
+    escribir_grafo_dot(salida, diccionario, selects_por_parrafo, analizar_sql)
+    return salida.getvalue()
+
+def generar_grafo(diccionario, selects_por_parrafo, archivo_salida, analizar_sql=False, cache_render=None):
     """
     Genera un diagrama visual de las llamadas entre párrafos y sentencias SQL.
     
@@ -430,6 +481,7 @@ def generar_grafo(diccionario, selects_por_parrafo, archivo_salida, analizar_sql
         selects_por_parrafo (dict): Sentencias SQL por párrafo
         archivo_salida (str): Nombre base para el archivo de salida
         analizar_sql (bool): Si es True, incluye nodos para sentencias SQL
+        cache_render (CacheRender): Si se pasa, un DOT ya renderizado se copia desde la caché
     """
     print (f"@@llamadas en generar_grafo en entrada {diccionario}")
     """
@@ -440,73 +492,23 @@ def generar_grafo(diccionario, selects_por_parrafo, archivo_salida, analizar_sql
     dot.attr('node', shape='box', style='filled', fontname='Helvetica', fontsize='10')
      
     """
-    # Crear objeto Digraph de Graphviz
-    dot = Digraph(comment='Llamadas COBOL', format='svg', engine='dot')
-    dot.attr(dpi='300', rankdir='TB', nodesep='1.0', ranksep='1.5', splines='ortho')  # Configuración para orientación, espaciado y aristas ortogonales
-    # ~ dot.attr(dpi='300', rankdir='LR', nodesep='1.0', ranksep='0.25', splines='ortho')  # Configuración para orientación, espaciado y aristas ortogonales
-    # ~ dot.attr(dpi='300', rankdir='TB', nodesep='0.25', ranksep='1.0', splines='ortho')  # Configuración para orientación, espaciado y aristas ortogonales
-    dot.attr('node', shape='box', style='filled', fontname='Helvetica', fontsize='10')
-    
+    # Escribir el DOT en flujo a un archivo temporal junto al PDF (como Digraph.render con cleanup=True)
+    ruta_dot = f"./PDF/{archivo_salida}.gv"
+    os.makedirs(os.path.dirname(ruta_dot), exist_ok=True)
+    with fase('dot') as f:
+        with open(ruta_dot, 'w', encoding='utf-8') as salida:
+            escribir_grafo_dot(salida, diccionario, selects_por_parrafo, analizar_sql)
+            f.bytes = salida.tell()
 
-    # Estructuras para el recorrido del grafo
-    visitados = set()
-    niveles = {}
-    contador = [1]  # Contador para numerar las llamadas
-    orden_llamadas = {}
-
-    def asignar_niveles(nodo, nivel=0):
-        """
-        Función interna para asignar niveles a los nodos (párrafos) recursivamente.
-        """
-        if nodo in visitados:
-            return
-        visitados.add(nodo)
-        niveles[nodo] = nivel
-        for hijo in diccionario.get(nodo, []):
-            orden_llamadas[(nodo, hijo)] = contador[0]
-            contador[0] += 1
-            asignar_niveles(hijo, nivel + 1)
-
-    # Determinar nodo raíz (__START__ o el primer párrafo)
-    nodo_raiz = '__START__'
-    # ~ nodo_raiz = 'A20-VERARBEITUNG'
-    if nodo_raiz not in diccionario:
-        nodo_raiz = next(iter(diccionario))
-    asignar_niveles(nodo_raiz)
-
-    # Organizar nodos por nivel para alinearlos en el gráfico
-    niveles_invertido = {}
-    for nodo, nivel in niveles.items():
-        niveles_invertido.setdefault(nivel, []).append(nodo)
-
-    # Crear nodos del gráfico con colores según su tipo
-    for nivel in sorted(niveles_invertido):
-        with dot.subgraph() as s:
-            s.attr(rank='same')  # Mantener nodos del mismo nivel alineados
-            for nodo in niveles_invertido[nivel]:
-                color = 'lightblue'  # Color normal para párrafos
-                if analizar_sql and nodo in selects_por_parrafo:
-                    color = 'lightgreen'  # Color para párrafos con SQL
-                s.node(nodo, style='filled', fillcolor=color)
-
-    # Añadir las relaciones (edges) entre párrafos
-    for (origen, destino), numero in orden_llamadas.items():
-        dot.edge(origen, destino, color='blue', style='solid', arrowsize='0.5', xlabel=str(numero))
-
-    # Añadir nodos para sentencias SQL si está activado
-    if analizar_sql:
-        for parrafo, selects in selects_por_parrafo.items():
-            for idx, sel in enumerate(selects):
-                nodo_select = f"{parrafo}_SQL_{idx+1}"
-                dot.node(nodo_select, label=sel, shape='note', style='filled', fillcolor='yellow')
-                dot.edge(parrafo, nodo_select, style='dashed', color='orange')
-    
     # Generar el archivo PDF
     # ~ dot.render(archivo_salida, cleanup=True)
-    dot.save(filename=f"./PDF/{archivo_salida}.pdf")
-    print(f"Grafo generado: ./PDF/{archivo_salida}.pdf")
-    # Renderizar el archivo .pdf
-    pdf_path = dot.render(filename=f"./PDF/{archivo_salida}", format='pdf', cleanup=True)
+    # Renderizar el archivo .pdf (copiado desde la caché si el DOT no ha cambiado)
+    try:
+        with fase('render'):
+            pdf_path, desde_cache = renderizar_archivo(ruta_dot, f"./PDF/{archivo_salida}", 'pdf', 'dot', cache_render)
+    finally:
+        os.remove(ruta_dot)
+    print(f"Grafo generado: {pdf_path}{' (desde la cache de render)' if desde_cache else ''}")
 
     # Abrir el PDF automáticamente
     # ~ os.startfile(pdf_path)  # Solo funciona en Windows
@@ -525,10 +527,6 @@ if __name__ == "__main__":
     Punto de entrada principal del script.
     Maneja argumentos de línea de comandos e interfaz de usuario.
     """
-    # Activa el tracer
-    #sys.settrace(tracer)
-    sys.settrace(None)
-    
     analizar_sql = False  # Por defecto no analizar SQL
     parrafo_inicio = None  # Por defecto comenzar desde el principio
     
@@ -554,22 +552,56 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser(
         description="Genera PDF con grafico de jerarquia de parrafos.\n https://github.com/RickDecar/RoadMapProject"
     )
-    ap.add_argument("--src", required=True, help="Programa a analizar.")
+    ap.add_argument("--src", required=True, help="Programa a analizar (o directorio con --muertos).")
     ap.add_argument("--sql", required=False, default=False, choices=[True, False], help="Analisis de sentencias SQL.")
     ap.add_argument("--parrafo", required=False, default=None, help="Parrafo en el que empezar la jerarquia.")
+    ap.add_argument("--profundidad", required=False, type=int, default=None, help="Niveles maximos a desplegar en la jerarquia de texto.")
+    ap.add_argument("--cache-dir", required=False, default=None, help="Directorio de la cache de analisis (por defecto ROADMAP_CACHE_DIR o ~/.cache/roadmap).")
+    ap.add_argument("--no-cache", required=False, action="store_true", help="Analizar siempre sin usar la cache.")
+    ap.add_argument("--cache-stats", required=False, action="store_true", help="Mostrar estadisticas de aciertos/fallos de la cache.")
+    ap.add_argument("--no-render-cache", required=False, action="store_true", help="Renderizar siempre el PDF, sin reutilizar el de un DOT ya renderizado.")
+    ap.add_argument("--profile", required=False, nargs='?', const='', default=None, metavar="ARCHIVO_JSON",
+                    help="Medir tiempo, llamadas y bytes por fase y guardar el informe JSON (por defecto <fuente>_perfil.json) y las pilas plegadas (.folded) para flamegraph.")
+    ap.add_argument("--muertos", required=False, action="store_true",
+                    help="Solo informe de parrafos inalcanzables desde el inicio o desde una entrada declarada (ENTRY/USE), con sus lineas; --src puede ser un directorio.")
+    ap.add_argument("--entradas", required=False, default="", help="Parrafos adicionales, separados por comas, a considerar punto de entrada en --muertos.")
+    ap.add_argument("--jobs", required=False, type=int, default=1, help="Procesos para --muertos sobre un directorio (0 = todos los nucleos).")
     
     args = ap.parse_args()
     
     ruta_del_programa_cobol = args.src
     analizar_sql = args.sql
     parrafo_inicio = args.parrafo
+
+    if args.profile is not None:
+        # El informe se escribe al salir, también si el render de Graphviz falla
+        perfil = activar()
+        ruta_perfil = args.profile or f"{os.path.splitext(ruta_del_programa_cobol)[0]}_perfil.json"
+        atexit.register(informar, perfil, ruta_perfil)
+
+    if args.muertos:
+        informe_parrafos_muertos(ruta_del_programa_cobol, args.entradas.split(','), args.jobs)
+        sys.exit(0)
     
-    # Ejecutar análisis principal
-    diccionario_llamadas, bloques_exec_sql, selects_por_parrafo = analizar_cobol(
-        ruta_del_programa_cobol, 
-        parrafo_inicio, 
-        analizar_sql
-    )
+    # Ejecutar análisis principal (desde la caché si el fuente no ha cambiado)
+    if args.no_cache:
+        with fase('analisis'):
+            diccionario_llamadas, bloques_exec_sql, selects_por_parrafo = analizar_cobol(
+                ruta_del_programa_cobol, 
+                parrafo_inicio, 
+                analizar_sql
+            )
+    else:
+        cache = CacheAnalisis(args.cache_dir)
+        with fase('analisis'):
+            diccionario_llamadas, bloques_exec_sql, selects_por_parrafo = analizar_cobol_cache(
+                ruta_del_programa_cobol, 
+                parrafo_inicio, 
+                analizar_sql,
+                cache
+            )
+        if args.cache_stats:
+            print(f"Estadisticas de cache: {cache.estadisticas()}")
     
     # Mostrar resultados básicos en consola
     print("dicccionario de llamadas ", diccionario_llamadas)
@@ -577,16 +609,24 @@ if __name__ == "__main__":
     if analizar_sql:
         print(f"Total de bloques EXEC SQL encontrados: {bloques_exec_sql}")
     print("Relaciones de llamadas:")
-    imprimir_arbol_llamadas(diccionario_llamadas, selects_por_parrafo)
+    with fase('jerarquia'):
+        imprimir_arbol_llamadas(diccionario_llamadas, selects_por_parrafo, profundidad_maxima=args.profundidad)
+
+    ciclos = ciclos_perform(diccionario_llamadas)
+    if ciclos:
+        print(f"Ciclos de PERFORM detectados: {len(ciclos)}")
+        for ciclo in ciclos:
+            print(f"  {' <-> '.join(ciclo)}")
 
     # Generar nombre base para archivos de salida
     nombre_archivo_salida = os.path.splitext(ruta_del_programa_cobol)[0]
     
     # Guardar siempre el archivo de texto con la jerarquía
-    archivo_txt = guardar_arbol_llamadas(diccionario_llamadas, selects_por_parrafo, nombre_archivo_salida)
+    with fase('jerarquia'):
+        archivo_txt = guardar_arbol_llamadas(diccionario_llamadas, selects_por_parrafo, nombre_archivo_salida, args.profundidad)
     
     # Generar el gráfico PDF
-    generar_grafo(diccionario_llamadas, selects_por_parrafo, nombre_archivo_salida, analizar_sql)
-    
-    # Desactiva el tracer (opcional, pero buena práctica)
-    sys.settrace(None)
+    cache_render = None
+    if not args.no_render_cache:
+        cache_render = CacheRender(os.path.join(args.cache_dir, 'render') if args.cache_dir else None)
+    generar_grafo(diccionario_llamadas, selects_por_parrafo, nombre_archivo_salida, analizar_sql, cache_render)
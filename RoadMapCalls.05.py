@@ -13,8 +13,22 @@ import re
 import sys
 import json  # Añadido para guardar el diccionario en JSON
 import argparse   # Gestion de parametros
+import atexit     # Para escribir el perfil (--profile) al terminar
 from graphviz import Digraph
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor  # Análisis en paralelo de directorios
+
+# Índice incremental del directorio (indice_llamadas.py en el mismo directorio)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from indice_llamadas import IndiceLlamadas
+from fuentes_cobol import es_ruta
+from perfilador import activar, fase, informar
+from render_lotes import ColaRender
+from cache_render import CacheRender, renderizar
+from motor_cobol import analizar_programa, calls_directorio, detectar_call_linea, destino_call_directorio
+
+# Versión del analizador: cambiarla obliga a reanalizar los miembros indexados
+VERSION_ANALIZADOR = '05.1'
 
 # ------------------------------------------------------------
 # FUNCIONES PRINCIPALES
@@ -25,25 +39,15 @@ def detectar_call(linea):
     Detecta llamadas a otros módulos COBOL (CALL o EXEC CICS LINK/START/INVOKE).
     Retorna el nombre del módulo llamado, si lo encuentra.
     """
-    linea = linea.upper()
-
-    # CALL 'MODULO' o CALL WS-MODULO
-    # ~ m = re.search(r"\bCALL\s+['\"]?([\w-]+)['\"]?", linea)
-    m = re.search(r"\sCALL\s+['\"]?([\w-]+)['\"]?", linea)
-    if m:
+    # Los patrones CALL / EXEC CICS son los del motor común (motor_cobol.py)
+    encontrada = detectar_call_linea(linea.upper())
+    if not encontrada:
+        return None
+    call, cics, _ = encontrada
+    if call:
         # parte el nombre del programa por un - ( para decidir si es una variable o no)
-        n = re.search(r"([\w+]+)?-([\w+]+)?", m.group(1))
-        if n:
-             return n.group(2)
-        else:
-             return m.group(1)
-
-    # EXEC CICS LINK/START/INVOKE PROGRAM('MODULO') END-EXEC
-    m = re.search(r"EXEC\s+CICS\s+(?:LINK|START|INVOKE)\s+PROGRAM\s*\(['\"]?([\w-]+)['\"]?\)", linea)
-    if m:
-        return "CICS-" + m.group(1)
-
-    return None
+        return destino_call_directorio(call)
+    return "CICS-" + cics
 
 
 def es_linea_ignorable(linea):
@@ -54,33 +58,72 @@ def es_linea_ignorable(linea):
     return not linea.strip() or (len(linea) > 6 and linea[6] == '*') or (re.search(r"\s+MOVE\s+", linea)) or linea[7] != ' '
 
 
-def analizar_cobol(ruta_archivo):
+def nombre_origen(ruta_archivo):
+    """
+    Nombre del programa (6 primeros caracteres del nombre de archivo sin extensión).
+    """
+    return os.path.splitext(os.path.basename(ruta_archivo))[0].upper()[:6]
+
+def analizar_cobol(fuente, nombre=None):
     """
     Analiza un programa COBOL y extrae todas las llamadas externas (CALL y CICS).
     No tiene en cuenta los párrafos.
+    El fuente puede ser una ruta o el contenido en memoria (bytes, str, objeto archivo o
+    iterable de líneas); en ese caso el origen se toma de 'nombre' o del atributo name.
+    Retorna un diccionario {origen: [llamados]} propio del archivo; el llamante es quien
+    lo acumula en el diccionario del directorio (no se usan variables globales).
+    Si el análisis falla se informa del error y el diccionario queda vacío.
+    """
+    llamadas = analizar_miembro(fuente, nombre)
+    return defaultdict(list) if llamadas is None else llamadas
+
+def analizar_miembro(fuente, nombre=None):
+    """
+    Igual que analizar_cobol, pero retorna None si el análisis falla, para distinguir
+    un error (transitorio o no) de un programa que no hace llamadas.
     """
     llamadas = defaultdict(list)
-    origen = os.path.splitext(os.path.basename(ruta_archivo))[0].upper()[:6]
-    
-    print (f"Origen:{origen}<-\t Origen[:6]{origen[:6]}")
+    if nombre is None:
+        nombre = fuente if es_ruta(fuente) else getattr(fuente, 'name', '')
+    origen = nombre_origen(os.fspath(nombre))
     
     try:
-        with open(ruta_archivo, 'r', encoding='latin-1') as archivo:
-            for linea in archivo:
-                linea = linea.upper()
-                if es_linea_ignorable(linea):
-                    continue
-
-                destino = detectar_call(linea)
-                if destino:
-                    llamadas[origen].append(destino.upper())
-                    llamadasdir[origen[:6]].append(destino.upper())
+        # Sólo se piden las llamadas al motor común: las líneas sin CALL/CICS no se examinan más
+        resultado = analizar_programa(fuente, parrafos=False, sql=False, calls=True)
+        for destino in calls_directorio(resultado['calls']):
+            llamadas[origen].append(destino)
 
     except Exception as e:
-        print(f"Error al analizar el archivo: {e}")
+        print(f"Error al analizar el archivo {nombre}: {e}")
+        return None
 
     return llamadas
 
+def analizar_archivos(archivos, jobs=1):
+    """
+    Analiza una lista de archivos COBOL, en paralelo si jobs > 1.
+
+    Parámetros:
+        archivos (list): Rutas de los fuentes a analizar
+        jobs (int): Número de procesos (1 = secuencial en este proceso, 0 = todos los núcleos)
+
+    Retorna:
+        generator: Diccionario de llamadas de cada archivo (None si su análisis falló), en el
+                   mismo orden que 'archivos', de modo que la fusión del resultado es determinista
+                   sea cual sea el número de procesos. En modo secuencial cada archivo se analiza
+                   al pedir su resultado.
+    """
+    if jobs == 1 or len(archivos) < 2:
+        for archivo in archivos:
+            yield analizar_miembro(archivo)
+        return
+
+    procesos = jobs if jobs > 0 else (os.cpu_count() or 1)
+    # Lotes grandes para que el coste de comunicación no domine con decenas de miles de miembros
+    lote = max(1, len(archivos) // (procesos * 16))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        yield from pool.map(analizar_miembro, archivos, chunksize=lote)
+
 def guardar_diccionario(llamadas, archivo_salida):
     """
     Guarda el diccionario de llamadas en un archivo .dict (formato JSON).
@@ -95,36 +138,61 @@ def guardar_diccionario(llamadas, archivo_salida):
     except Exception as e:
         print(f"Error al guardar el diccionario: {e}")
 
-def generar_grafo_dir(llamadasdir, archivo_salida):
+def construir_indice_inverso(llamadasdir):
+    """
+    Construye una sola vez el índice inverso llamado -> llamantes del directorio.
+    Los llamados se agrupan por sus 5 primeros caracteres, que es la comparación que usa
+    generar_grafo_dir para decidir si un programa llama al analizado (llamado[:5] == prog[:5]).
+
+    Parámetros:
+        llamadasdir (dict): Llamadas de todo el directorio {llamante: [llamados]}
+
+    Retorna:
+        dict: {prefijo_llamado: [llamantes]} con los llamantes en el orden de llamadasdir
+    """
+    inverso = defaultdict(dict)  # dict como conjunto ordenado de llamantes
+    for llamante, llamados in llamadasdir.items():
+        for llamado in llamados:
+            inverso[llamado[:5]][llamante] = None
+    return {prefijo: list(llamantes) for prefijo, llamantes in inverso.items()}
+
+def generar_grafo_dir(llamadasdir, archivo_salida, inverso=None, prog_cobol=None, cola=None, cache=None):
     """
     Genera un grafo PDF con las llamadas externas detectadas.
+
+    Parámetros:
+        llamadasdir (dict): Llamadas de todo el directorio {llamante: [llamados]}
+        archivo_salida (str): Nombre base del PDF (normalmente el fuente analizado)
+        inverso (dict): Índice de construir_indice_inverso (se construye si no se pasa)
+        prog_cobol (str): Programa a dibujar (por defecto los 6 primeros caracteres de archivo_salida)
+        cola (ColaRender): Si se pasa, el render se encola en lugar de hacerse aquí
+        cache (CacheRender): Caché de renders para el render directo (None = renderizar siempre)
     """
     
     # a partir del nombre del programa (SKZ+numeros+tipo+version.Lenguaje [FE000x00.COBOL] nos quedamos con el nombre del programa a analizar)
-    prog_cobol = args.src[:6]
+    if prog_cobol is None:
+        prog_cobol = archivo_salida[:6]
+    if inverso is None:
+        inverso = construir_indice_inverso(llamadasdir)
     
     dot = Digraph(comment='Llamadas COBOL', format='pdf', engine='dot')
     dot.attr(dpi='200', rankdir='TB', nodesep='0.5', ranksep='0.3 equally', splines='ortho')
     
-    print (f"get[]:{llamadasdir[prog_cobol]}")
+    print (f"get[]:{llamadasdir.get(prog_cobol, [])}")
     
     # genera el nodo del programa analizado
     dot.node(prog_cobol, prog_cobol, style='filled', fillcolor='#B4C7E7', shape='box', fontname='Helvetica')
     
-    #crear los nodos de los programas que llaman al programa analizado
-    for llamante, llamados in llamadasdir.items():
-        # Quitar duplicados de llamados
-        llamados_unicos = set(llamados)
-        print(f"llamante:{llamante}\nllamados:{llamados_unicos}")
-        for llamado in llamados_unicos:
-            if llamado[:6] == prog_cobol or llamado[:5] == prog_cobol[:5]:
-                color = '#A4C2F4'
-                shape = 'house'
-                dot.node(llamante, llamante, style='filled', fillcolor=color, shape=shape, fontname='Helvetica')
-                dot.edge(llamante, prog_cobol, color='#3D85C6', arrowsize='0.7')
+    #crear los nodos de los programas que llaman al programa analizado (consulta directa al índice inverso)
+    for llamante in inverso.get(prog_cobol[:5], []):
+        color = '#A4C2F4'
+        shape = 'house'
+        dot.node(llamante, llamante, style='filled', fillcolor=color, shape=shape, fontname='Helvetica')
+        dot.edge(llamante, prog_cobol, color='#3D85C6', arrowsize='0.7')
                 
     #crear los nodos de los programas llamdos por el programa analizado
-    for destino in set(llamadasdir[prog_cobol]):
+    # Sin duplicados y en orden de aparición (un set cambia de orden entre ejecuciones y con él el DOT)
+    for destino in dict.fromkeys(llamadasdir.get(prog_cobol, [])):
         color = '#A4C2F4'
         shape = 'house'
         shape = 'component'
@@ -138,15 +206,22 @@ def generar_grafo_dir(llamadasdir, archivo_salida):
             
         
 
-    dot.save(filename=f"{archivo_salida}.pdf")
+    with fase('dot') as f:
+        f.bytes = len(dot.source)
+    if cola is not None:
+        print(f"Grafo encolado: {cola.encolar(dot.source, archivo_salida)}")
+        return
     # ~ pdf_path = dot.render(filename=f"{archivo_salida}.pdf", cleanup=True)
-    pdf_path = dot.render(filename=f"{archivo_salida}", cleanup=True)
+    with fase('render'):
+        pdf_path, _ = renderizar(dot.source, archivo_salida, 'pdf', 'dot', cache)
     
     print(f"Grafo generado: {pdf_path}")
 
-def generar_grafo(llamadas, archivo_salida):
+def generar_grafo(llamadas, archivo_salida, cola=None, cache=None):
     """
     Genera un grafo PDF con las llamadas externas detectadas.
+    Si se pasa una ColaRender, el render se encola en lugar de hacerse aquí; si no, se
+    renderiza directamente (desde la CacheRender si se pasa y el DOT no ha cambiado).
     """
     dot = Digraph(comment='Llamadas COBOL', format='pdf', engine='dot')
     # ~ dot.attr(dpi='200', rankdir='TB', nodesep='1.0', ranksep='1.3', splines='ortho')
@@ -159,8 +234,8 @@ def generar_grafo(llamadas, archivo_salida):
     for origen, destinos in llamadas.items():
         dot.node(origen, origen, style='filled', fillcolor='#B4C7E7', shape='box', fontname='Helvetica')
         
-        # Quitar duplicados de destinos
-        destinos_unicos = set(destinos)
+        # Quitar duplicados de destinos (en orden de aparición: el DOT es el mismo en cada ejecución)
+        destinos_unicos = dict.fromkeys(destinos)
         
         for destino in destinos_unicos:
             color = '#A4C2F4'
@@ -175,9 +250,14 @@ def generar_grafo(llamadas, archivo_salida):
             #dot.edge(origen, destino, color='#4A86E8', arrowsize='0.7')
             dot.edge(origen, destino, color='#3D85C6', arrowsize='0.7')
 
-    dot.save(filename=f"./PDF/{archivo_salida}.pdf")
+    with fase('dot') as f:
+        f.bytes = len(dot.source)
+    if cola is not None:
+        print(f"Grafo encolado: {cola.encolar(dot.source, f'./PDF/{archivo_salida}')}")
+        return
     # ~ pdf_path = dot.render(filename=f"{archivo_salida}.pdf", cleanup=True)
-    pdf_path = dot.render(filename=f"./PDF/{archivo_salida}", cleanup=True)
+    with fase('render'):
+        pdf_path, _ = renderizar(dot.source, f"./PDF/{archivo_salida}", 'pdf', 'dot', cache)
     
     print(f"Grafo generado: {pdf_path}")
 
@@ -217,12 +297,27 @@ if __name__ == "__main__":
     ap.add_argument("--dir", required=True, help="Directorio de Fuentes.")
     ap.add_argument("--all", required=False, action="store_true", help="genera grafo individual para cada los fuentes.")
     ap.add_argument("--debug", required=False, action="store_true", help="Mostrar pasos salida.")
+    ap.add_argument("--jobs", required=False, type=int, default=1, help="Procesos para analizar los fuentes en paralelo (1 = secuencial, 0 = todos los nucleos).")
+    ap.add_argument("--indice", required=False, default=None, help="Archivo del indice incremental del directorio (por defecto dentro de ROADMAP_CACHE_DIR).")
+    ap.add_argument("--no-indice", required=False, action="store_true", help="Analizar todos los fuentes sin usar el indice incremental.")
+    ap.add_argument("--targets", required=False, nargs='+', default=[], help="Otros programas para los que generar el grafo de llamantes/llamados con el mismo analisis.")
+    ap.add_argument("--all-targets", required=False, action="store_true", help="Generar el grafo de llamantes/llamados de todos los programas del directorio.")
+    ap.add_argument("--render-jobs", required=False, type=int, default=0, help="Renders de Graphviz simultaneos con --all / --targets (0 = todos los nucleos).")
+    ap.add_argument("--render-timeout", required=False, type=float, default=300, help="Segundos maximos por render antes de cancelarlo.")
+    ap.add_argument("--no-render-cache", required=False, action="store_true", help="Renderizar siempre, sin reutilizar los PDF de DOT ya renderizados.")
+    ap.add_argument("--profile", required=False, nargs='?', const='', default=None, metavar="ARCHIVO_JSON",
+                    help="Medir tiempo, llamadas y bytes por fase y guardar el informe JSON (por defecto ./tmp/<dir>_perfil.json) y las pilas plegadas (.folded). Con --jobs > 1 las fases internas del analisis ocurren en otros procesos y solo se mide el total.")
     
     args = ap.parse_args()
     
     print (f"parametros \n src:{args.src}\n dir:{args.dir}\n all:{args.all}\n debug:{args.debug}")
     
     ruta_cobol = args.dir + "/" + args.src
+
+    if args.profile is not None:
+        perfil = activar()
+        ruta_perfil = args.profile or f"./tmp/{os.path.basename(os.path.normpath(args.dir))}_perfil.json"
+        atexit.register(informar, perfil, ruta_perfil)
     
     if os.path.isfile(ruta_cobol):
         if args.debug:
@@ -234,10 +329,32 @@ if __name__ == "__main__":
         if not archivos:
             print("No se encontraron archivos COBOL (.cob,.cbl o .COBOL) en el directorio.")
             sys.exit(1)
+        if args.no_indice:
+            resultados = analizar_archivos(archivos, args.jobs)
+        else:
+            # Sólo se reanalizan los miembros nuevos o modificados desde la última ejecución
+            indice = IndiceLlamadas(args.dir, VERSION_ANALIZADOR, args.indice)
+            with fase('analisis'):
+                lista_resultados, estadisticas = indice.actualizar(archivos, analizar_archivos, args.jobs)
+            resultados = iter(lista_resultados)
+            if args.debug:
+                print(f"Indice {indice.ruta}: {estadisticas}")
+        # Los renders se hacen en paralelo mientras sigue el análisis; los DOT repetidos se copian
+        cola = ColaRender(args.render_jobs, args.render_timeout,
+                          cache=None if args.no_render_cache else CacheRender())
         for archivo in archivos:
             archivo_salida = os.path.splitext(os.path.basename(archivo))[0]
             print(f"\nProcesando archivo: {archivo}")
-            llamadas = analizar_cobol(archivo)
+            origen = nombre_origen(archivo)
+            print (f"Origen:{origen}<-\t Origen[:6]{origen[:6]}")
+            with fase('analisis'):
+                llamadas = next(resultados)
+            if llamadas is None:
+                # El error ya se mostró al analizar; el miembro cuenta como sin llamadas
+                llamadas = defaultdict(list)
+            # Acumular en el diccionario del directorio, en el orden de los archivos
+            for llamante, llamados in llamadas.items():
+                llamadasdir[llamante].extend(llamados)
             
             total_llamadas = sum(len(v) for v in llamadas.values())
             print(f"{total_llamadas} llamadas únicas encontradas en {archivo}.")
@@ -248,10 +365,40 @@ if __name__ == "__main__":
             
             if (args.all) and (total_llamadas > 0):
                 guardar_diccionario(llamadas, archivo_salida)
-                generar_grafo(llamadas, archivo_salida)
-        if (total_llamadas > 0):
+                generar_grafo(llamadas, archivo_salida, cola)
+        # Hay grafo del directorio si algún miembro hace llamadas (no sólo el último analizado)
+        if not any(llamadasdir.values()):
+            print("Ningun programa del directorio hace llamadas: no se generan grafos de llamantes/llamados.")
+        else:
             guardar_diccionario(llamadasdir, args.dir)
-            generar_grafo_dir(llamadasdir, args.src)
+            # Índice inverso construido una vez: cada grafo consulta sólo sus llamantes
+            inverso = construir_indice_inverso(llamadasdir)
+            generar_grafo_dir(llamadasdir, args.src, inverso, cola=cola)
+            objetivos = list(args.targets)
+            if args.all_targets:
+                # Todos los programas escaneados, también los que no llaman a nadie (su grafo
+                # de llamantes es justo el que da el índice inverso), y los llamados sin fuente
+                # en el directorio con su nombre completo (el prefijo de 5 caracteres sólo sirve
+                # para consultar 'inverso'); las llamadas CICS (prefijo 'CICS-') no son programas
+                programas = dict.fromkeys(nombre_origen(archivo) for archivo in archivos)
+                con_fuente = {programa[:5] for programa in programas}
+                for llamados in llamadasdir.values():
+                    for llamado in llamados:
+                        if not llamado.startswith('CICS-') and llamado[:5] not in con_fuente:
+                            programas[llamado[:6]] = None
+                programas.pop(nombre_origen(args.src), None)
+                objetivos = list(dict.fromkeys(objetivos + list(programas)))
+            for objetivo in objetivos:
+                generar_grafo_dir(llamadasdir, objetivo, inverso, cola=cola)
+        with fase('render'):
+            renders = cola.cerrar()
+        print(f"Renders: {renders['renderizados']} generados, {renders['desde_cache']} desde la cache, "
+              f"{renders['duplicados']} copiados de un DOT identico, "
+              f"{renders['fallos']} fallidos, {renders['timeouts']} cancelados por timeout")
+        for ruta_pdf, mensaje in renders['errores']:
+            print(f"Error al renderizar {ruta_pdf}: {mensaje}")
+        if renders['errores']:
+            sys.exit(1)
     else:
         print(f"Ko {args.dir}/{args.src}")
         
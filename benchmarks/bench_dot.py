@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Comparación de la generación del DOT con graphviz.Digraph y con el escritor en flujo.
+
+Genera con generar_corpus.py un programa de muchos párrafos (20000 por defecto), lo
+analiza con RoadMap.08 y construye el grafo de llamadas de dos formas:
+
+    digraph   Implementación anterior de construir_grafo_dot (Digraph y .source)
+    flujo     RoadMap.08.escribir_grafo_dot (EscritorDot)
+
+Para cada una mide el mejor tiempo escribiendo el DOT a un archivo y el pico de memoria
+reservada por Python (tracemalloc). Antes comprueba que los dos DOT son equivalentes:
+mismos nodos con los mismos atributos efectivos (valores por defecto del grafo y de
+los subgrafos aplicados), mismas aristas en el mismo orden y mismos grupos rank=same.
+Termina con código 1 si no lo son.
+
+Uso:
+    python benchmarks/bench_dot.py [--parrafos N] [--fanout X] [--densidad-sql X] [--repeticiones N]
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import importlib.util
+
+from graphviz import Digraph
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generar_corpus import generar_programa
+
+def cargar_roadmap08():
+    spec = importlib.util.spec_from_file_location("roadmap08", os.path.join(RAIZ, "RoadMap.08.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def construir_grafo_digraph(roadmap08, diccionario, selects_por_parrafo, analizar_sql=False):
+    """Implementación anterior (Digraph con los atributos en cada nodo y arista), como referencia."""
+    dot = Digraph(comment='Llamadas COBOL', format='svg', engine='dot')
+    dot.attr(dpi='300', rankdir='TB', nodesep='1.0', ranksep='1.5', splines='ortho')
+    dot.attr('node', shape='box', style='filled', fontname='Helvetica', fontsize='10')
+    grafo = roadmap08.GrafoParrafos.desde_diccionario(diccionario)
+    nombres = grafo.nombres
+    nodo_raiz = '__START__'
+    if nodo_raiz not in grafo:
+        nodo_raiz = next(iter(grafo))
+    niveles, orden_llamadas = grafo.recorrido_niveles(grafo.ids[nodo_raiz])
+    rango, _ = grafo.rangos_condensados(grafo.ids[nodo_raiz])
+    niveles_invertido = {}
+    for nodo in niveles:
+        niveles_invertido.setdefault(rango[nodo], []).append(nombres[nodo])
+    for nivel in sorted(niveles_invertido):
+        with dot.subgraph() as s:
+            s.attr(rank='same')
+            for nodo in niveles_invertido[nivel]:
+                color = 'lightblue'
+                if analizar_sql and nodo in selects_por_parrafo:
+                    color = 'lightgreen'
+                s.node(nodo, style='filled', fillcolor=color)
+    for origen, destino, numero, veces in orden_llamadas:
+        etiqueta = str(numero) if veces == 1 else f"{numero} (x{veces})"
+        dot.edge(nombres[origen], nombres[destino], color='blue', style='solid', arrowsize='0.5', xlabel=etiqueta)
+    if analizar_sql:
+        for parrafo, selects in selects_por_parrafo.items():
+            for idx, sel in enumerate(selects):
+                nodo_select = f"{parrafo}_SQL_{idx+1}"
+                dot.node(nodo_select, label=sel, shape='note', style='filled', fillcolor='yellow')
+                dot.edge(parrafo, nodo_select, style='dashed', color='orange')
+    return dot
+
+# Tokens de una sentencia DOT: cadena entre comillas, flecha, puntuación o identificador
+RE_TOKEN_DOT = re.compile(r'"(?:\\.|[^"\\])*"|->|[{}\[\]=]|[^\s{}\[\]="]+')
+
+def _valor(token):
+    if token.startswith('"'):
+        return re.sub(r'\\"', '"', token[1:-1])
+    return token
+
+def _atributos(tokens):
+    # 'clave = valor' repetido (dentro de [...] o sueltos)
+    return {_valor(tokens[i]): _valor(tokens[i + 2]) for i in range(0, len(tokens) - 2, 3) if tokens[i + 1] == '='}
+
+def canonico(fuente):
+    """
+    Forma canónica de un DOT de una sentencia por línea (como los que generan Digraph
+    y EscritorDot): atributos del grafo, nodos por orden de creación con sus atributos
+    efectivos, aristas en orden con sus atributos efectivos y grupos rank=same.
+    """
+    ambitos = [{'node': {}, 'edge': {}, 'grafo': {}, 'miembros': []}]
+    nodos = {}
+    aristas = []
+    grupos = []
+
+    def mencionar(nombre):
+        if nombre not in nodos:
+            nodos[nombre] = dict(ambitos[-1]['node'])
+        ambitos[-1]['miembros'].append(nombre)
+
+    for linea in fuente.splitlines():
+        linea = linea.strip()
+        if not linea or linea.startswith('//') or linea.startswith('digraph'):
+            continue
+        tokens = RE_TOKEN_DOT.findall(linea)
+        if tokens == ['{']:
+            ambitos.append({'node': dict(ambitos[-1]['node']), 'edge': dict(ambitos[-1]['edge']),
+                            'grafo': {}, 'miembros': []})
+            continue
+        if tokens == ['}']:
+            if len(ambitos) == 1:
+                break  # Fin del digraph
+            ambito = ambitos.pop()
+            if ambito['grafo'].get('rank') == 'same':
+                grupos.append(tuple(sorted(set(ambito['miembros']))))
+            ambitos[-1]['miembros'].extend(ambito['miembros'])
+            continue
+        if '[' in tokens:
+            cabeza, atributos = tokens[:tokens.index('[')], _atributos(tokens[tokens.index('[') + 1:-1])
+        else:
+            cabeza, atributos = tokens, None
+        if cabeza in (['node'], ['edge'], ['graph']):
+            destino = ambitos[-1]['grafo' if cabeza == ['graph'] else cabeza[0]]
+            destino.update(atributos)
+        elif len(cabeza) == 3 and cabeza[1] == '->':
+            origen, destino = _valor(cabeza[0]), _valor(cabeza[2])
+            mencionar(origen)
+            mencionar(destino)
+            aristas.append((origen, destino, tuple(sorted({**ambitos[-1]['edge'], **(atributos or {})}.items()))))
+        elif len(cabeza) == 1:
+            nombre = _valor(cabeza[0])
+            mencionar(nombre)
+            nodos[nombre].update(atributos or {})
+        else:
+            ambitos[-1]['grafo'].update(_atributos(tokens))
+
+    return {
+        'grafo': ambitos[0]['grafo'],
+        'nodos': [(nombre, tuple(sorted(atributos.items()))) for nombre, atributos in nodos.items()],
+        'aristas': aristas,
+        'rank_same': sorted(grupos),
+    }
+
+def escribir_digraph(roadmap08, ruta, llamadas, selects):
+    dot = construir_grafo_digraph(roadmap08, llamadas, selects, True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(dot.source)
+
+def escribir_flujo(roadmap08, ruta, llamadas, selects):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        roadmap08.escribir_grafo_dot(f, llamadas, selects, True)
+
+def medir(funcion, repeticiones):
+    """Mejor tiempo de 'repeticiones' ejecuciones y pico de memoria de una ejecución aparte."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    # tracemalloc ralentiza las reservas: la memoria se mide en una pasada propia
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, pico
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compara Digraph con el escritor DOT en flujo sobre un grafo grande.")
+    ap.add_argument("--parrafos", type=int, default=20000, help="Parrafos del programa sintetico.")
+    ap.add_argument("--fanout", type=float, default=3.0, help="PERFORM medios por parrafo.")
+    ap.add_argument("--densidad-sql", type=float, default=0.05, help="Densidad de bloques EXEC SQL.")
+    ap.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por variante (se toma el mejor tiempo).")
+    args = ap.parse_args()
+
+    roadmap08 = cargar_roadmap08()
+    directorio = tempfile.mkdtemp(prefix='roadmap_bench_dot_')
+    fuente = os.path.join(directorio, 'GRANDE.cob')
+    with open(fuente, 'w', encoding='latin-1') as f:
+        f.write(generar_programa(lineas=args.parrafos * 15, parrafos=args.parrafos, fanout=args.fanout,
+                                 densidad_sql=args.densidad_sql))
+    with contextlib.redirect_stdout(io.StringIO()):
+        llamadas, _, selects = roadmap08.analizar_cobol(fuente, None, True)
+
+    ruta_digraph = os.path.join(directorio, 'digraph.gv')
+    ruta_flujo = os.path.join(directorio, 'flujo.gv')
+    try:
+        escribir_digraph(roadmap08, ruta_digraph, llamadas, selects)
+        escribir_flujo(roadmap08, ruta_flujo, llamadas, selects)
+        with open(ruta_digraph, encoding='utf-8') as f:
+            referencia = canonico(f.read())
+        with open(ruta_flujo, encoding='utf-8') as f:
+            flujo = canonico(f.read())
+        print(f"Grafo: {len(referencia['nodos'])} nodos, {len(referencia['aristas'])} aristas, "
+              f"{len(referencia['rank_same'])} niveles")
+        diferencias = [clave for clave in referencia if referencia[clave] != flujo[clave]]
+        if diferencias:
+            print(f"Los DOT no son equivalentes: difieren {', '.join(diferencias)}")
+            sys.exit(1)
+        print("DOT equivalentes (nodos, aristas, atributos efectivos y rank=same)")
+
+        resultados = {}
+        for nombre, funcion, ruta in (("digraph", escribir_digraph, ruta_digraph),
+                                      ("flujo", escribir_flujo, ruta_flujo)):
+            segundos, pico = medir(lambda: funcion(roadmap08, ruta, llamadas, selects), args.repeticiones)
+            resultados[nombre] = (segundos, pico)
+            print(f"  {nombre:8s} {segundos * 1000:10.1f} ms  pico {pico / 1e6:8.1f} MB  "
+                  f"DOT {os.path.getsize(ruta) / 1e6:6.1f} MB")
+        (t_ref, m_ref), (t_flujo, m_flujo) = resultados['digraph'], resultados['flujo']
+        print(f"Flujo frente a Digraph: tiempo x{t_ref / t_flujo:.2f} mas rapido, memoria x{m_ref / max(m_flujo, 1):.1f} menos")
+    finally:
+        for ruta in (ruta_digraph, ruta_flujo, fuente):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        os.rmdir(directorio)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del reconocedor de sentencias SQL de RoadMap.08.py.
+
+Genera un corpus de bloques EXEC SQL con la forma de los fuentes reales (SELECT INTO,
+cursores, INSERT/UPDATE/DELETE, FETCH, COMMIT) más bloques patológicos con listas
+SELECT ... INTO de miles de columnas, y mide extraer_sentencias_sql frente a la
+implementación anterior de siete pasadas re.finditer. Antes de medir comprueba que
+ambas dan el mismo resultado en los casos de CASOS_REFERENCIA (y el esperado en los
+de CASOS_ESPERADOS, donde la anterior también fallaba).
+
+Uso:
+    python benchmarks/bench_sql.py [--repeticiones N] [--columnas N]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import importlib.util
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cargar_roadmap08():
+    spec = importlib.util.spec_from_file_location("roadmap08", os.path.join(RAIZ, "RoadMap.08.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def extraer_sentencias_sql_regex(bloque_sql):
+    """Implementación anterior (siete pasadas re.finditer), como referencia."""
+    sentencias = []
+    bloque_sql = bloque_sql.upper()
+    for match in re.finditer(r"SELECT .*?FROM\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("SELECT", match.group(1)))
+    for match in re.finditer(r"INSERT\s+INTO\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("INSERT", match.group(1)))
+    for match in re.finditer(r"UPDATE\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("UPDATE", match.group(1)))
+    for match in re.finditer(r"DELETE\s+FROM\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("DELETE", match.group(1)))
+    for match in re.finditer(r"OPEN\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("OPEN CURSOR", match.group(1)))
+    for match in re.finditer(r"CLOSE\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("CLOSE CURSOR", match.group(1)))
+    for match in re.finditer(r"FETCH\s+(\w+)", bloque_sql, re.IGNORECASE):
+        sentencias.append(("FETCH CURSOR", match.group(1)))
+    if 'COMMIT' in bloque_sql:
+        sentencias.append(("COMMIT", ''))
+    if 'ROLLBACK' in bloque_sql:
+        sentencias.append(("ROLLBACK", ''))
+    return sentencias
+
+# Bloques en los que el reconocedor debe coincidir con la implementación anterior
+CASOS_REFERENCIA = [
+    "SELECT A, B INTO :WS-A, :WS-B FROM TB001 WHERE C = :WS-C END-EXEC",
+    "INSERT INTO TB002 (A) VALUES (:WS-A) END-EXEC",
+    "UPDATE TB003 SET A = :WS-A WHERE B = 1 END-EXEC",
+    "DELETE FROM TB004 WHERE A < :WS-A END-EXEC",
+    "OPEN C1 END-EXEC",
+    "FETCH C1 INTO :WS-A END-EXEC",
+    "CLOSE C1 END-EXEC",
+    "COMMIT WORK END-EXEC",
+    # Tablas derivadas y funciones de tabla: la tabla es la del FROM interior
+    "SELECT A INTO :X FROM (SELECT B FROM T1) X END-EXEC",
+    "SELECT A INTO :X FROM ( SELECT B FROM T1 WHERE C = 1 ) AS X END-EXEC",
+]
+
+# Casos en que la implementación anterior también fallaba: resultado esperado explícito
+CASOS_ESPERADOS = {
+    "SELECT A INTO :X FROM TABLE(SELECT B FROM T2) X END-EXEC": [("SELECT", "T2")],
+    "SELECT A INTO :X FROM LATERAL(SELECT B FROM T3) X END-EXEC": [("SELECT", "T3")],
+}
+
+def comprobar_equivalencia(funcion):
+    """
+    Retorna:
+        list: (bloque, esperado, obtenido) de los casos en que funcion difiere de la referencia
+    """
+    diferencias = []
+    for bloque in CASOS_REFERENCIA:
+        esperado = extraer_sentencias_sql_regex(bloque)
+        obtenido = funcion(bloque)
+        if sorted(esperado) != sorted(obtenido):
+            diferencias.append((bloque, esperado, obtenido))
+    for bloque, esperado in CASOS_ESPERADOS.items():
+        obtenido = funcion(bloque)
+        if sorted(esperado) != sorted(obtenido):
+            diferencias.append((bloque, esperado, obtenido))
+    return diferencias
+
+def columnas(r, n):
+    return [f"COL_{r.randrange(10000):04d}" for _ in range(n)]
+
+def generar_corpus(semilla=7, columnas_patologicas=2000):
+    """
+    Retorna:
+        list: Bloques SQL ya unidos en una línea y en mayúsculas (como los produce el lexer)
+    """
+    r = random.Random(semilla)
+    bloques = []
+    for _ in range(400):
+        cols = columnas(r, r.randint(3, 40))
+        tabla = f"SCH{r.randrange(5)}.TB{r.randrange(200):03d}"
+        bloques.append(f"SELECT {', '.join(cols)} INTO {', '.join(':WS-' + c.replace('_', '-') for c in cols)} "
+                       f"FROM {tabla} WHERE {cols[0]} = :WS-CLAVE AND {cols[-1]} > :WS-FECHA WITH UR END-EXEC")
+        bloques.append(f"DECLARE C{r.randrange(99)} CURSOR WITH HOLD FOR SELECT {', '.join(cols)} FROM {tabla} A "
+                       f"WHERE A.{cols[0]} IN (SELECT B.{cols[0]} FROM TB{r.randrange(200):03d} B) "
+                       f"ORDER BY 1 FOR UPDATE OF {cols[-1]} END-EXEC")
+        bloques.append(f"INSERT INTO TB{r.randrange(200):03d} ({', '.join(cols)}) VALUES ({', '.join(':WS-' + c.replace('_', '-') for c in cols)}) END-EXEC")
+        bloques.append(f"UPDATE TB{r.randrange(200):03d} SET {cols[0]} = :WS-A, {cols[-1]} = CURRENT TIMESTAMP WHERE {cols[1]} = :WS-B END-EXEC")
+        bloques.append(f"DELETE FROM TB{r.randrange(200):03d} WHERE {cols[0]} < :WS-FECHA END-EXEC")
+        bloques.append(f"OPEN C{r.randrange(99)} END-EXEC")
+        bloques.append(f"FETCH C{r.randrange(99)} INTO {', '.join(':WS-' + c.replace('_', '-') for c in cols)} END-EXEC")
+        bloques.append(f"CLOSE C{r.randrange(99)} END-EXEC")
+        bloques.append("COMMIT WORK END-EXEC")
+    # Bloques patológicos: listas SELECT ... INTO enormes
+    cols = columnas(r, columnas_patologicas)
+    hosts = ', '.join(':WS-' + c.replace('_', '-') for c in cols)
+    bloques.append(f"SELECT {', '.join(cols)} INTO {hosts} FROM TBGRANDE WHERE X = 1 END-EXEC")
+    bloques.append(f"SELECT {' , SELECT '.join(cols)} INTO {hosts} END-EXEC")
+    return bloques
+
+def medir(funcion, bloques, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for bloque in bloques:
+            funcion(bloque)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Micro-benchmark de extraccion de sentencias SQL.")
+    ap.add_argument("--repeticiones", type=int, default=5, help="Repeticiones (se toma la mejor).")
+    ap.add_argument("--columnas", type=int, default=2000, help="Columnas de los bloques patologicos.")
+    args = ap.parse_args()
+
+    roadmap08 = cargar_roadmap08()
+    diferencias = comprobar_equivalencia(roadmap08.extraer_sentencias_sql)
+    for bloque, esperado, obtenido in diferencias:
+        print(f"DIFERENCIA: {bloque}\n    esperado: {esperado}\n    una pasada: {obtenido}")
+    if diferencias:
+        sys.exit(1)
+    print(f"Equivalencia con la implementacion anterior: {len(CASOS_REFERENCIA) + len(CASOS_ESPERADOS)} casos OK")
+    corpus = generar_corpus(columnas_patologicas=args.columnas)
+    megabytes = sum(len(b) for b in corpus) / 1e6
+
+    for nombre, funcion in (("7 x re.finditer (anterior)", extraer_sentencias_sql_regex),
+                            ("reconocedor de una pasada", roadmap08.extraer_sentencias_sql)):
+        t = medir(funcion, corpus, args.repeticiones)
+        print(f"{nombre:28s} {t * 1000:9.1f} ms  {len(corpus) / t:12,.0f} bloques/s  {megabytes / t:7.1f} MB/s")
+
+    # Escalado con el tamaño del bloque patológico (debe ser lineal)
+    for n in (500, 1000, 2000, 4000):
+        cols = ', '.join(f"COL{i}" for i in range(n))
+        bloque = f"SELECT {' , SELECT '.join(cols.split(', '))} INTO {cols} END-EXEC"
+        t_ref = medir(extraer_sentencias_sql_regex, [bloque], 1)
+        t_nuevo = medir(roadmap08.extraer_sentencias_sql, [bloque], 3)
+        print(f"SELECT sin FROM, {n:5d} columnas: anterior {t_ref * 1000:9.1f} ms   una pasada {t_nuevo * 1000:7.2f} ms")
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de tiempos de extraer_tablas_db2 (pestaña XPLAIN).
+
+Genera programas de tamaño creciente replicando secciones con bloques EXEC SQL,
+cláusulas FILE-CONTROL SELECT y código COBOL, y comprueba que el tiempo por línea
+se mantiene constante (coste lineal en el tamaño del fuente). Termina con código 1
+si el tiempo por línea del programa más grande supera en más de --tolerancia veces
+al del más pequeño.
+
+Uso:
+    python benchmarks/bench_tablas_db2.py [--lineas N] [--tolerancia X] [--referencia]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import importlib.util
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cargar_roadmap08():
+    spec = importlib.util.spec_from_file_location("roadmap08", os.path.join(RAIZ, "RoadMap.08.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def extraer_tablas_db2_regex(contenido):
+    """Implementación anterior (patrones re.DOTALL sobre todo el fuente), como referencia."""
+    tablas = {}
+    contenido_limpio = re.sub(r'\n\s{6}\*.*', '', contenido)
+    for m in re.finditer(r'SELECT\s+.*?\s+FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE | re.DOTALL):
+        tabla = m.group(1).upper()
+        if tabla not in ('DUAL', 'SYSIBM'):
+            tablas[tabla] = tablas.get(tabla, []) + ['SELECT']
+    for m in re.finditer(r'INSERT\s+INTO\s+([\w]+)', contenido_limpio, re.IGNORECASE):
+        tablas[m.group(1).upper()] = tablas.get(m.group(1).upper(), []) + ['INSERT']
+    for m in re.finditer(r'UPDATE\s+([\w]+)\s+SET', contenido_limpio, re.IGNORECASE):
+        tablas[m.group(1).upper()] = tablas.get(m.group(1).upper(), []) + ['UPDATE']
+    for m in re.finditer(r'DELETE\s+FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE):
+        tablas[m.group(1).upper()] = tablas.get(m.group(1).upper(), []) + ['DELETE']
+    for m in re.finditer(r'DECLARE\s+([\w]+)\s+CURSOR.*?SELECT.*?FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE | re.DOTALL):
+        tablas[m.group(2).upper()] = tablas.get(m.group(2).upper(), []) + ['CURSOR']
+    resultado = {}
+    for tabla, tipos in tablas.items():
+        resultado[tabla] = 'WRITE' if {'INSERT', 'UPDATE', 'DELETE'} & set(tipos) else 'READ'
+    return resultado
+
+SECCION = """\
+           SELECT ARCH-{n} ASSIGN TO DD{n}
+               ORGANIZATION IS SEQUENTIAL.
+       P{n}-LEER.
+      *    SELECT COMENTADO FROM NADA
+           EXEC SQL
+               DECLARE C{n} CURSOR FOR
+                SELECT COL1, COL2, COL3
+                  FROM TBL{m}
+                 WHERE COL1 = :WS-CLAVE
+           END-EXEC.
+           EXEC SQL
+               SELECT COL1, COL2
+                 INTO :WS-COL1, :WS-COL2
+                 FROM TBR{m}
+                WHERE COL3 = :WS-COL3
+           END-EXEC.
+           MOVE WS-A TO WS-B
+           IF WS-B > 0
+              PERFORM P{n}-GRABAR
+           END-IF.
+       P{n}-GRABAR.
+           EXEC SQL
+               UPDATE TBW{m} SET COL2 = :WS-COL2 WHERE COL1 = :WS-COL1
+           END-EXEC.
+           EXEC SQL INSERT INTO TBI{m} (COL1) VALUES (:WS-COL1) END-EXEC.
+           DISPLAY 'SELECT REGISTRO ' WS-A
+"""
+
+# Programa batch sin DB2: muchas cláusulas SELECT de ficheros y ningún FROM posterior
+SECCION_BATCH = """\
+           SELECT ARCH-{n} ASSIGN TO DD{n}
+               ORGANIZATION IS SEQUENTIAL.
+       P{n}-LEER.
+           READ ARCH-{n} INTO WS-REG-{m}
+               AT END MOVE 'S' TO WS-EOF
+           END-READ.
+           MOVE WS-A TO WS-B
+"""
+
+def generar_programa(lineas, plantilla=SECCION):
+    partes = []
+    total = 0
+    n = 0
+    while total < lineas:
+        seccion = plantilla.format(n=n, m=n % 97)
+        partes.append(seccion)
+        total += seccion.count('\n')
+        n += 1
+    return ''.join(partes)
+
+def medir(funcion, contenido, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(contenido)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Comprueba que extraer_tablas_db2 escala linealmente.")
+    ap.add_argument("--lineas", type=int, default=30000, help="Lineas del programa mas grande.")
+    ap.add_argument("--tolerancia", type=float, default=2.0, help="Crecimiento maximo admitido del tiempo por linea.")
+    ap.add_argument("--referencia", action="store_true", help="Medir tambien la implementacion anterior (cuadratica: minutos con 30000 lineas).")
+    args = ap.parse_args()
+
+    roadmap08 = cargar_roadmap08()
+    tamanos = [args.lineas // 8, args.lineas // 4, args.lineas // 2, args.lineas]
+    por_linea = []
+    for nombre, plantilla in (("Programa DB2", SECCION), ("Batch sin SQL", SECCION_BATCH)):
+        print(nombre)
+        tiempos = []
+        for lineas in tamanos:
+            contenido = generar_programa(lineas, plantilla)
+            n = contenido.count('\n')
+            t = medir(roadmap08.extraer_tablas_db2, contenido)
+            tiempos.append(t / n)
+            linea = f"{n:8d} lineas: {t * 1000:8.1f} ms  {t / n * 1e6:6.2f} us/linea"
+            if args.referencia:
+                t_ref = medir(extraer_tablas_db2_regex, contenido, 1)
+                linea += f"   anterior {t_ref * 1000:10.1f} ms"
+            print(linea)
+        por_linea.append(tiempos[-1] / tiempos[0])
+
+    crecimiento = max(por_linea)
+    print(f"Crecimiento del tiempo por linea: x{crecimiento:.2f} (tolerancia x{args.tolerancia})")
+    sys.exit(0 if crecimiento <= args.tolerancia else 1)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Banco de pruebas de rendimiento de las etapas de análisis sobre el corpus sintético.
+
+Para cada tamaño (pequeño, mediano, grande = 1M de líneas) genera un programa con
+generar_corpus.py y mide cada etapa en un subproceso propio, de modo que el pico de
+memoria (RSS) de una etapa no se mezcla con el de las demás ni con el de la generación:
+
+    analizar_cobol      RoadMap.08.analizar_cobol con SQL (párrafos, PERFORM y SQL por párrafo)
+    detectar_call       RoadMapCalls.05.analizar_cobol (CALL / EXEC CICS del programa)
+    extraer_tablas_db2  Tablas DB2 de la pestaña XPLAIN
+    grafo               RoadMap.08.construir_grafo_dot (DOT en flujo) sobre el análisis ya hecho (sin render)
+    motor               motor_cobol.analizar_programa con todas las vistas en una pasada
+
+El resultado (mejor tiempo de --repeticiones, líneas/segundo y pico de RSS) se escribe
+en JSON. Con --comparar se contrasta con un resultado guardado y se termina con código 1
+si alguna etapa es más lenta que la referencia en más de --tolerancia veces.
+
+Uso:
+    python benchmarks/ejecutar_benchmarks.py [--tamanos pequeno,mediano,grande] [--etapas ...]
+                                             [--salida resultado.json] [--comparar referencia.json]
+                                             [--tolerancia X] [--repeticiones N]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import importlib.util
+from datetime import datetime
+
+try:
+    import resource  # No existe en Windows: el pico de RSS se informa como null
+except ImportError:
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+TAMANOS = {'pequeno': 10000, 'mediano': 100000, 'grande': 1000000}
+ETAPAS = ('analizar_cobol', 'detectar_call', 'extraer_tablas_db2', 'grafo', 'motor')
+
+def cargar_modulo(nombre, archivo):
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(RAIZ, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def rss_pico_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def preparar_etapa(etapa, ruta):
+    """
+    Carga lo necesario para una etapa y devuelve la función a cronometrar.
+    La lectura del fuente y, en 'grafo', el análisis previo quedan fuera de la medida.
+    """
+    if etapa == 'analizar_cobol':
+        roadmap08 = cargar_modulo("roadmap08", "RoadMap.08.py")
+        return lambda: roadmap08.analizar_cobol(ruta, None, True)
+    if etapa == 'detectar_call':
+        roadmapcalls = cargar_modulo("roadmapcalls05", "RoadMapCalls.05.py")
+        return lambda: roadmapcalls.analizar_cobol(ruta)
+    if etapa == 'extraer_tablas_db2':
+        roadmap08 = cargar_modulo("roadmap08", "RoadMap.08.py")
+        with open(ruta, 'r', encoding='latin-1') as f:
+            contenido = f.read()
+        return lambda: roadmap08.extraer_tablas_db2(contenido)
+    if etapa == 'grafo':
+        roadmap08 = cargar_modulo("roadmap08", "RoadMap.08.py")
+        with contextlib.redirect_stdout(io.StringIO()):
+            llamadas, _, selects = roadmap08.analizar_cobol(ruta, None, True)
+        return lambda: roadmap08.construir_grafo_dot(llamadas, selects, True)
+    if etapa == 'motor':
+        from motor_cobol import analizar_programa
+        return lambda: analizar_programa(ruta, parrafos=True, sql=True, calls=True)
+    raise ValueError(f"Etapa desconocida: {etapa}")
+
+def medir_etapa(etapa, ruta, repeticiones):
+    """
+    Ejecuta la etapa en este proceso (modo subproceso) y devuelve sus medidas.
+    La salida por pantalla de los analizadores se descarta.
+    """
+    funcion = preparar_etapa(etapa, ruta)
+    rss_inicial = rss_pico_mb()
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+    return {'segundos': round(mejor, 4), 'rss_inicial_mb': rss_inicial, 'rss_pico_mb': rss_pico_mb()}
+
+def medir_en_subproceso(etapa, ruta, repeticiones):
+    orden = [sys.executable, os.path.abspath(__file__), '--etapa', etapa, '--archivo', ruta,
+             '--repeticiones', str(repeticiones)]
+    proceso = subprocess.run(orden, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        print(proceso.stderr, file=sys.stderr)
+        raise RuntimeError(f"La etapa {etapa} ha fallado sobre {ruta}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+def generar_en_subproceso(directorio, tamano, opciones_corpus):
+    """
+    Genera el programa de un tamaño con generar_corpus.py en otro proceso. En Linux el
+    pico de RSS (ru_maxrss) se hereda al crear procesos, así que este proceso no debe
+    tener en memoria el texto del programa grande antes de lanzar las medidas.
+    """
+    ruta = os.path.join(directorio, f"{tamano}.cob")
+    orden = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generar_corpus.py'), ruta,
+             '--lineas', str(TAMANOS[tamano]), '--fanout', str(opciones_corpus['fanout']),
+             '--densidad-sql', str(opciones_corpus['densidad_sql']),
+             '--densidad-call', str(opciones_corpus['densidad_call'])]
+    subprocess.run(orden, check=True, stdout=subprocess.DEVNULL)
+    return ruta
+
+def ejecutar(tamanos, etapas, repeticiones, opciones_corpus):
+    """
+    Genera el corpus de cada tamaño y mide todas las etapas.
+
+    Retorna:
+        dict: Resultado serializable en JSON
+    """
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'corpus': opciones_corpus,
+        'resultados': {},
+    }
+    directorio = tempfile.mkdtemp(prefix='roadmap_bench_')
+    try:
+        for tamano in tamanos:
+            ruta = generar_en_subproceso(directorio, tamano, opciones_corpus)
+            with open(ruta, 'rb') as f:
+                lineas = sum(1 for _ in f)
+            print(f"{tamano} ({lineas} lineas)")
+            medidas = {}
+            for etapa in etapas:
+                # El programa grande se mide una sola vez: cada pasada tarda segundos
+                rep = 1 if lineas >= 500000 else repeticiones
+                medida = medir_en_subproceso(etapa, ruta, rep)
+                medida['lineas'] = lineas
+                medida['lineas_por_segundo'] = round(lineas / medida['segundos']) if medida['segundos'] else None
+                medidas[etapa] = medida
+                rss = f"{medida['rss_pico_mb']:8.1f} MB" if medida['rss_pico_mb'] is not None else "       - MB"
+                print(f"  {etapa:20s} {medida['segundos'] * 1000:10.1f} ms {medida['lineas_por_segundo'] or 0:12d} lineas/s {rss}")
+            resultado['resultados'][tamano] = medidas
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return resultado
+
+def comparar(resultado, referencia, tolerancia):
+    """
+    Compara las líneas/segundo de cada etapa con las de la referencia.
+
+    Retorna:
+        list: Etapas (tamaño, etapa, factor) más lentas que la referencia en más de 'tolerancia' veces
+    """
+    regresiones = []
+    print(f"Comparacion con la referencia del {referencia.get('fecha', '?')} (tolerancia x{tolerancia})")
+    for tamano, medidas in resultado['resultados'].items():
+        for etapa, medida in medidas.items():
+            base = referencia.get('resultados', {}).get(tamano, {}).get(etapa)
+            if not base or not base.get('lineas_por_segundo') or not medida['lineas_por_segundo']:
+                continue
+            factor = base['lineas_por_segundo'] / medida['lineas_por_segundo']
+            marca = ''
+            if factor > tolerancia:
+                marca = '  REGRESION'
+                regresiones.append((tamano, etapa, factor))
+            memoria = ''
+            if base.get('rss_pico_mb') and medida['rss_pico_mb']:
+                memoria = f"  memoria x{medida['rss_pico_mb'] / base['rss_pico_mb']:.2f}"
+            print(f"  {tamano:8s} {etapa:20s} tiempo x{factor:.2f}{memoria}{marca}")
+    return regresiones
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Mide el rendimiento de las etapas de analisis sobre un corpus sintetico.")
+    ap.add_argument("--tamanos", default="pequeno,mediano", help=f"Tamanos a medir, separados por comas ({', '.join(TAMANOS)}).")
+    ap.add_argument("--etapas", default=",".join(ETAPAS), help="Etapas a medir, separadas por comas.")
+    ap.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por etapa (se toma el mejor tiempo).")
+    ap.add_argument("--salida", help="Archivo JSON donde guardar el resultado.")
+    ap.add_argument("--comparar", help="Resultado JSON de referencia con el que comparar.")
+    ap.add_argument("--tolerancia", type=float, default=1.5, help="Empeoramiento maximo admitido respecto a la referencia.")
+    ap.add_argument("--fanout", type=float, default=3.0, help="PERFORM medios por parrafo del corpus.")
+    ap.add_argument("--densidad-sql", type=float, default=0.03, help="Densidad de bloques EXEC SQL del corpus.")
+    ap.add_argument("--densidad-call", type=float, default=0.01, help="Densidad de CALL/CICS del corpus.")
+    # Modo interno: medir una etapa en este proceso e imprimir el JSON de la medida
+    ap.add_argument("--etapa", help=argparse.SUPPRESS)
+    ap.add_argument("--archivo", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.etapa:
+        print(json.dumps(medir_etapa(args.etapa, args.archivo, args.repeticiones)))
+        sys.exit(0)
+
+    tamanos = [t for t in args.tamanos.split(',') if t]
+    etapas = [e for e in args.etapas.split(',') if e]
+    desconocidos = [t for t in tamanos if t not in TAMANOS] + [e for e in etapas if e not in ETAPAS]
+    if desconocidos:
+        ap.error(f"Tamanos o etapas desconocidos: {', '.join(desconocidos)}")
+
+    opciones_corpus = dict(fanout=args.fanout, densidad_sql=args.densidad_sql, densidad_call=args.densidad_call)
+    resultado = ejecutar(tamanos, etapas, args.repeticiones, opciones_corpus)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2)
+        print(f"Resultado guardado en: {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+        regresiones = comparar(resultado, referencia, args.tolerancia)
+        sys.exit(1 if regresiones else 0)
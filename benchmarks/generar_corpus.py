@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de programas COBOL sintéticos en formato fijo para los benchmarks.
+
+Los programas imitan la forma de los fuentes reales: divisiones IDENTIFICATION/DATA con
+WORKING-STORAGE y cursores declarados, PROCEDURE DIVISION USING en dos líneas, párrafos
+con su -EXIT, SECTION, PERFORM ... THRU, PERFORM UNTIL, comentarios, bloques EXEC SQL
+(SELECT INTO, UPDATE, INSERT, DELETE, cursores, COMMIT), CALL por literal y por variable
+y EXEC CICS LINK. El resultado es determinista para una misma semilla.
+
+Uso:
+    python benchmarks/generar_corpus.py SALIDA [--lineas N] [--parrafos N] [--fanout X]
+                                        [--densidad-sql X] [--densidad-call X] [--programas N]
+"""
+
+import os
+import random
+import argparse
+
+def generar_programa(lineas=10000, parrafos=None, fanout=3.0, densidad_sql=0.03, densidad_call=0.01,
+                     semilla=1, nombre='BENCH01'):
+    """
+    Genera el texto de un programa COBOL sintético.
+
+    Parámetros:
+        lineas (int): Líneas aproximadas del programa
+        parrafos (int): Número de párrafos (por defecto uno cada 40 líneas)
+        fanout (float): PERFORM medios por párrafo (a párrafos posteriores, como un árbol de llamadas)
+        densidad_sql (float): Probabilidad por sentencia de emitir un bloque EXEC SQL
+        densidad_call (float): Probabilidad por sentencia de emitir un CALL o EXEC CICS LINK
+        semilla (int): Semilla del generador aleatorio
+        nombre (str): PROGRAM-ID
+
+    Retorna:
+        str: Fuente completo terminado en salto de línea
+    """
+    r = random.Random(semilla)
+    parrafos = parrafos or max(1, lineas // 40)
+    nombres = [f"P{i:05d}-{r.choice(('LEER', 'GRABAR', 'VALIDAR', 'CALCULAR', 'PROCESO'))}" for i in range(parrafos)]
+
+    out = [
+        "000100 IDENTIFICATION DIVISION.",
+        f"000200 PROGRAM-ID. {nombre}.",
+        "      *----------------------------------------------------------*",
+        "      * PROGRAMA GENERADO PARA BENCHMARKS                         *",
+        "      *----------------------------------------------------------*",
+        "       DATA DIVISION.",
+        "       WORKING-STORAGE SECTION.",
+        "           EXEC SQL INCLUDE SQLCA END-EXEC.",
+        "       01  WS-PGM          PIC X(8) VALUE 'FE0001'.",
+        "       01  WS-EOF          PIC X VALUE 'N'.",
+    ]
+    for c in range(3):
+        out += [f"           EXEC SQL DECLARE CUR{c} CURSOR FOR",
+                "               SELECT COL1, COL2",
+                f"                 FROM TABCUR{c} WHERE COL3 = :WS-COL3",
+                "           END-EXEC."]
+    out += ["       LINKAGE SECTION.",
+            "       01  LK-AREA         PIC X(100).",
+            "       PROCEDURE DIVISION USING",
+            "           LK-AREA."]
+    # Párrafo principal: llama a la cabecera de cada bloque de párrafos, como el control de un batch
+    out.append("       P-PRINCIPAL.")
+    for i in range(0, parrafos, max(1, parrafos // 20)):
+        out.append(f"           PERFORM {nombres[i]} THRU {nombres[i]}-EXIT")
+    out += ["           GOBACK.", "       P-PRINCIPAL-EXIT.", "           EXIT."]
+
+    por_parrafo = max(1, (lineas - len(out)) // parrafos)
+    # Probabilidad de PERFORM por sentencia para obtener 'fanout' llamadas por párrafo
+    prob_perform = min(1.0, fanout / max(1, por_parrafo - 2))
+    for i, nombre_parrafo in enumerate(nombres):
+        if i % 25 == 0:
+            out.append(f"       S{i:05d}-SECCION SECTION.")
+        out.append(f"       {nombre_parrafo}.")
+        j = 0
+        while j < por_parrafo - 2:
+            k = r.random()
+            if k < prob_perform and i + 1 < parrafos:
+                destino = nombres[r.randrange(i + 1, min(parrafos, i + 1 + max(4, parrafos // 20)))]
+                if r.random() < 0.5:
+                    out.append(f"           PERFORM {destino}")
+                else:
+                    out.append(f"           PERFORM {destino} THRU {destino}-EXIT")
+                j += 1
+                continue
+            k = r.random()
+            if k < densidad_sql:
+                tipo = r.random()
+                if tipo < 0.5:
+                    out += ["           EXEC SQL",
+                            "               SELECT COL1, COL2, COL3",
+                            "                 INTO :WS-COL1, :WS-COL2, :WS-COL3",
+                            f"                 FROM TAB{r.randrange(60):03d}",
+                            "                WHERE COL1 = :WS-CLAVE",
+                            "           END-EXEC"]
+                    j += 6
+                elif tipo < 0.7:
+                    out += ["           EXEC SQL",
+                            f"               UPDATE TABU{r.randrange(12):02d} SET COL2 = :WS-COL2",
+                            "                WHERE COL1 = :WS-COL1",
+                            "           END-EXEC"]
+                    j += 4
+                elif tipo < 0.8:
+                    out.append(f"           EXEC SQL INSERT INTO TABI{r.randrange(8)} (COL1) VALUES (:WS-COL1) END-EXEC")
+                    j += 1
+                elif tipo < 0.85:
+                    out.append(f"           EXEC SQL DELETE FROM TABD{r.randrange(5)} WHERE COL1 = :WS-COL1 END-EXEC")
+                    j += 1
+                elif tipo < 0.95:
+                    c = r.randrange(3)
+                    out += [f"           EXEC SQL OPEN CUR{c} END-EXEC",
+                            f"           EXEC SQL FETCH NEXT FROM CUR{c} INTO :WS-COL1, :WS-COL2 END-EXEC",
+                            f"           EXEC SQL CLOSE CUR{c} END-EXEC"]
+                    j += 3
+                else:
+                    out.append("           EXEC SQL COMMIT END-EXEC")
+                    j += 1
+            elif k < densidad_sql + densidad_call:
+                tipo = r.random()
+                if tipo < 0.6:
+                    out.append(f"           CALL 'FE{r.randrange(999):04d}' USING WS-AREA")
+                elif tipo < 0.8:
+                    out.append(f"           CALL WS-PGM{r.randrange(9)} USING WS-AREA")
+                else:
+                    out.append(f"           EXEC CICS LINK PROGRAM('CI{r.randrange(99):04d}') END-EXEC")
+                j += 1
+            elif k < 0.10:
+                out.append(f"      *    COMENTARIO {r.randrange(1000)} PERFORM NADA.")
+                j += 1
+            elif k < 0.16:
+                out += [f"           IF WS-A{j} > 0",
+                        f"              MOVE WS-A{j} TO WS-B{j}",
+                        "           END-IF"]
+                j += 3
+            elif k < 0.18:
+                out += ["           PERFORM UNTIL WS-EOF = 'S'",
+                        "              ADD 1 TO WS-CONTADOR",
+                        "           END-PERFORM"]
+                j += 3
+            elif k < 0.19:
+                out.append("")
+                j += 1
+            else:
+                out.append(f"           MOVE WS-A{j} TO WS-B{j}")
+                j += 1
+        out.append(f"       {nombre_parrafo}-EXIT.")
+        out.append("           EXIT.")
+    return "\n".join(out) + "\n"
+
+def escribir_corpus(directorio, programas=10, **opciones):
+    """
+    Escribe 'programas' fuentes sintéticos (FE0000A1.cob, FE0001A1.cob, ...) en un directorio.
+    Cada programa usa una semilla distinta y llama a otros del mismo corpus.
+
+    Retorna:
+        list: Rutas de los archivos generados
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    semilla = opciones.pop('semilla', 1)
+    for n in range(programas):
+        nombre = f"FE{n:04d}A1"
+        ruta = os.path.join(directorio, f"{nombre}.cob")
+        with open(ruta, 'w', encoding='latin-1') as f:
+            f.write(generar_programa(semilla=semilla + n, nombre=nombre, **opciones))
+        rutas.append(ruta)
+    return rutas
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Genera programas COBOL sinteticos para benchmarks.")
+    ap.add_argument("salida", help="Archivo .cob a generar, o directorio si --programas > 1.")
+    ap.add_argument("--lineas", type=int, default=10000, help="Lineas aproximadas por programa.")
+    ap.add_argument("--parrafos", type=int, default=None, help="Parrafos por programa (por defecto lineas/40).")
+    ap.add_argument("--fanout", type=float, default=3.0, help="PERFORM medios por parrafo.")
+    ap.add_argument("--densidad-sql", type=float, default=0.03, help="Probabilidad de bloque EXEC SQL por sentencia.")
+    ap.add_argument("--densidad-call", type=float, default=0.01, help="Probabilidad de CALL/CICS por sentencia.")
+    ap.add_argument("--programas", type=int, default=1, help="Numero de programas a generar.")
+    ap.add_argument("--semilla", type=int, default=1, help="Semilla del generador.")
+    args = ap.parse_args()
+
+    opciones = dict(lineas=args.lineas, parrafos=args.parrafos, fanout=args.fanout,
+                    densidad_sql=args.densidad_sql, densidad_call=args.densidad_call, semilla=args.semilla)
+    if args.programas > 1:
+        rutas = escribir_corpus(args.salida, args.programas, **opciones)
+        print(f"{len(rutas)} programas generados en {args.salida}")
+    else:
+        with open(args.salida, 'w', encoding='latin-1') as f:
+            f.write(generar_programa(**opciones))
+        print(f"Programa generado: {args.salida}")
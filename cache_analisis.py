@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de resultados de análisis COBOL.
+
+Los resultados se guardan en una base SQLite dentro de un directorio configurable
+(parámetro o variable de entorno ROADMAP_CACHE_DIR). La clave de cada entrada es el
+SHA-256 del fuente más la versión del analizador y las opciones del análisis, por lo
+que un mismo fuente analizado con las mismas opciones se sirve sin volver a parsearlo.
+El tamaño total se limita con expulsión LRU (se eliminan las entradas usadas hace más tiempo).
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+
+# Directorio y tamaño máximo por defecto (se pueden cambiar por entorno)
+DIR_CACHE_DEFECTO = os.environ.get('ROADMAP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'roadmap'))
+TAMANO_MAXIMO_DEFECTO = int(os.environ.get('ROADMAP_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+def clave_analisis(contenido, version, **opciones):
+    """
+    Calcula la clave de caché de un análisis.
+
+    Parámetros:
+        contenido (bytes): Bytes del fuente COBOL
+        version (str): Versión del analizador (cambia cuando cambia el resultado)
+        opciones: Opciones del análisis (p.ej. parrafo_inicio, analizar_sql)
+
+    Retorna:
+        str: Hash SHA-256 en hexadecimal
+    """
+    h = hashlib.sha256(contenido)
+    h.update(b'\0' + version.encode('utf-8') + b'\0')
+    h.update(json.dumps(opciones, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+class CacheAnalisis:
+    """
+    Caché SQLite de resultados de análisis con expulsión LRU por tamaño.
+
+    Parámetros:
+        directorio (str): Directorio donde se guarda la base (por defecto DIR_CACHE_DEFECTO)
+        tamano_maximo (int): Bytes máximos ocupados por los resultados guardados
+    """
+
+    def __init__(self, directorio=None, tamano_maximo=None):
+        self.directorio = directorio or DIR_CACHE_DEFECTO
+        self.tamano_maximo = tamano_maximo if tamano_maximo is not None else TAMANO_MAXIMO_DEFECTO
+        os.makedirs(self.directorio, exist_ok=True)
+        self.ruta = os.path.join(self.directorio, 'analisis.sqlite')
+        with self._conectar() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS entradas (
+                               clave TEXT PRIMARY KEY,
+                               valor BLOB NOT NULL,
+                               tamano INTEGER NOT NULL,
+                               ultimo_acceso REAL NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_entradas_acceso ON entradas(ultimo_acceso)")
+            con.execute("CREATE TABLE IF NOT EXISTS estadisticas (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+
+    @contextmanager
+    def _conectar(self):
+        # Una conexión por operación: Streamlit ejecuta cada sesión en su propio hilo
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _contar(self, con, nombre, incremento=1):
+        con.execute("INSERT INTO estadisticas(nombre, valor) VALUES (?, ?) "
+                    "ON CONFLICT(nombre) DO UPDATE SET valor = valor + excluded.valor", (nombre, incremento))
+
+    def obtener(self, clave):
+        """
+        Busca un resultado en la caché.
+
+        Retorna:
+            object/None: Resultado deserializado, None si no existe
+        """
+        with self._conectar() as con:
+            fila = con.execute("SELECT valor FROM entradas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                self._contar(con, 'fallos')
+                return None
+            con.execute("UPDATE entradas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            self._contar(con, 'aciertos')
+        return json.loads(zlib.decompress(fila[0]).decode('utf-8'))
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un resultado (serializable en JSON) y aplica la expulsión LRU.
+        """
+        datos = zlib.compress(json.dumps(valor, ensure_ascii=False).encode('utf-8'))
+        with self._conectar() as con:
+            con.execute("INSERT OR REPLACE INTO entradas(clave, valor, tamano, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                        (clave, datos, len(datos), time.time()))
+            self._expulsar(con)
+
+    def _expulsar(self, con):
+        # Eliminar las entradas menos usadas hasta volver por debajo del tamaño máximo
+        total = con.execute("SELECT COALESCE(SUM(tamano), 0) FROM entradas").fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+        sobrante = total - self.tamano_maximo
+        expulsadas = []
+        for clave, tamano in con.execute("SELECT clave, tamano FROM entradas ORDER BY ultimo_acceso"):
+            expulsadas.append((clave,))
+            sobrante -= tamano
+            if sobrante <= 0:
+                break
+        con.executemany("DELETE FROM entradas WHERE clave = ?", expulsadas)
+        self._contar(con, 'expulsiones', len(expulsadas))
+
+    def estadisticas(self):
+        """
+        Retorna:
+            dict: aciertos, fallos, expulsiones, número de entradas y bytes ocupados
+        """
+        with self._conectar() as con:
+            stats = dict(con.execute("SELECT nombre, valor FROM estadisticas"))
+            entradas, tamano = con.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM entradas").fetchone()
+        return {
+            'aciertos': stats.get('aciertos', 0),
+            'fallos': stats.get('fallos', 0),
+            'expulsiones': stats.get('expulsiones', 0),
+            'entradas': entradas,
+            'bytes': tamano,
+            'ruta': self.ruta,
+        }
+
+    def limpiar(self):
+        """Elimina todas las entradas y reinicia las estadísticas."""
+        with self._conectar() as con:
+            con.execute("DELETE FROM entradas")
+            con.execute("DELETE FROM estadisticas")
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de grafos renderizados (PDF/SVG/PNG).
+
+La clave es el SHA-256 del código DOT más el formato y el motor de Graphviz: si el
+grafo de un programa no ha cambiado desde la última ejecución, el archivo renderizado
+se copia desde la caché en lugar de volver a lanzar Graphviz. Los artefactos se guardan
+como archivos en el subdirectorio 'render' de la caché de análisis (ROADMAP_CACHE_DIR)
+con un índice SQLite, y el tamaño total se limita con expulsión LRU
+(ROADMAP_RENDER_CACHE_MAX_MB).
+
+renderizar_svg hace el render en el servidor para los visores de Streamlit: SVG
+comprimido con gzip, una vez por DOT, con el ejecutable de Graphviz o, si no está, con
+el maquetador en Python puro (maquetador_svg).
+"""
+
+import os
+import gzip
+import time
+import shutil
+import sqlite3
+import hashlib
+import subprocess
+from contextlib import contextmanager
+
+from cache_analisis import DIR_CACHE_DEFECTO
+from maquetador_svg import dot_a_svg
+
+TAMANO_MAXIMO_DEFECTO = int(os.environ.get('ROADMAP_RENDER_CACHE_MAX_MB', '1024')) * 1024 * 1024
+MOTOR_PYTHON = 'python'  # Motor de renderizar_svg cuando no hay Graphviz (maquetador_svg)
+
+def clave_render(fuente_dot, formato, motor='dot'):
+    """
+    Calcula la clave de caché de un render.
+
+    Retorna:
+        str: Hash SHA-256 en hexadecimal del DOT, el formato y el motor
+    """
+    h = hashlib.sha256(fuente_dot.encode('utf-8'))
+    h.update(f"\0{formato}\0{motor}".encode('utf-8'))
+    return h.hexdigest()
+
+def clave_render_archivo(ruta_dot, formato, motor='dot', bloque=1024 * 1024):
+    """
+    Como clave_render, pero leyendo el DOT de un archivo por bloques (sin cargarlo
+    entero en memoria). Para un mismo DOT da la misma clave que clave_render.
+    """
+    h = hashlib.sha256()
+    with open(ruta_dot, 'rb') as f:
+        for trozo in iter(lambda: f.read(bloque), b''):
+            h.update(trozo)
+    h.update(f"\0{formato}\0{motor}".encode('utf-8'))
+    return h.hexdigest()
+
+def ejecutar_graphviz(fuente_dot, ruta_salida, formato='pdf', motor='dot', timeout=None, ruta_dot=None):
+    """
+    Renderiza un DOT con el ejecutable de Graphviz. El DOT se pasa por la entrada estándar
+    o, con ruta_dot, como archivo. Si el render falla o se cancela por timeout no deja un
+    archivo a medio escribir.
+    """
+    directorio = os.path.dirname(ruta_salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    try:
+        if ruta_dot is not None:
+            subprocess.run([motor, f"-T{formato}", "-o", ruta_salida, ruta_dot],
+                           capture_output=True, timeout=timeout, check=True)
+        else:
+            subprocess.run([motor, f"-T{formato}", "-o", ruta_salida],
+                           input=fuente_dot.encode('utf-8'), capture_output=True,
+                           timeout=timeout, check=True)
+    except Exception:
+        if os.path.exists(ruta_salida):
+            os.remove(ruta_salida)
+        raise
+
+def renderizar(fuente_dot, ruta_base, formato='pdf', motor='dot', cache=None, timeout=None):
+    """
+    Genera '<ruta_base>.<formato>' (como Digraph.render), sirviéndolo desde la caché si
+    el mismo DOT ya se renderizó con el mismo formato y motor.
+
+    Parámetros:
+        fuente_dot (str): Código DOT
+        ruta_base (str): Ruta de salida sin extensión
+        cache (CacheRender): Caché a utilizar (None = sin caché)
+        timeout (float): Segundos máximos del render
+
+    Retorna:
+        tuple: (ruta del archivo generado, True si vino de la caché)
+    """
+    ruta_salida = f"{ruta_base}.{formato}"
+    if cache is None:
+        ejecutar_graphviz(fuente_dot, ruta_salida, formato, motor, timeout)
+        return ruta_salida, False
+    clave = clave_render(fuente_dot, formato, motor)
+    if cache.obtener(clave, ruta_salida):
+        return ruta_salida, True
+    ejecutar_graphviz(fuente_dot, ruta_salida, formato, motor, timeout)
+    cache.guardar(clave, ruta_salida)
+    return ruta_salida, False
+
+def renderizar_archivo(ruta_dot, ruta_base, formato='pdf', motor='dot', cache=None, timeout=None):
+    """
+    Como renderizar, pero con el DOT ya escrito en un archivo (p.ej. por EscritorDot):
+    ni la clave ni el render necesitan el DOT completo en memoria.
+
+    Retorna:
+        tuple: (ruta del archivo generado, True si vino de la caché)
+    """
+    ruta_salida = f"{ruta_base}.{formato}"
+    if cache is None:
+        ejecutar_graphviz(None, ruta_salida, formato, motor, timeout, ruta_dot)
+        return ruta_salida, False
+    clave = clave_render_archivo(ruta_dot, formato, motor)
+    if cache.obtener(clave, ruta_salida):
+        return ruta_salida, True
+    ejecutar_graphviz(None, ruta_salida, formato, motor, timeout, ruta_dot)
+    cache.guardar(clave, ruta_salida)
+    return ruta_salida, False
+
+def graphviz_disponible(motor='dot'):
+    """True si el ejecutable de Graphviz está en el PATH."""
+    return shutil.which(motor) is not None
+
+def ejecutar_graphviz_bytes(fuente_dot, formato='svg', motor='dot', timeout=None):
+    """
+    Renderiza un DOT con el ejecutable de Graphviz y retorna la salida en memoria.
+    """
+    resultado = subprocess.run([motor, f"-T{formato}"], input=fuente_dot.encode('utf-8'),
+                               capture_output=True, timeout=timeout, check=True)
+    return resultado.stdout
+
+def renderizar_svg(fuente_dot, cache=None, timeout=None):
+    """
+    SVG comprimido con gzip de un DOT, para enviarlo ya dibujado al navegador.
+
+    Usa el ejecutable de Graphviz si está instalado; si no está, falla o supera el
+    timeout, el maquetador en Python puro. Cada resultado se guarda con la clave del DOT
+    y del motor que lo produjo, y antes de renderizar se buscan las dos claves: un DOT que
+    ya hizo fallar a Graphviz no lo vuelve a intentar en cada recarga.
+
+    Parámetros:
+        fuente_dot (str): Código DOT
+        cache (CacheRender): Caché a utilizar (None = sin caché)
+        timeout (float): Segundos máximos del render con Graphviz
+
+    Retorna:
+        tuple: (SVG comprimido con gzip, motor usado ('dot' o MOTOR_PYTHON), True si vino de la caché)
+    """
+    motores = ['dot', MOTOR_PYTHON] if graphviz_disponible() else [MOTOR_PYTHON]
+    if cache is not None:
+        for motor in motores:
+            datos = cache.leer(clave_render(fuente_dot, 'svgz', motor))
+            if datos is not None:
+                return datos, motor, True
+    svg = None
+    if motores[0] == 'dot':
+        try:
+            svg, motor = ejecutar_graphviz_bytes(fuente_dot, 'svg', 'dot', timeout), 'dot'
+        except (OSError, subprocess.SubprocessError):
+            svg = None
+    if svg is None:
+        svg, motor = dot_a_svg(fuente_dot).encode('utf-8'), MOTOR_PYTHON
+    # mtime=0: el mismo SVG da siempre los mismos bytes comprimidos
+    datos = gzip.compress(svg, compresslevel=6, mtime=0)
+    if cache is not None:
+        cache.guardar_datos(clave_render(fuente_dot, 'svgz', motor), datos)
+    return datos, motor, False
+
+class CacheRender:
+    """
+    Caché de archivos renderizados con índice SQLite y expulsión LRU por tamaño.
+
+    Parámetros:
+        directorio (str): Directorio de la caché (por defecto '<DIR_CACHE_DEFECTO>/render')
+        tamano_maximo (int): Bytes máximos ocupados por los archivos guardados
+    """
+
+    def __init__(self, directorio=None, tamano_maximo=None):
+        self.directorio = directorio or os.path.join(DIR_CACHE_DEFECTO, 'render')
+        self.tamano_maximo = tamano_maximo if tamano_maximo is not None else TAMANO_MAXIMO_DEFECTO
+        os.makedirs(self.directorio, exist_ok=True)
+        self.ruta = os.path.join(self.directorio, 'render.sqlite')
+        with self._conectar() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS artefactos (
+                               clave TEXT PRIMARY KEY,
+                               archivo TEXT NOT NULL,
+                               tamano INTEGER NOT NULL,
+                               ultimo_acceso REAL NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_artefactos_acceso ON artefactos(ultimo_acceso)")
+            con.execute("CREATE TABLE IF NOT EXISTS estadisticas (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+
+    @contextmanager
+    def _conectar(self):
+        # Una conexión por operación: los renders en paralelo usan la caché desde varios hilos
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _contar(self, con, nombre, incremento=1):
+        con.execute("INSERT INTO estadisticas(nombre, valor) VALUES (?, ?) "
+                    "ON CONFLICT(nombre) DO UPDATE SET valor = valor + excluded.valor", (nombre, incremento))
+
+    def _archivo(self, clave):
+        # Repartido en subdirectorios para no acumular miles de archivos en uno solo
+        return os.path.join(self.directorio, clave[:2], clave)
+
+    def obtener(self, clave, destino):
+        """
+        Copia a 'destino' el artefacto guardado con la clave. Se copia (no se enlaza)
+        porque Graphviz sobrescribe la salida en el sitio y estropearía la copia cacheada.
+
+        Retorna:
+            bool: True si estaba en la caché
+        """
+        with self._conectar() as con:
+            fila = con.execute("SELECT archivo FROM artefactos WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or not os.path.exists(fila[0]):
+                if fila is not None:
+                    con.execute("DELETE FROM artefactos WHERE clave = ?", (clave,))
+                self._contar(con, 'fallos')
+                return False
+            con.execute("UPDATE artefactos SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            self._contar(con, 'aciertos')
+        directorio = os.path.dirname(destino)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        shutil.copyfile(fila[0], destino)
+        return True
+
+    def leer(self, clave):
+        """
+        Como obtener, pero retorna el contenido del artefacto en memoria.
+
+        Retorna:
+            bytes: Contenido guardado con la clave, o None si no estaba en la caché
+        """
+        with self._conectar() as con:
+            fila = con.execute("SELECT archivo FROM artefactos WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or not os.path.exists(fila[0]):
+                if fila is not None:
+                    con.execute("DELETE FROM artefactos WHERE clave = ?", (clave,))
+                self._contar(con, 'fallos')
+                return None
+            with open(fila[0], 'rb') as f:
+                datos = f.read()
+            con.execute("UPDATE artefactos SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+            self._contar(con, 'aciertos')
+        return datos
+
+    def guardar(self, clave, ruta_artefacto):
+        """
+        Guarda una copia del archivo renderizado y aplica la expulsión LRU.
+        """
+        archivo = self._archivo(clave)
+        os.makedirs(os.path.dirname(archivo), exist_ok=True)
+        # Copia a un temporal y renombrado atómico: otro hilo puede estar leyendo la misma clave
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+        shutil.copyfile(ruta_artefacto, temporal)
+        os.replace(temporal, archivo)
+        self._registrar(clave, archivo)
+
+    def guardar_datos(self, clave, datos):
+        """
+        Como guardar, pero con el artefacto en memoria (bytes).
+        """
+        archivo = self._archivo(clave)
+        os.makedirs(os.path.dirname(archivo), exist_ok=True)
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(datos)
+        os.replace(temporal, archivo)
+        self._registrar(clave, archivo)
+
+    def _registrar(self, clave, archivo):
+        with self._conectar() as con:
+            con.execute("INSERT OR REPLACE INTO artefactos(clave, archivo, tamano, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                        (clave, archivo, os.path.getsize(archivo), time.time()))
+            self._expulsar(con)
+
+    def _expulsar(self, con):
+        # Eliminar los artefactos menos usados hasta volver por debajo del tamaño máximo
+        total = con.execute("SELECT COALESCE(SUM(tamano), 0) FROM artefactos").fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+        sobrante = total - self.tamano_maximo
+        expulsados = []
+        for clave, archivo, tamano in con.execute("SELECT clave, archivo, tamano FROM artefactos ORDER BY ultimo_acceso"):
+            expulsados.append((clave, archivo))
+            sobrante -= tamano
+            if sobrante <= 0:
+                break
+        con.executemany("DELETE FROM artefactos WHERE clave = ?", [(clave,) for clave, _ in expulsados])
+        for _, archivo in expulsados:
+            try:
+                os.remove(archivo)
+            except FileNotFoundError:
+                pass
+        self._contar(con, 'expulsiones', len(expulsados))
+
+    def estadisticas(self):
+        """
+        Retorna:
+            dict: aciertos, fallos, expulsiones, número de artefactos y bytes ocupados
+        """
+        with self._conectar() as con:
+            stats = dict(con.execute("SELECT nombre, valor FROM estadisticas"))
+            entradas, tamano = con.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM artefactos").fetchone()
+        return {
+            'aciertos': stats.get('aciertos', 0),
+            'fallos': stats.get('fallos', 0),
+            'expulsiones': stats.get('expulsiones', 0),
+            'entradas': entradas,
+            'bytes': tamano,
+            'ruta': self.ruta,
+        }
+
+    def limpiar(self):
+        """Elimina todos los artefactos y reinicia las estadísticas."""
+        with self._conectar() as con:
+            archivos = [fila[0] for fila in con.execute("SELECT archivo FROM artefactos")]
+            con.execute("DELETE FROM artefactos")
+            con.execute("DELETE FROM estadisticas")
+        for archivo in archivos:
+            try:
+                os.remove(archivo)
+            except FileNotFoundError:
+                pass
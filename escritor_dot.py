@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Escritor de DOT en flujo para grafos muy grandes.
+
+graphviz.Digraph acumula el cuerpo entero como una lista de cadenas y cita cada
+identificador y atributo en cada llamada. EscritorDot escribe cada sentencia en cuanto
+se emite sobre cualquier objeto con write() (archivo, StringIO, socket.makefile('w')),
+cita cada identificador una sola vez (los nombres de párrafo se repiten en nodos y
+aristas) y permite declarar los atributos comunes como valores por defecto del grafo
+o de un subgrafo en lugar de repetirlos en cada nodo y arista.
+
+Las reglas de citado son las de graphviz.quoting.quote, de modo que el DOT generado
+es equivalente al de Digraph.
+"""
+
+import re
+from contextlib import contextmanager
+
+# Identificador DOT sin comillas: nombre alfanumérico o número
+RE_ID = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$')
+# Cadena HTML: <...> se escribe tal cual
+RE_HTML = re.compile(r'<.*>$', re.DOTALL)
+# Comillas no precedidas por una barra invertida
+RE_COMILLAS = re.compile(r'(?<!\\)(?:\\\\)*"')
+PALABRAS_DOT = {'node', 'edge', 'graph', 'digraph', 'subgraph', 'strict'}
+
+def citar(identificador):
+    """Identificador o valor DOT, entre comillas si hace falta (como graphviz.quoting.quote)."""
+    identificador = str(identificador)
+    if RE_HTML.match(identificador):
+        return identificador
+    if not RE_ID.match(identificador) or identificador.lower() in PALABRAS_DOT:
+        return '"' + RE_COMILLAS.sub(lambda m: m.group(0)[:-1] + '\\"', identificador) + '"'
+    return identificador
+
+def lista_atributos(atributos):
+    """Lista de atributos DOT 'clave=valor ...' (los de valor None se omiten)."""
+    return ' '.join(f"{clave}={citar(valor)}" for clave, valor in atributos.items() if valor is not None)
+
+class EscritorDot:
+    """
+    Emite un digraph DOT sentencia a sentencia.
+
+    Parámetros:
+        salida: Objeto con write() donde se escribe el DOT
+        comentario (str): Comentario inicial (como Digraph(comment=...))
+        nombre (str): Nombre del grafo (opcional)
+
+    Uso:
+        with open('grafo.dot', 'w') as f:
+            with EscritorDot(f, comentario='Llamadas COBOL') as dot:
+                dot.atributos_grafo(rankdir='TB')
+                dot.atributos_nodo(shape='box')
+                dot.nodo('A')
+                dot.arista('A', 'B', xlabel='1')
+    """
+
+    def __init__(self, salida, comentario=None, nombre=None):
+        self._escribir = salida.write
+        self._citados = {}
+        self._sangria = '\t'
+        if comentario is not None:
+            self._escribir(f"// {comentario}\n")
+        self._escribir(f"digraph {citar(nombre)} {{\n" if nombre else "digraph {\n")
+
+    def _id(self, nombre):
+        # Los nombres de párrafo aparecen en su nodo y en cada arista: se citan una vez
+        citado = self._citados.get(nombre)
+        if citado is None:
+            citado = self._citados[nombre] = citar(nombre)
+        return citado
+
+    @staticmethod
+    def _lista(atributos):
+        return lista_atributos(atributos)
+
+    def atributos_grafo(self, **atributos):
+        """Atributos del grafo o subgrafo actual (rankdir, dpi, rank...)."""
+        if atributos:
+            self._escribir(f"{self._sangria}{self._lista(atributos)}\n")
+
+    def atributos_nodo(self, **atributos):
+        """Atributos por defecto de los nodos creados a partir de aquí en el (sub)grafo actual."""
+        if atributos:
+            self._escribir(f"{self._sangria}node [{self._lista(atributos)}]\n")
+
+    def atributos_arista(self, **atributos):
+        """Atributos por defecto de las aristas creadas a partir de aquí en el (sub)grafo actual."""
+        if atributos:
+            self._escribir(f"{self._sangria}edge [{self._lista(atributos)}]\n")
+
+    def nodo(self, nombre, etiqueta=None, **atributos):
+        """Declara un nodo (atributos con valor None se omiten)."""
+        if etiqueta is not None:
+            atributos = {'label': etiqueta, **atributos}
+        lista = self._lista(atributos)
+        if lista:
+            self._escribir(f"{self._sangria}{self._id(nombre)} [{lista}]\n")
+        else:
+            self._escribir(f"{self._sangria}{self._id(nombre)}\n")
+
+    def arista(self, origen, destino, **atributos):
+        """Declara una arista origen -> destino."""
+        lista = self._lista(atributos)
+        if lista:
+            self._escribir(f"{self._sangria}{self._id(origen)} -> {self._id(destino)} [{lista}]\n")
+        else:
+            self._escribir(f"{self._sangria}{self._id(origen)} -> {self._id(destino)}\n")
+
+    @contextmanager
+    def subgrafo(self, nombre=None, **atributos):
+        """
+        Abre un subgrafo (anónimo si no se da nombre) con sus atributos de grafo.
+        Los atributos por defecto declarados dentro sólo afectan al subgrafo.
+        """
+        self._escribir(f"{self._sangria}subgraph {citar(nombre)} {{\n" if nombre else f"{self._sangria}{{\n")
+        self._sangria += '\t'
+        self.atributos_grafo(**atributos)
+        try:
+            yield self
+        finally:
+            self._sangria = self._sangria[:-1]
+            self._escribir(f"{self._sangria}}}\n")
+
+    def cerrar(self):
+        """Cierra el digraph."""
+        self._escribir("}\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.cerrar()
+        return False
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Apertura uniforme de fuentes COBOL para los analizadores.
+
+Un fuente puede ser una ruta, los bytes del programa, su texto, un objeto archivo
+(texto o binario, p.ej. el archivo subido en Streamlit o un miembro de un zip) o un
+iterable de líneas. Así se analiza directamente desde memoria, sin pasar por un
+archivo temporal.
+"""
+
+import io
+import os
+from contextlib import contextmanager
+
+# Codificación de los fuentes COBOL (la misma que usan los analizadores al abrir rutas)
+CODIFICACION = 'latin-1'
+
+def es_ruta(fuente):
+    """
+    Indica si el fuente es una ruta de archivo. Un str sin saltos de línea se
+    considera una ruta; con saltos de línea, el texto del programa.
+    """
+    return isinstance(fuente, os.PathLike) or (isinstance(fuente, str) and '\n' not in fuente)
+
+@contextmanager
+def abrir_fuente(fuente):
+    """
+    Abre un fuente COBOL y entrega sus líneas de texto.
+
+    Parámetros:
+        fuente: Ruta, bytes, str, objeto archivo o iterable de líneas (str o bytes)
+
+    Retorna:
+        iterable: Líneas del fuente terminadas en salto de línea, como al iterar un archivo abierto
+    """
+    if es_ruta(fuente):
+        with open(fuente, 'r', encoding=CODIFICACION) as archivo:
+            yield archivo
+    elif isinstance(fuente, (bytes, bytearray, memoryview)):
+        # Con bytes, BytesIO comparte el buffer y TextIOWrapper decodifica por bloques
+        yield io.TextIOWrapper(io.BytesIO(fuente), encoding=CODIFICACION)
+    elif isinstance(fuente, str):
+        yield io.StringIO(fuente, newline=None)
+    elif hasattr(fuente, 'read'):
+        if isinstance(fuente, io.TextIOBase):
+            yield fuente
+        else:
+            texto = io.TextIOWrapper(fuente, encoding=CODIFICACION)
+            try:
+                yield texto
+            finally:
+                # Devolver el objeto binario sin cerrarlo: es del llamante
+                texto.detach()
+    else:
+        yield _lineas_texto(fuente)
+
+def _lineas_texto(lineas):
+    for linea in lineas:
+        if isinstance(linea, (bytes, bytearray)):
+            linea = linea.decode(CODIFICACION)
+        # Los analizadores esperan líneas como las de un archivo (con el salto de línea)
+        yield linea if linea.endswith('\n') else linea + '\n'
+
+def contenido_bytes(fuente):
+    """
+    Bytes del fuente (para calcular claves de caché). Si el fuente es un objeto archivo
+    o un iterable se consume, por lo que el análisis debe hacerse sobre los bytes devueltos.
+
+    Retorna:
+        bytes: Contenido del fuente
+    """
+    if es_ruta(fuente):
+        with open(fuente, 'rb') as f:
+            return f.read()
+    if isinstance(fuente, bytes):
+        return fuente
+    if isinstance(fuente, (bytearray, memoryview)):
+        return bytes(fuente)
+    if isinstance(fuente, str):
+        return _codificar(fuente)
+    if hasattr(fuente, 'read'):
+        datos = fuente.read()
+        return datos if isinstance(datos, bytes) else _codificar(datos)
+    return b''.join(_codificar(linea) for linea in _lineas_texto(fuente))
+
+def _codificar(texto):
+    # latin-1 reproduce exactamente los bytes originales del fuente decodificado
+    try:
+        return texto.encode(CODIFICACION)
+    except UnicodeEncodeError:
+        return texto.encode('utf-8')
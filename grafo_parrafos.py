@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Representación compacta del grafo de llamadas PERFORM entre párrafos.
+
+Los nombres de párrafo se internan a identificadores enteros y la adyacencia se guarda
+deduplicada en formato CSR (arrays 'inicio' y 'destinos'), conservando el número de veces
+que aparece cada llamada y el orden en que se vio por primera vez. El grafo se comporta
+como un dict de sólo lectura {párrafo: [párrafos llamados]}, de modo que el código que
+recibía el diccionario de analizar_cobol sigue funcionando sin cambios.
+"""
+
+from array import array
+from collections.abc import Mapping
+
+class ConstructorGrafo:
+    """
+    Acumula párrafos y llamadas durante el análisis y genera un GrafoParrafos.
+    """
+
+    def __init__(self):
+        self.ids = {}             # nombre -> id
+        self.nombres = []         # id -> nombre
+        self.salientes = []       # id -> {id_destino: multiplicidad} en orden de primera aparición
+        self.es_clave = bytearray()
+        self.orden_claves = []    # ids de los párrafos con entrada en el diccionario, en orden
+
+    def id_de(self, nombre):
+        """Id del párrafo, creándolo si es la primera vez que aparece."""
+        i = self.ids.get(nombre)
+        if i is None:
+            i = len(self.nombres)
+            self.ids[nombre] = i
+            self.nombres.append(nombre)
+            self.salientes.append(None)
+            self.es_clave.append(0)
+        return i
+
+    def agregar_parrafo(self, nombre):
+        """Registra un párrafo como entrada del diccionario (equivale a llamadas[nombre] = [])."""
+        i = self.id_de(nombre)
+        if not self.es_clave[i]:
+            self.es_clave[i] = 1
+            self.orden_claves.append(i)
+        return i
+
+    def agregar_llamada(self, origen, destino, veces=1):
+        """Registra un PERFORM origen -> destino (equivale a llamadas.setdefault(origen, []).append(destino))."""
+        o = self.agregar_parrafo(origen)
+        d = self.id_de(destino)
+        salientes = self.salientes[o]
+        if salientes is None:
+            self.salientes[o] = {d: veces}
+        else:
+            salientes[d] = salientes.get(d, 0) + veces
+
+    def construir(self):
+        """
+        Retorna:
+            GrafoParrafos: Grafo inmutable con la adyacencia en formato CSR
+        """
+        inicio = array('l', [0])
+        destinos = array('l')
+        multiplicidad = array('l')
+        for salientes in self.salientes:
+            if salientes:
+                destinos.extend(salientes.keys())
+                multiplicidad.extend(salientes.values())
+            inicio.append(len(destinos))
+        return GrafoParrafos(self.nombres, self.ids, inicio, destinos, multiplicidad,
+                             self.es_clave, array('l', self.orden_claves))
+
+class GrafoParrafos(Mapping):
+    """
+    Grafo de llamadas entre párrafos con nombres internados y adyacencia CSR.
+
+    Como dict: grafo[parrafo] devuelve la lista (sin duplicados, en orden de primera
+    aparición) de párrafos llamados; sólo son claves los párrafos declarados o que
+    hacen algún PERFORM, igual que en el diccionario que devolvía analizar_cobol.
+    """
+
+    __slots__ = ('nombres', 'ids', 'inicio', 'destinos', 'multiplicidad', 'es_clave', 'orden_claves', '_alcanzables', '_subgrafos')
+
+    def __init__(self, nombres, ids, inicio, destinos, multiplicidad, es_clave, orden_claves):
+        self.nombres = nombres              # id -> nombre
+        self.ids = ids                      # nombre -> id
+        self.inicio = inicio                # CSR: llamadas de i en destinos[inicio[i]:inicio[i + 1]]
+        self.destinos = destinos            # ids destino deduplicados
+        self.multiplicidad = multiplicidad  # veces que aparece cada llamada
+        self.es_clave = es_clave
+        self.orden_claves = orden_claves
+        self._alcanzables = {}              # raíz -> ids alcanzables (se calcula una vez por raíz)
+        self._subgrafos = {}                # raíz -> subgrafo alcanzable (el grafo es inmutable)
+
+    @classmethod
+    def desde_diccionario(cls, llamadas):
+        """
+        Construye el grafo a partir de un dict {párrafo: [llamados]} (admite duplicados).
+        """
+        if isinstance(llamadas, GrafoParrafos):
+            return llamadas
+        constructor = ConstructorGrafo()
+        for origen, destinos in llamadas.items():
+            constructor.agregar_parrafo(origen)
+            for destino in destinos:
+                constructor.agregar_llamada(origen, destino)
+        return constructor.construir()
+
+    # --- Acceso por identificadores ---
+
+    def __len__(self):
+        return len(self.orden_claves)
+
+    @property
+    def num_nodos(self):
+        """Número de párrafos internados (claves y destinos sin declarar)."""
+        return len(self.nombres)
+
+    def sucesores(self, i):
+        """Ids de los párrafos llamados por el párrafo i, sin duplicados."""
+        return self.destinos[self.inicio[i]:self.inicio[i + 1]]
+
+    def llamadas_con_multiplicidad(self, i):
+        """Pares (id_destino, veces) de las llamadas del párrafo i."""
+        a, b = self.inicio[i], self.inicio[i + 1]
+        return zip(self.destinos[a:b], self.multiplicidad[a:b])
+
+    def alcanzables(self, raiz):
+        """
+        Párrafos alcanzables desde la raíz (incluida), por búsqueda en amplitud.
+        El resultado se guarda por raíz, de modo que cambiar de párrafo inicial sobre
+        el mismo grafo no repite el recorrido.
+
+        Parámetros:
+            raiz (int): Id del párrafo raíz
+
+        Retorna:
+            array: Ids alcanzables en orden de visita
+        """
+        resultado = self._alcanzables.get(raiz)
+        if resultado is None:
+            marcados = bytearray(len(self.nombres))
+            marcados[raiz] = 1
+            orden = [raiz]
+            inicio, destinos = self.inicio, self.destinos
+            for nodo in orden:  # la lista crece durante el recorrido (cola de la BFS)
+                for destino in destinos[inicio[nodo]:inicio[nodo + 1]]:
+                    if not marcados[destino]:
+                        marcados[destino] = 1
+                        orden.append(destino)
+            resultado = self._alcanzables[raiz] = array('l', orden)
+        return resultado
+
+    def subgrafo_alcanzable(self, nombre_raiz):
+        """
+        Subgrafo inducido por los párrafos alcanzables desde un párrafo.
+        La raíz pasa a ser la primera clave; el resto conserva el orden original.
+        Como el grafo es inmutable, el subgrafo de cada raíz se construye una sola vez.
+
+        Parámetros:
+            nombre_raiz (str): Párrafo desde el cual comenzar
+
+        Retorna:
+            GrafoParrafos: Subgrafo (vacío si el párrafo no existe)
+        """
+        raiz = self.ids.get(nombre_raiz)
+        if raiz is None:
+            return ConstructorGrafo().construir()
+        subgrafo = self._subgrafos.get(raiz)
+        if subgrafo is not None:
+            return subgrafo
+        constructor = ConstructorGrafo()
+        marcados = bytearray(len(self.nombres))
+        for i in self.alcanzables(raiz):
+            marcados[i] = 1
+        nombres = self.nombres
+        claves = [raiz] + [i for i in self.orden_claves if marcados[i] and i != raiz]
+        for i in claves:
+            if not self.es_clave[i]:
+                continue
+            constructor.agregar_parrafo(nombres[i])
+            for destino, veces in self.llamadas_con_multiplicidad(i):
+                constructor.agregar_llamada(nombres[i], nombres[destino], veces)
+        subgrafo = self._subgrafos[raiz] = constructor.construir()
+        return subgrafo
+
+    def recorrido_niveles(self, raiz):
+        """
+        Recorrido en profundidad (iterativo) desde la raíz que asigna a cada párrafo el nivel
+        en que se visita por primera vez y numera las llamadas en el orden del recorrido.
+
+        Parámetros:
+            raiz (int): Id del párrafo raíz
+
+        Retorna:
+            tuple: (dict {id: nivel} en orden de visita,
+                    list de (id_origen, id_destino, numero, multiplicidad))
+        """
+        niveles = {raiz: 0}
+        orden_llamadas = []
+        agregar = orden_llamadas.append
+        contador = 1
+        inicio, destinos, multiplicidad = self.inicio, self.destinos, self.multiplicidad
+        # Pila de nodos en curso y, en paralelo, posición de la siguiente llamada y fin de cada uno
+        pila, posiciones, finales = [raiz], [inicio[raiz]], [inicio[raiz + 1]]
+        while pila:
+            pos = posiciones[-1]
+            if pos == finales[-1]:
+                pila.pop()
+                posiciones.pop()
+                finales.pop()
+                continue
+            posiciones[-1] = pos + 1
+            hijo = destinos[pos]
+            agregar((pila[-1], hijo, contador, multiplicidad[pos]))
+            contador += 1
+            if hijo not in niveles:
+                niveles[hijo] = len(pila)
+                pila.append(hijo)
+                posiciones.append(inicio[hijo])
+                finales.append(inicio[hijo + 1])
+        return niveles, orden_llamadas
+
+    def componentes_fuertes(self, raiz=None):
+        """
+        Componentes fuertemente conexas (ciclos de PERFORM) con el algoritmo de Tarjan
+        en versión iterativa, sin límite de recursión en cadenas largas.
+
+        Parámetros:
+            raiz (int): Si se indica, sólo los párrafos alcanzables desde ella
+
+        Retorna:
+            tuple: (array id -> índice de componente, -1 si no se recorrió,
+                    list de componentes, cada una con sus ids en orden de visita;
+                    las componentes salen en orden topológico inverso, las hojas primero)
+        """
+        n = len(self.nombres)
+        inicio, destinos = self.inicio, self.destinos
+        indice = array('l', [-1]) * n
+        bajo = array('l', [0]) * n
+        componente = array('l', [-1]) * n
+        en_pila = bytearray(n)
+        pila, componentes = [], []
+        contador = 0
+        origenes = [raiz] if raiz is not None else range(n)
+        for origen in origenes:
+            if indice[origen] != -1:
+                continue
+            indice[origen] = bajo[origen] = contador
+            contador += 1
+            pila.append(origen)
+            en_pila[origen] = 1
+            # Recorrido en profundidad con la posición de la siguiente llamada de cada nodo
+            nodos, posiciones = [origen], [inicio[origen]]
+            while nodos:
+                v = nodos[-1]
+                pos = posiciones[-1]
+                if pos < inicio[v + 1]:
+                    posiciones[-1] = pos + 1
+                    w = destinos[pos]
+                    if indice[w] == -1:
+                        indice[w] = bajo[w] = contador
+                        contador += 1
+                        pila.append(w)
+                        en_pila[w] = 1
+                        nodos.append(w)
+                        posiciones.append(inicio[w])
+                    elif en_pila[w] and indice[w] < bajo[v]:
+                        bajo[v] = indice[w]
+                    continue
+                nodos.pop()
+                posiciones.pop()
+                if bajo[v] == indice[v]:
+                    c = len(componentes)
+                    miembros = []
+                    while True:
+                        w = pila.pop()
+                        en_pila[w] = 0
+                        componente[w] = c
+                        miembros.append(w)
+                        if w == v:
+                            break
+                    miembros.reverse()
+                    componentes.append(miembros)
+                if nodos and bajo[v] < bajo[nodos[-1]]:
+                    bajo[nodos[-1]] = bajo[v]
+        return componente, componentes
+
+    def rangos_condensados(self, raiz):
+        """
+        Rango (capa del diagrama) de cada párrafo alcanzable desde la raíz, independiente del
+        orden de visita: cada ciclo de PERFORM (componente fuerte) se condensa en un único
+        nodo y su rango es el camino más largo desde la raíz en el grafo condensado, que ya
+        no tiene ciclos. Lineal en párrafos y llamadas.
+
+        Parámetros:
+            raiz (int): Id del párrafo raíz
+
+        Retorna:
+            tuple: (array id -> rango, -1 si no es alcanzable,
+                    list de ciclos: ids de cada componente de más de un párrafo o que se
+                    llama a sí mismo, de la raíz hacia las hojas)
+        """
+        componente, componentes = self.componentes_fuertes(raiz)
+        inicio, destinos = self.inicio, self.destinos
+        rango_componente = array('l', [0]) * len(componentes)
+        ciclos = []
+        # Tarjan da las componentes en orden topológico inverso: se recorren desde la raíz
+        for c in range(len(componentes) - 1, -1, -1):
+            siguiente = rango_componente[c] + 1
+            miembros = componentes[c]
+            ciclico = len(miembros) > 1
+            for v in miembros:
+                for pos in range(inicio[v], inicio[v + 1]):
+                    d = componente[destinos[pos]]
+                    if d == c:
+                        ciclico = True
+                    elif rango_componente[d] < siguiente:
+                        rango_componente[d] = siguiente
+            if ciclico:
+                ciclos.append(miembros)
+        rango = array('l', [-1]) * len(self.nombres)
+        for c, miembros in enumerate(componentes):
+            for v in miembros:
+                rango[v] = rango_componente[c]
+        return rango, ciclos
+
+    def alcance_entradas(self, entradas):
+        """
+        Puntos de entrada desde los que se alcanza cada párrafo, como máscara de bits
+        (bit k = entradas[k]). Con los ciclos de PERFORM condensados basta una pasada en orden
+        topológico con un OR de enteros por llamada: lineal en párrafos y llamadas para
+        cualquier número de entradas.
+
+        Parámetros:
+            entradas (list): Ids de los párrafos de entrada
+
+        Retorna:
+            list: id -> máscara de entradas que lo alcanzan (0 = inalcanzable)
+        """
+        componente, componentes = self.componentes_fuertes()
+        inicio, destinos = self.inicio, self.destinos
+        mascara_componente = [0] * len(componentes)
+        for k, entrada in enumerate(entradas):
+            mascara_componente[componente[entrada]] |= 1 << k
+        # Tarjan da las componentes en orden topológico inverso: se propaga desde las raíces
+        for c in range(len(componentes) - 1, -1, -1):
+            mascara = mascara_componente[c]
+            if not mascara:
+                continue
+            for v in componentes[c]:
+                for pos in range(inicio[v], inicio[v + 1]):
+                    d = componente[destinos[pos]]
+                    if d != c:
+                        mascara_componente[d] |= mascara
+        return [mascara_componente[c] for c in componente]
+
+    # --- Vista compatible con dict ---
+
+    def __getitem__(self, nombre):
+        i = self.ids.get(nombre)
+        if i is None or not self.es_clave[i]:
+            raise KeyError(nombre)
+        nombres = self.nombres
+        return [nombres[d] for d in self.destinos[self.inicio[i]:self.inicio[i + 1]]]
+
+    def __contains__(self, nombre):
+        i = self.ids.get(nombre)
+        return i is not None and bool(self.es_clave[i])
+
+    def __iter__(self):
+        nombres = self.nombres
+        return (nombres[i] for i in self.orden_claves)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def a_diccionario(self, con_multiplicidad=False):
+        """
+        Convierte el grafo en un dict {párrafo: [llamados]} serializable en JSON.
+
+        Parámetros:
+            con_multiplicidad (bool): Si es True repite cada llamado tantas veces como aparece,
+                                      de modo que desde_diccionario reconstruye el mismo grafo
+        """
+        nombres = self.nombres
+        resultado = {}
+        for i in self.orden_claves:
+            if con_multiplicidad:
+                resultado[nombres[i]] = [nombres[d] for d, veces in self.llamadas_con_multiplicidad(i) for _ in range(veces)]
+            else:
+                resultado[nombres[i]] = [nombres[d] for d in self.sucesores(i)]
+        return resultado
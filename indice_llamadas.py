@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Índice incremental de llamadas entre programas de un directorio de fuentes.
+
+Guarda en SQLite, por cada miembro del directorio, su ruta, mtime, tamaño, hash del
+contenido y las llamadas CALL/CICS detectadas. En ejecuciones posteriores sólo se
+vuelven a analizar los miembros nuevos o modificados, y se eliminan los borrados.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from collections import defaultdict
+
+from cache_analisis import DIR_CACHE_DEFECTO
+
+def ruta_indice_defecto(directorio):
+    """
+    Ruta del índice de un directorio dentro de la caché (un archivo por directorio absoluto).
+    """
+    nombre = hashlib.sha1(os.path.abspath(directorio).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DIR_CACHE_DEFECTO, 'indices', f"{nombre}.sqlite")
+
+def hash_archivo(ruta_archivo):
+    """SHA-256 del contenido de un archivo."""
+    h = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+class IndiceLlamadas:
+    """
+    Índice persistente de las llamadas de cada miembro de un directorio.
+
+    Parámetros:
+        directorio (str): Directorio de fuentes indexado
+        version (str): Versión del analizador; si cambia se reanaliza todo
+        ruta (str): Archivo SQLite del índice (por defecto dentro de la caché)
+    """
+
+    def __init__(self, directorio, version, ruta=None):
+        self.directorio = directorio
+        self.version = version
+        self.ruta = ruta or ruta_indice_defecto(directorio)
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        with self._conectar() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS miembros (
+                               ruta TEXT PRIMARY KEY,
+                               mtime_ns INTEGER NOT NULL,
+                               tamano INTEGER NOT NULL,
+                               hash TEXT NOT NULL,
+                               version TEXT NOT NULL,
+                               llamadas TEXT NOT NULL)""")
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def actualizar(self, archivos, analizar_archivos, jobs=1):
+        """
+        Sincroniza el índice con la lista actual de archivos del directorio.
+
+        Parámetros:
+            archivos (list): Rutas actuales de los fuentes
+            analizar_archivos (function): Función (archivos, jobs) -> generador de diccionarios
+                                          de llamadas en el mismo orden, con None para los que
+                                          fallaron (RoadMapCalls)
+            jobs (int): Procesos para analizar los miembros cambiados
+
+        Retorna:
+            tuple: (lista de diccionarios de llamadas (defaultdict) alineada con 'archivos',
+                    None para los miembros cuyo análisis falló, que no se guardan en el índice
+                    y se reintentan en la siguiente ejecución;
+                    dict con los contadores sin_cambios / reanalizados / eliminados / fallidos)
+        """
+        with self._conectar() as con:
+            guardados = {fila[0]: fila[1:] for fila in
+                         con.execute("SELECT ruta, mtime_ns, tamano, hash, version, llamadas FROM miembros")}
+
+        claves = [os.path.relpath(archivo, self.directorio) for archivo in archivos]
+        resultados = [None] * len(archivos)
+        pendientes = []  # (posición, hash, stat) de los miembros a reanalizar
+        tocados = []     # miembros sin cambios de contenido pero con mtime distinto
+        for i, (archivo, clave) in enumerate(zip(archivos, claves)):
+            st = os.stat(archivo)
+            guardado = guardados.get(clave)
+            if guardado and guardado[3] == self.version:
+                mtime_ns, tamano, hash_guardado, _, llamadas = guardado
+                if mtime_ns == st.st_mtime_ns and tamano == st.st_size:
+                    resultados[i] = defaultdict(list, json.loads(llamadas))
+                    continue
+                # mtime distinto: sólo se reanaliza si el contenido cambió de verdad
+                contenido_hash = hash_archivo(archivo)
+                if contenido_hash == hash_guardado:
+                    resultados[i] = defaultdict(list, json.loads(llamadas))
+                    tocados.append((st.st_mtime_ns, st.st_size, clave))
+                    continue
+                pendientes.append((i, contenido_hash, st))
+            else:
+                pendientes.append((i, None, st))
+
+        nuevos = []
+        lista = [archivos[i] for i, _, _ in pendientes]
+        fallidos = 0
+        for (i, contenido_hash, st), llamadas in zip(pendientes, analizar_archivos(lista, jobs)):
+            resultados[i] = llamadas
+            if llamadas is None:
+                fallidos += 1
+                continue
+            nuevos.append((claves[i], st.st_mtime_ns, st.st_size, contenido_hash or hash_archivo(archivos[i]),
+                           self.version, json.dumps(resultados[i], ensure_ascii=False)))
+
+        eliminados = [(clave,) for clave in guardados.keys() - set(claves)]
+        with self._conectar() as con:
+            con.executemany("INSERT OR REPLACE INTO miembros(ruta, mtime_ns, tamano, hash, version, llamadas) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", nuevos)
+            con.executemany("UPDATE miembros SET mtime_ns = ?, tamano = ? WHERE ruta = ?", tocados)
+            con.executemany("DELETE FROM miembros WHERE ruta = ?", eliminados)
+
+        estadisticas = {
+            'sin_cambios': len(archivos) - len(pendientes),
+            'reanalizados': len(pendientes),
+            'eliminados': len(eliminados),
+            'fallidos': fallidos,
+        }
+        return resultados, estadisticas
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Maquetador SVG en Python puro para cuando no hay ejecutable de Graphviz.
+
+Lee el subconjunto de DOT que generan escritor_dot.EscritorDot y graphviz.Digraph
+(atributos de grafo, nodo y arista por defecto, subgrafos anónimos y cluster_*,
+rank=same, nodos y aristas con sus atributos) y hace un layout por capas sencillo:
+
+    1. Rango de cada nodo por camino más largo, con los grupos rank=same juntos y
+       los ciclos rotos por las aristas de retroceso de un recorrido en profundidad
+    2. Orden dentro de cada rango por baricentro de los vecinos (varias pasadas)
+    3. Coordenadas con nodesep / ranksep y cada rango centrado; rankdir LR o TB
+
+No iguala la calidad de dot (no hay nodos ficticios para las aristas largas ni
+enrutado ortogonal), pero da un diagrama legible con las mismas formas, colores y
+etiquetas, de modo que el render en el servidor funciona también sin Graphviz.
+"""
+
+import re
+from html import escape
+
+# Tokens DOT: cadena entre comillas (puede tener saltos de línea), HTML, flecha, puntuación, fin de línea o identificador
+RE_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|<[^<>]*>|->|--|[{}\[\]=;,]|\n|[^\s{}\[\]=;,"]+')
+RE_COMENTARIO = re.compile(r'^\s*(//|#).*$', re.MULTILINE)
+RE_SALTO_ETIQUETA = re.compile(r'\\[nlr]|\n')
+
+PUNTOS_POR_PULGADA = 72
+FORMAS_CAJA = {'box', 'rect', 'rectangle', 'square', 'note', 'box3d', 'folder', 'component', 'tab'}
+FORMAS_SIN_BORDE = {'plaintext', 'plain', 'none'}
+SEPARACION_CLUSTER = 36  # Márgenes y etiqueta de la caja de un cluster
+
+def _valor(token):
+    if token.startswith('"'):
+        return token[1:-1].replace('\\"', '"')
+    return token
+
+def _sentencias(fuente):
+    # Divide el DOT en sentencias (listas de tokens) por ';' y fin de línea fuera de [...]
+    sentencia, profundidad = [], 0
+    for token in RE_TOKEN.findall(RE_COMENTARIO.sub('', fuente)):
+        if token == '[':
+            profundidad += 1
+        elif token == ']':
+            profundidad -= 1
+        if token in ('\n', ';') and profundidad == 0:
+            if sentencia:
+                yield sentencia
+                sentencia = []
+            continue
+        if token == '\n':
+            continue
+        if token in ('{', '}') and profundidad == 0:
+            if token == '{':
+                sentencia.append(token)
+                yield sentencia
+            else:
+                if sentencia:
+                    yield sentencia
+                yield ['}']
+            sentencia = []
+            continue
+        sentencia.append(token)
+    if sentencia:
+        yield sentencia
+
+def _atributos(tokens):
+    # 'clave = valor' separados por espacios, ',' o ';'
+    atributos = {}
+    tokens = [t for t in tokens if t not in (',', ';')]
+    i = 0
+    while i + 2 < len(tokens):
+        if tokens[i + 1] == '=':
+            atributos[_valor(tokens[i])] = _valor(tokens[i + 2])
+            i += 3
+        else:
+            i += 1
+    return atributos
+
+def leer_dot(fuente):
+    """
+    Interpreta un DOT de los que genera RoadMap.
+
+    Retorna:
+        dict: grafo (atributos del grafo raíz), nodos {nombre: atributos efectivos} en orden
+              de creación, aristas [(origen, destino, atributos efectivos)], rangos (grupos
+              rank=same) y clusters [(atributos, miembros)]
+    """
+    ambitos = []
+    grafo = {}
+    nodos = {}
+    aristas = []
+    rangos = []
+    clusters = []
+
+    def mencionar(nombre):
+        if nombre not in nodos:
+            nodos[nombre] = dict(ambitos[-1]['node'])
+        for ambito in ambitos[1:]:
+            ambito['miembros'].append(nombre)
+
+    for tokens in _sentencias(fuente):
+        if tokens[-1] == '{':
+            nombre = _valor(tokens[1]) if tokens[0] == 'subgraph' and len(tokens) > 2 else ''
+            padre = ambitos[-1] if ambitos else {'node': {}, 'edge': {}}
+            ambitos.append({'nombre': nombre, 'node': dict(padre['node']), 'edge': dict(padre['edge']),
+                            'grafo': {} if ambitos else grafo, 'miembros': []})
+            continue
+        if not ambitos:
+            continue
+        if tokens == ['}']:
+            ambito = ambitos.pop()
+            if ambitos:
+                miembros = list(dict.fromkeys(ambito['miembros']))
+                if ambito['grafo'].get('rank') == 'same':
+                    rangos.append(miembros)
+                if ambito['nombre'].startswith('cluster'):
+                    clusters.append((ambito['grafo'], miembros))
+            continue
+        if '[' in tokens:
+            corte = tokens.index('[')
+            cabeza, atributos = tokens[:corte], _atributos(tokens[corte + 1:-1])
+        else:
+            cabeza, atributos = tokens, {}
+        if cabeza in (['graph'], ['node'], ['edge']):
+            ambitos[-1]['grafo' if cabeza == ['graph'] else cabeza[0]].update(atributos)
+        elif '->' in cabeza or '--' in cabeza:
+            extremos = [_valor(t) for t in cabeza if t not in ('->', '--')]
+            for nombre in extremos:
+                mencionar(nombre)
+            efectivos = {**ambitos[-1]['edge'], **atributos}
+            for origen, destino in zip(extremos, extremos[1:]):
+                aristas.append((origen, destino, efectivos))
+        elif len(cabeza) >= 3 and cabeza[1] == '=':
+            ambitos[-1]['grafo'].update(_atributos(cabeza))
+        elif len(cabeza) == 1:
+            nombre = _valor(cabeza[0])
+            mencionar(nombre)
+            nodos[nombre].update(atributos)
+    return {'grafo': grafo, 'nodos': nodos, 'aristas': aristas, 'rangos': rangos, 'clusters': clusters}
+
+def _lineas(nombre, atributos):
+    etiqueta = atributos.get('label', nombre)
+    return RE_SALTO_ETIQUETA.split(etiqueta.replace('\\N', nombre))
+
+def _medidas(nombre, atributos):
+    # Tamaño aproximado del nodo a partir del texto (Helvetica: ~0.6 em por carácter)
+    tamano_letra = float(atributos.get('fontsize', 14))
+    lineas = _lineas(nombre, atributos)
+    ancho = max(len(linea) for linea in lineas) * tamano_letra * 0.6 + 16
+    alto = len(lineas) * tamano_letra * 1.25 + 10
+    ancho = max(ancho, float(atributos.get('width', 0.75)) * PUNTOS_POR_PULGADA)
+    alto = max(alto, float(atributos.get('height', 0.5)) * PUNTOS_POR_PULGADA)
+    return ancho, alto
+
+def _asignar_rangos(nombres, aristas, rangos):
+    """Rango por camino más largo sobre los grupos rank=same, sin ciclos."""
+    grupo = {nombre: nombre for nombre in nombres}
+    for miembros in rangos:
+        for nombre in miembros[1:]:
+            grupo[nombre] = grupo[miembros[0]]
+    sucesores = {g: [] for g in dict.fromkeys(grupo.values())}
+    for origen, destino, _ in aristas:
+        a, b = grupo[origen], grupo[destino]
+        if a != b:
+            sucesores[a].append(b)
+
+    # Aristas de retroceso de un recorrido en profundidad iterativo: se invierten
+    estado = dict.fromkeys(sucesores, 0)  # 0 sin visitar, 1 en curso, 2 terminado
+    predecesores = {g: [] for g in sucesores}
+    for inicio in sucesores:
+        if estado[inicio]:
+            continue
+        estado[inicio] = 1
+        pila = [(inicio, iter(sucesores[inicio]))]
+        while pila:
+            g, hijos = pila[-1]
+            for h in hijos:
+                if estado[h] == 1:
+                    predecesores[g].append(h)  # retroceso: h -> g
+                    break
+                predecesores[h].append(g)
+                if estado[h] == 0:
+                    estado[h] = 1
+                    pila.append((h, iter(sucesores[h])))
+                    break
+            else:
+                estado[g] = 2
+                pila.pop()
+
+    # Camino más largo en orden topológico (Kahn)
+    salientes = {g: [] for g in sucesores}
+    pendientes = {g: len(set(p)) for g, p in predecesores.items()}
+    for g, p in predecesores.items():
+        for h in set(p):
+            salientes[h].append(g)
+    rango = {g: 0 for g in sucesores}
+    cola = [g for g, n in pendientes.items() if n == 0]
+    for g in cola:
+        for h in salientes[g]:
+            rango[h] = max(rango[h], rango[g] + 1)
+            pendientes[h] -= 1
+            if pendientes[h] == 0:
+                cola.append(h)
+    return {nombre: rango[grupo[nombre]] for nombre in nombres}
+
+def _ordenar(por_rango, aristas, rango, pasadas=4):
+    """Orden dentro de cada rango por baricentro de los vecinos del rango adyacente."""
+    vecinos = {}
+    for origen, destino, _ in aristas:
+        vecinos.setdefault(origen, []).append(destino)
+        vecinos.setdefault(destino, []).append(origen)
+    posicion = {nombre: i for fila in por_rango for i, nombre in enumerate(fila)}
+    rangos = list(range(len(por_rango)))
+    for pasada in range(pasadas):
+        sentido = rangos[1:] if pasada % 2 == 0 else rangos[-2::-1]
+        paso = -1 if pasada % 2 == 0 else 1
+        for r in sentido:
+            fila = por_rango[r]
+            baricentro = {}
+            for nombre in fila:
+                adyacentes = [posicion[v] for v in vecinos.get(nombre, ()) if rango[v] == r + paso]
+                baricentro[nombre] = sum(adyacentes) / len(adyacentes) if adyacentes else posicion[nombre]
+            fila.sort(key=baricentro.__getitem__)
+            for i, nombre in enumerate(fila):
+                posicion[nombre] = i
+    return por_rango
+
+def maquetar(dot):
+    """
+    Calcula la posición (centro) y el tamaño de cada nodo.
+
+    Retorna:
+        dict: {nombre: (x, y, ancho, alto)} y (ancho, alto) del dibujo
+    """
+    nombres = list(dot['nodos'])
+    if not nombres:
+        return {}, (0, 0)
+    grafo = dot['grafo']
+    horizontal = grafo.get('rankdir', 'TB') in ('LR', 'RL')
+    separacion_nodos = float(grafo.get('nodesep', 0.25)) * PUNTOS_POR_PULGADA
+    separacion_rangos = float(grafo.get('ranksep', 0.5)) * PUNTOS_POR_PULGADA
+    medidas = {nombre: _medidas(nombre, atributos) for nombre, atributos in dot['nodos'].items()}
+
+    rango = _asignar_rangos(nombres, dot['aristas'], dot['rangos'])
+    por_rango = [[] for _ in range(max(rango.values()) + 1)]
+    for nombre in nombres:
+        por_rango[rango[nombre]].append(nombre)
+    _ordenar(por_rango, dot['aristas'], rango)
+
+    # Eje de los rangos (y en TB, x en LR) y eje dentro de cada rango
+    def a_lo_largo(nombre):
+        return medidas[nombre][0] if horizontal else medidas[nombre][1]
+
+    def a_lo_ancho(nombre):
+        return medidas[nombre][1] if horizontal else medidas[nombre][0]
+
+    # Entre nodos de clusters distintos queda sitio para las dos cajas y la etiqueta
+    cluster = {nombre: i for i, (_, miembros) in enumerate(dot['clusters']) for nombre in miembros}
+
+    def separacion(anterior, nombre):
+        return separacion_nodos + (SEPARACION_CLUSTER if cluster.get(anterior) != cluster.get(nombre) else 0)
+
+    margen = SEPARACION_CLUSTER
+    longitudes = [sum(a_lo_ancho(n) for n in fila) + sum(separacion(a, b) for a, b in zip(fila, fila[1:]))
+                  for fila in por_rango]
+    maxima = max(longitudes)
+    posiciones = {}
+    inicio_rango = margen
+    for fila, longitud in zip(por_rango, longitudes):
+        grosor = max((a_lo_largo(n) for n in fila), default=0)
+        cursor = margen + (maxima - longitud) / 2
+        for i, nombre in enumerate(fila):
+            if i:
+                cursor += separacion(fila[i - 1], nombre)
+            ancho_fila = a_lo_ancho(nombre)
+            centro_rango = inicio_rango + grosor / 2
+            centro_fila = cursor + ancho_fila / 2
+            x, y = (centro_rango, centro_fila) if horizontal else (centro_fila, centro_rango)
+            posiciones[nombre] = (x, y) + medidas[nombre]
+            cursor += ancho_fila
+        inicio_rango += grosor + separacion_rangos
+    total_rangos = inicio_rango - separacion_rangos + margen
+    total_fila = maxima + 2 * margen
+    return posiciones, ((total_rangos, total_fila) if horizontal else (total_fila, total_rangos))
+
+def _forma(atributos, x, y, ancho, alto):
+    forma = atributos.get('shape', 'ellipse')
+    estilo = atributos.get('style', '')
+    if 'invis' in estilo:
+        return ''
+    relleno = atributos.get('fillcolor', atributos.get('color', 'lightgrey')) if 'filled' in estilo else 'none'
+    trazo = atributos.get('color', 'black')
+    grosor = float(atributos.get('penwidth', 1)) * (2 if 'bold' in estilo else 1)
+    comun = f'fill="{escape(relleno)}" stroke="{escape(trazo)}" stroke-width="{grosor:g}"'
+    if 'dashed' in estilo:
+        comun += ' stroke-dasharray="5,2"'
+    x0, y0 = x - ancho / 2, y - alto / 2
+    if forma in FORMAS_SIN_BORDE:
+        return ''
+    if forma in FORMAS_CAJA:
+        redondeo = ' rx="6"' if 'rounded' in estilo else ''
+        return f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{ancho:.1f}" height="{alto:.1f}"{redondeo} {comun}/>'
+    if forma == 'cylinder':
+        r = min(alto * 0.12, 10)
+        return (f'<path d="M{x0:.1f},{y0 + r:.1f} A{ancho / 2:.1f},{r:.1f} 0 0,1 {x0 + ancho:.1f},{y0 + r:.1f} '
+                f'V{y0 + alto - r:.1f} A{ancho / 2:.1f},{r:.1f} 0 0,1 {x0:.1f},{y0 + alto - r:.1f} Z '
+                f'M{x0:.1f},{y0 + r:.1f} A{ancho / 2:.1f},{r:.1f} 0 0,0 {x0 + ancho:.1f},{y0 + r:.1f}" {comun}/>')
+    return f'<ellipse cx="{x:.1f}" cy="{y:.1f}" rx="{ancho / 2:.1f}" ry="{alto / 2:.1f}" {comun}/>'
+
+def _texto(lineas, x, y, atributos, tamano_defecto=14):
+    tamano = float(atributos.get('fontsize', tamano_defecto))
+    fuente = escape(atributos.get('fontname', 'Times-Roman'))
+    color = escape(atributos.get('fontcolor', 'black'))
+    alto_linea = tamano * 1.25
+    primera = y - alto_linea * (len(lineas) - 1) / 2 + tamano * 0.35
+    return ''.join(f'<text text-anchor="middle" x="{x:.1f}" y="{primera + i * alto_linea:.1f}" '
+                   f'font-family="{fuente}" font-size="{tamano:g}" fill="{color}">{escape(linea)}</text>'
+                   for i, linea in enumerate(lineas) if linea)
+
+def _borde(posicion, hacia, horizontal):
+    # Punto del borde del nodo en el eje de los rangos, del lado de 'hacia'
+    x, y, ancho, alto = posicion
+    if horizontal:
+        return (x + ancho / 2 if hacia[0] >= x else x - ancho / 2), y
+    return x, (y + alto / 2 if hacia[1] >= y else y - alto / 2)
+
+def _arista(origen, destino, atributos, posiciones, horizontal):
+    estilo = atributos.get('style', '')
+    if 'invis' in estilo or origen not in posiciones or destino not in posiciones:
+        return ''
+    po, pd = posiciones[origen], posiciones[destino]
+    x1, y1 = _borde(po, pd, horizontal)
+    x2, y2 = _borde(pd, po, horizontal)
+    if origen == destino:
+        return ''
+    # Curva con los puntos de control desplazados en el eje de los rangos
+    if horizontal:
+        dx = (x2 - x1) / 2 or 40
+        c1, c2 = (x1 + dx, y1), (x2 - dx, y2)
+    else:
+        dy = (y2 - y1) / 2 or 40
+        c1, c2 = (x1, y1 + dy), (x2, y2 - dy)
+    color = escape(atributos.get('color', 'black'))
+    grosor = float(atributos.get('penwidth', 1))
+    guiones = ' stroke-dasharray="5,2"' if 'dashed' in estilo else (' stroke-dasharray="1,4"' if 'dotted' in estilo else '')
+    partes = [f'<path d="M{x1:.1f},{y1:.1f} C{c1[0]:.1f},{c1[1]:.1f} {c2[0]:.1f},{c2[1]:.1f} {x2:.1f},{y2:.1f}" '
+              f'fill="none" stroke="{color}" stroke-width="{grosor:g}"{guiones}/>']
+    # Punta de flecha en la dirección de la tangente final
+    largo = 10 * float(atributos.get('arrowsize', 1))
+    tx, ty = x2 - c2[0], y2 - c2[1]
+    norma = (tx * tx + ty * ty) ** 0.5 or 1
+    tx, ty = tx / norma, ty / norma
+    bx, by = x2 - tx * largo, y2 - ty * largo
+    px, py = -ty * largo / 3, tx * largo / 3
+    partes.append(f'<polygon points="{x2:.1f},{y2:.1f} {bx + px:.1f},{by + py:.1f} {bx - px:.1f},{by - py:.1f}" '
+                  f'fill="{color}" stroke="{color}"/>')
+    etiqueta = atributos.get('label', atributos.get('xlabel'))
+    if etiqueta:
+        mx = (x1 + 3 * c1[0] + 3 * c2[0] + x2) / 8
+        my = (y1 + 3 * c1[1] + 3 * c2[1] + y2) / 8
+        partes.append(_texto(RE_SALTO_ETIQUETA.split(etiqueta), mx, my - 4, atributos, 10))
+    return f'<g class="edge"><title>{escape(origen)}&#45;&gt;{escape(destino)}</title>{"".join(partes)}</g>'
+
+def dot_a_svg(fuente_dot):
+    """
+    Dibuja un DOT como SVG sin Graphviz.
+
+    Parámetros:
+        fuente_dot (str): Código DOT (de EscritorDot o graphviz.Digraph)
+
+    Retorna:
+        str: Documento SVG
+    """
+    dot = leer_dot(fuente_dot)
+    horizontal = dot['grafo'].get('rankdir', 'TB') in ('LR', 'RL')
+    posiciones, (ancho, alto) = maquetar(dot)
+    partes = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{ancho:.0f}pt" height="{alto:.0f}pt" '
+              f'viewBox="0 0 {ancho:.1f} {alto:.1f}">',
+              '<g id="graph0" class="graph">',
+              f'<rect x="0" y="0" width="{ancho:.1f}" height="{alto:.1f}" fill="{escape(dot["grafo"].get("bgcolor", "white"))}"/>']
+
+    # Clusters: caja que envuelve a sus nodos, detrás de todo lo demás
+    for atributos, miembros in dot['clusters']:
+        cajas = [posiciones[n] for n in miembros if n in posiciones]
+        if not cajas or 'invis' in atributos.get('style', ''):
+            continue
+        x0 = min(x - w / 2 for x, y, w, h in cajas) - 10
+        y0 = min(y - h / 2 for x, y, w, h in cajas) - 24
+        x1 = max(x + w / 2 for x, y, w, h in cajas) + 10
+        y1 = max(y + h / 2 for x, y, w, h in cajas) + 10
+        redondeo = ' rx="8"' if 'rounded' in atributos.get('style', '') else ''
+        partes.append(f'<g class="cluster"><rect x="{x0:.1f}" y="{y0:.1f}" width="{x1 - x0:.1f}" height="{y1 - y0:.1f}"{redondeo} '
+                      f'fill="{escape(atributos.get("bgcolor", "none"))}" stroke="{escape(atributos.get("color", "black"))}"/>')
+        if atributos.get('label'):
+            partes.append(_texto([atributos['label']], (x0 + x1) / 2, y0 + 12, atributos))
+        partes.append('</g>')
+
+    for origen, destino, atributos in dot['aristas']:
+        partes.append(_arista(origen, destino, atributos, posiciones, horizontal))
+    for nombre, atributos in dot['nodos'].items():
+        x, y, w, h = posiciones[nombre]
+        partes.append(f'<g class="node"><title>{escape(nombre)}</title>{_forma(atributos, x, y, w, h)}'
+                      f'{_texto(_lineas(nombre, atributos), x, y, atributos)}</g>')
+    partes.append('</g></svg>')
+    return '\n'.join(partes)
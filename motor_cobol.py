@@ -0,0 +1,617 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de extracción de una sola pasada para fuentes COBOL.
+
+Lee cada programa una única vez y obtiene a la vez los párrafos y las llamadas PERFORM,
+las sentencias SQL por párrafo, el modo de acceso a las tablas DB2 y los destinos
+CALL / EXEC CICS. Lo usan RoadMap.08 (jerarquía de párrafos), RoadMapCalls.05
+(llamadas entre programas) y las dos pestañas de streamlit_app.py.
+"""
+
+import io
+import re
+
+from fuentes_cobol import abrir_fuente
+from grafo_parrafos import ConstructorGrafo
+from perfilador import fase, perfil_activo
+
+# ------------------------------------------------------------
+# LEXER DE FORMATO FIJO
+# Patrones y tablas precompilados una sola vez a nivel de módulo
+# ------------------------------------------------------------
+
+# Tipos de token que emite tokenizar_cobol()
+TK_COMENTARIO = 'COMENTARIO'  # Comentario (columna 7 = '*')
+TK_PROCEDURE = 'PROCEDURE'    # Cabecera PROCEDURE DIVISION
+TK_PARRAFO = 'PARRAFO'        # Etiqueta de párrafo
+TK_SECCION = 'SECCION'        # Cabecera '<nombre> SECTION' (se trata como un párrafo más)
+TK_PERFORM = 'PERFORM'        # Sentencia PERFORM con párrafo destino
+TK_PERFORM_THRU = 'PERFORM_THRU'  # PERFORM <desde> THRU <hasta>: valor (desde, hasta)
+TK_ENTRADA = 'ENTRADA'        # Punto de entrada declarado (ENTRY o USE de DECLARATIVES)
+TK_GO_TO = 'GO_TO'            # GO TO: valor con la tupla de párrafos destino
+TK_EXEC_SQL = 'EXEC_SQL'      # Bloque EXEC SQL ... END-EXEC completo
+TK_OTRA = 'OTRA'              # Cualquier otra línea
+
+# Nombre de párrafo seguido de '.' o de la palabra SECTION (p.ej. "PAR1." o "PAR1 SECTION")
+RE_PARRAFO = re.compile(r'^\s*([A-Z0-9][A-Z0-9-]{0,60})\s*(?:\.|\b(SECTION)\b)', re.IGNORECASE)
+
+# Sentencias que nunca inician un párrafo
+INICIOS_NO_PARRAFO = ('PERFORM ', 'IF ', 'ELSE ', 'EVALUATE ', 'MOVE ', 'SET ', 'DISPLAY', 'TO')
+
+# Parrafos comunes de error o log que no aportan a la logica funcional del SW (tras un prefijo de 4 caracteres)
+PARRAFOS_OMITIDOS = ('TRALOG-ZL-LEVEL5', 'PROGRAMMFEHLER', 'DB2-FEHLER', 'TRALOG-ZEILE')
+
+# Palabras reservadas que no son nombres de párrafo
+EXCLUIDOS_PARRAFO = frozenset({
+    'VARYING', 'UNTIL', 'WITH', 'END-IF', 'END-EXEC', 'STOP', 'STOP-RUN',
+    'EXIT', 'CONTINUE', 'PERFORM', 'EVALUATE', 'IF', 'ELSE', 'MOVE', 'SET',
+    'GOBACK', 'DECLARATIVES', 'END-PERFORM', 'END-EVALUATE', 'END-READ', 'END-WRITE',
+    'END-CALL', 'END-SEARCH', 'END-STRING', 'END-UNSTRING', 'END-COMPUTE'
+})
+
+# Palabras tras PERFORM que no son párrafos destino
+EXCLUIDOS_PERFORM = frozenset({'VARYING', 'UNTIL', 'WITH', 'END-IF', 'END-EXEC', 'STOP RUN', 'EXIT', 'CONTINUE'})
+
+def clasificar_linea(linea):
+    """
+    Clasifica una línea ya en mayúsculas de la PROCEDURE DIVISION.
+
+    Parámetros:
+        linea (str): Línea de código en mayúsculas (no comentario)
+
+    Retorna:
+        tuple: (tipo_token, valor) donde tipo_token es TK_PARRAFO, TK_SECCION, TK_PERFORM,
+               TK_PERFORM_THRU, TK_GO_TO, TK_ENTRADA o TK_OTRA y valor el nombre del
+               párrafo/destino, la tupla (desde, hasta) de un PERFORM ... THRU, la de
+               destinos de un GO TO (o None)
+    """
+    # Área de código: columna 8 (índice 7) en adelante si existe
+    codigo = linea[7:] if len(linea) > 7 else linea.lstrip()
+    sentencia = codigo.strip()
+    if not sentencia:
+        return TK_OTRA, None
+
+    # Etiqueta de párrafo, salvo que la línea empiece por una sentencia conocida
+    if not sentencia.startswith(INICIOS_NO_PARRAFO) and not sentencia.startswith(PARRAFOS_OMITIDOS, 4):
+        m = RE_PARRAFO.match(codigo)
+        if m:
+            nombre = m.group(1)
+            if nombre.upper() not in EXCLUIDOS_PARRAFO:
+                return (TK_SECCION if m.group(2) else TK_PARRAFO), nombre
+
+    # PERFORM <destino> [THRU <hasta>]
+    if 'PERFORM' in linea:
+        destino = extraer_destino_perform(linea)
+        if destino:
+            if 'THRU' in linea or 'THROUGH' in linea:
+                hasta = extraer_hasta_thru(linea)
+                if hasta:
+                    return TK_PERFORM_THRU, (destino, hasta)
+            return TK_PERFORM, destino
+
+    # GO TO <destino> [<destino> ... DEPENDING ON]
+    if 'GO ' in linea:
+        destinos = extraer_destinos_go_to(linea)
+        if destinos:
+            return TK_GO_TO, destinos
+
+    # Puntos de entrada del programa además del inicio de la PROCEDURE DIVISION
+    if sentencia.startswith(('ENTRY ', 'USE ')):
+        return TK_ENTRADA, None
+
+    return TK_OTRA, None
+
+def extraer_destino_perform(linea):
+    """
+    Obtiene el párrafo destino de la primera palabra PERFORM de una línea en mayúsculas.
+
+    Retorna:
+        str/None: Nombre del párrafo destino, None si no hay destino válido
+    """
+    partes = linea.split()
+    try:
+        destino = partes[partes.index('PERFORM') + 1].rstrip('.')
+    except (IndexError, ValueError):
+        return None
+    # Excluir palabras clave y parrafos de error/log
+    if destino in EXCLUIDOS_PERFORM or destino.startswith(PARRAFOS_OMITIDOS, 4):
+        return None
+    return destino
+
+def extraer_hasta_thru(linea):
+    """
+    Obtiene el último párrafo de un 'PERFORM <desde> THRU|THROUGH <hasta>' en mayúsculas.
+
+    Retorna:
+        str/None: Nombre del párrafo final del rango, None si la línea no es un PERFORM THRU
+    """
+    partes = linea.split()
+    try:
+        i = partes.index('PERFORM')
+        if partes[i + 2] not in ('THRU', 'THROUGH'):
+            return None
+        return partes[i + 3].rstrip('.')
+    except (IndexError, ValueError):
+        return None
+
+def extraer_destinos_go_to(linea):
+    """
+    Obtiene los párrafos destino de un 'GO [TO] <destino> ... [DEPENDING ON ...]' en mayúsculas.
+
+    Retorna:
+        tuple: Nombres de los párrafos destino (vacía si la línea no tiene un GO TO)
+    """
+    partes = linea.split()
+    try:
+        i = partes.index('GO') + 1
+    except ValueError:
+        return ()
+    if i < len(partes) and partes[i] == 'TO':
+        i += 1
+    destinos = []
+    for parte in partes[i:]:
+        if parte == 'DEPENDING':
+            break
+        destino = parte.rstrip('.')
+        if destino:
+            destinos.append(destino)
+        if parte.endswith('.'):
+            break
+    return tuple(destinos)
+
+def leer_bloque_sql(linea, numeradas):
+    """
+    Lee un bloque SQL completo a partir de la línea (en mayúsculas) que contiene EXEC SQL,
+    consumiendo del mismo iterador las líneas siguientes hasta END-EXEC.
+
+    Parámetros:
+        linea (str): Línea en mayúsculas que contiene 'EXEC SQL'
+        numeradas (iterator): Iterador (numero_linea, linea) del resto del fuente
+
+    Retorna:
+        str: Texto del bloque unido en una línea y en mayúsculas (sin comentarios)
+    """
+    resto = linea[linea.index('EXEC SQL') + 8:]
+    bloque = [resto.strip()]
+    if 'END-EXEC' not in resto:
+        for _, sig in numeradas:
+            sig = sig.upper()
+            if len(sig) >= 7 and sig[6] == '*':
+                continue
+            bloque.append(sig.strip())
+            if 'END-EXEC' in sig:
+                break
+    return ' '.join(bloque)
+
+def segmentar_bloques_sql(lineas):
+    """
+    Recorre el fuente una sola vez y devuelve sus bloques EXEC SQL ... END-EXEC.
+
+    Parámetros:
+        lineas (iterable): Líneas del fuente
+
+    Retorna:
+        generator: Tuplas (numero_linea, texto_bloque)
+    """
+    numeradas = enumerate(lineas, 1)
+    for num, linea in numeradas:
+        linea = linea.upper()
+        if 'EXEC SQL' not in linea or (len(linea) >= 7 and linea[6] == '*'):
+            continue
+        yield num, leer_bloque_sql(linea, numeradas)
+
+def tokenizar_cobol(lineas, analizar_sql=False):
+    """
+    Lexer de una sola pasada para fuentes COBOL en formato fijo.
+    Cada línea se pasa a mayúsculas y se clasifica una única vez.
+
+    Parámetros:
+        lineas (iterable): Líneas del fuente (p.ej. el objeto archivo abierto)
+        analizar_sql (bool): Si es True, agrupa los bloques EXEC SQL ... END-EXEC en un solo token
+
+    Retorna:
+        generator: Tuplas (tipo_token, valor, numero_linea). Para TK_EXEC_SQL el valor es
+                   el texto completo del bloque y numero_linea la línea del EXEC SQL.
+    """
+    # Fases: 0 = antes de PROCEDURE DIVISION, 1 = esperando el primer punto, 2 = código
+    fase = 0
+    numeradas = enumerate(lineas, 1)
+    for num, linea in numeradas:
+        linea = linea.upper()
+
+        # Comentario (columna 7 = '*' en COBOL)
+        if len(linea) >= 7 and linea[6] == '*':
+            yield TK_COMENTARIO, None, num
+            continue
+
+        # Bloque SQL completo (desde EXEC SQL hasta END-EXEC)
+        if analizar_sql and 'EXEC SQL' in linea:
+            yield TK_EXEC_SQL, leer_bloque_sql(linea, numeradas), num
+            continue
+
+        if fase == 2:
+            tipo, valor = clasificar_linea(linea)
+            yield tipo, valor, num
+        elif fase == 0:
+            if 'PROCEDURE DIVISION' in linea:
+                # Si el punto está en la misma línea, no hay que esperar más
+                fase = 2 if '.' in linea else 1
+                yield TK_PROCEDURE, None, num
+            else:
+                # Ignorar todo antes de PROCEDURE DIVISION
+                yield TK_OTRA, None, num
+        else:
+            # Cabecera de PROCEDURE DIVISION: ignorar hasta el primer punto real
+            if '.' in linea:
+                fase = 2
+            yield TK_OTRA, None, num
+
+# ------------------------------------------------------------
+# RECONOCEDOR SQL: un único recorrido lineal por bloque
+# ------------------------------------------------------------
+
+# Palabras del bloque: identificadores (con guiones COBOL) y variables host (':WS-X')
+RE_TOKEN_SQL = re.compile(r':?[\w-]+')
+
+# Palabras que tras FROM abren una tabla derivada o una función de tabla, no son tablas:
+# FROM (SELECT ...), FROM TABLE(...), FROM LATERAL(...), FROM FINAL/NEW/OLD TABLE (...)
+PALABRAS_RESERVADAS_SQL = frozenset({'SELECT', 'TABLE', 'LATERAL', 'FINAL', 'NEW', 'OLD'})
+
+# Orden en que extraer_sentencias_sql devuelve los tipos de sentencia
+ORDEN_SENTENCIAS_SQL = {
+    'SELECT': 0, 'INSERT': 1, 'UPDATE': 2, 'DELETE': 3,
+    'OPEN CURSOR': 4, 'CLOSE CURSOR': 5, 'FETCH CURSOR': 6, 'COMMIT': 7, 'ROLLBACK': 8
+}
+
+# Orientaciones que pueden aparecer entre FETCH y el nombre del cursor
+ORIENTACIONES_FETCH = frozenset({'NEXT', 'PRIOR', 'FIRST', 'LAST', 'CURRENT', 'BEFORE', 'AFTER', 'FROM'})
+
+def nombre_objeto_sql(token):
+    """
+    Devuelve el nombre de tabla/cursor contenido en un token, o None si el token
+    es una variable host, una palabra reservada o no empieza por un identificador.
+    """
+    if token[0] == ':' or token in PALABRAS_RESERVADAS_SQL:
+        return None
+    return token.partition('-')[0] or None
+
+def reconocer_sentencias_sql(bloque_sql):
+    """
+    Recorre una sola vez las palabras de un bloque SQL y emite las sentencias en orden
+    de aparición. Cada palabra se examina en tiempo constante, por lo que el coste es
+    lineal incluso con listas SELECT ... INTO de miles de columnas.
+
+    Parámetros:
+        bloque_sql (str): Texto del bloque SQL en mayúsculas
+
+    Retorna:
+        generator: Tuplas (tipo_sentencia, objeto_relacionado)
+    """
+    tokens = RE_TOKEN_SQL.findall(bloque_sql)
+    n = len(tokens)
+    i = 0
+    selects_pendientes = 0  # SELECT todavía sin su FROM (subconsultas anidadas)
+    commit = rollback = False
+    while i < n:
+        tok = tokens[i]
+        i += 1
+        if tok == 'SELECT':
+            selects_pendientes += 1
+        elif tok == 'FROM':
+            # FROM tabla -> cierra el SELECT pendiente más interno; tras FROM (SELECT ...) o
+            # FROM TABLE(...) no hay tabla y el SELECT sigue pendiente del FROM interior
+            if selects_pendientes and i < n:
+                objeto = nombre_objeto_sql(tokens[i])
+                if objeto:
+                    selects_pendientes -= 1
+                    i += 1
+                    yield 'SELECT', objeto
+        elif tok == 'INSERT':
+            # INSERT INTO tabla
+            if i + 1 < n and tokens[i] == 'INTO':
+                objeto = nombre_objeto_sql(tokens[i + 1])
+                if objeto:
+                    i += 2
+                    yield 'INSERT', objeto
+        elif tok == 'UPDATE':
+            # UPDATE tabla (no la cláusula FOR UPDATE [OF ...] de un cursor)
+            if i < n and (i < 2 or tokens[i - 2] != 'FOR'):
+                objeto = nombre_objeto_sql(tokens[i])
+                if objeto:
+                    i += 1
+                    yield 'UPDATE', objeto
+        elif tok == 'DELETE':
+            # DELETE FROM tabla
+            if i + 1 < n and tokens[i] == 'FROM':
+                objeto = nombre_objeto_sql(tokens[i + 1])
+                if objeto:
+                    i += 2
+                    yield 'DELETE', objeto
+        elif tok == 'OPEN' or tok == 'CLOSE':
+            if i < n:
+                objeto = nombre_objeto_sql(tokens[i])
+                if objeto:
+                    i += 1
+                    yield f"{tok} CURSOR", objeto
+        elif tok == 'FETCH':
+            # FETCH [NEXT|PRIOR|...] [FROM] cursor, pero no FETCH FIRST n ROWS ONLY
+            j = i
+            while j < n and tokens[j] in ORIENTACIONES_FETCH:
+                j += 1
+            if j < n and not tokens[j].isdigit() and tokens[j] not in ('ROW', 'ROWS'):
+                objeto = nombre_objeto_sql(tokens[j])
+                if objeto:
+                    i = j + 1
+                    yield 'FETCH CURSOR', objeto
+        elif tok == 'COMMIT':
+            commit = True
+        elif tok == 'ROLLBACK':
+            rollback = True
+
+    # COMMIT / ROLLBACK se informan una vez por bloque
+    if commit:
+        yield 'COMMIT', ''
+    if rollback:
+        yield 'ROLLBACK', ''
+
+def extraer_sentencias_sql(bloque_sql):
+    """
+    Extrae las sentencias SQL de un bloque de código SQL.
+
+    Parámetros:
+        bloque_sql (str): Texto completo del bloque SQL a analizar
+
+    Retorna:
+        list: Lista de tuplas con (tipo_sentencia, objeto_relacionado) encontradas,
+              agrupadas por tipo (SELECT, INSERT, UPDATE, DELETE, OPEN, CLOSE, FETCH, COMMIT, ROLLBACK)
+    """
+    sentencias = list(reconocer_sentencias_sql(bloque_sql.upper()))
+    # Orden estable por tipo de sentencia, igual que la salida histórica
+    sentencias.sort(key=lambda s: ORDEN_SENTENCIAS_SQL[s[0]])
+    return sentencias
+
+def acumular_tablas(tablas, sentencias):
+    """
+    Acumula en 'tablas' (tabla -> tipos de acceso) las sentencias de un bloque SQL.
+
+    Parámetros:
+        tablas (dict): Acumulador tabla -> set de tipos (SELECT, INSERT, UPDATE, DELETE)
+        sentencias (iterable): Tuplas (tipo_sentencia, objeto) de reconocer_sentencias_sql
+    """
+    for tipo, tabla in sentencias:
+        if tipo == 'SELECT':
+            if tabla not in ('DUAL', 'SYSIBM'):
+                tablas.setdefault(tabla, set()).add(tipo)
+        elif tipo in ('INSERT', 'UPDATE', 'DELETE'):
+            tablas.setdefault(tabla, set()).add(tipo)
+
+def consolidar_tablas(tablas):
+    """
+    Retorna:
+        dict: tabla -> 'WRITE' si hay INSERT/UPDATE/DELETE sobre ella, 'READ' en otro caso
+    """
+    resultado = {}
+    for tabla, tipos in tablas.items():
+        if 'INSERT' in tipos or 'UPDATE' in tipos or 'DELETE' in tipos:
+            resultado[tabla] = 'WRITE'
+        else:
+            resultado[tabla] = 'READ'
+    return resultado
+
+def extraer_tablas_db2(contenido):
+    """
+    Extrae las tablas/vistas DB2 de un fuente y su modo de acceso.
+    Primero segmenta los bloques EXEC SQL en una pasada lineal y después clasifica
+    cada bloque por separado, de modo que el coste es lineal en el tamaño del fuente.
+
+    Parámetros:
+        contenido (str): Texto completo del fuente COBOL
+
+    Retorna:
+        dict: tabla -> 'WRITE' si hay INSERT/UPDATE/DELETE sobre ella, 'READ' en otro caso
+    """
+    if isinstance(contenido, str):
+        contenido = io.StringIO(contenido)
+    return analizar_programa(contenido, parrafos=False, calls=False)['tablas']
+
+# ------------------------------------------------------------
+# LLAMADAS A OTROS PROGRAMAS (CALL / EXEC CICS)
+# ------------------------------------------------------------
+
+# CALL 'MODULO' o CALL WS-MODULO
+RE_CALL = re.compile(r"\sCALL\s+['\"]?([\w-]+)['\"]?")
+# EXEC CICS LINK/START/INVOKE PROGRAM('MODULO')
+RE_CICS = re.compile(r"EXEC\s+CICS\s+(?:LINK|START|INVOKE)\s+PROGRAM\s*\(['\"]?([\w-]+)['\"]?\)")
+# Prefijo de variable: WS-MODULO -> MODULO
+RE_GUION = re.compile(r"([\w+]+)?-([\w+]+)?")
+RE_MOVE = re.compile(r"\s+MOVE\s+")
+
+def detectar_call_linea(linea):
+    """
+    Busca CALL y EXEC CICS LINK/START/INVOKE en una línea en mayúsculas (no comentario).
+
+    Retorna:
+        tuple/None: (destino_call, destino_cics, descartada) con los nombres tal como
+                    aparecen (o None) y si la línea la descarta el análisis de directorio
+                    (contiene MOVE, por los literales, o tiene la columna 8 informada)
+    """
+    m = RE_CALL.search(linea) if 'CALL' in linea else None
+    c = RE_CICS.search(linea) if 'CICS' in linea else None
+    if m is None and c is None:
+        return None
+    descartada = not linea.strip() or len(linea) <= 7 or linea[7] != ' ' or RE_MOVE.search(linea) is not None
+    return (m.group(1) if m else None), (c.group(1) if c else None), descartada
+
+def observar_calls(lineas, calls):
+    """
+    Deja pasar las líneas de un fuente pasándolas a mayúsculas y anota en 'calls' las
+    llamadas de cada línea, de modo que se detectan en la misma lectura que usa el lexer.
+
+    Parámetros:
+        lineas (iterable): Líneas del fuente
+        calls (list): Acumulador de tuplas (numero_linea, destino_call, destino_cics, descartada)
+
+    Retorna:
+        generator: Las mismas líneas en mayúsculas
+    """
+    for num, linea in enumerate(lineas, 1):
+        linea = linea.upper()
+        if ('CALL' in linea or 'CICS' in linea) and not (len(linea) > 6 and linea[6] == '*'):
+            encontrada = detectar_call_linea(linea)
+            if encontrada:
+                calls.append((num,) + encontrada)
+        yield linea
+
+def destino_call_directorio(destino):
+    """Nombre limpio de un destino CALL: si es una variable (WS-MODULO) se toma la parte tras el guion."""
+    n = RE_GUION.search(destino)
+    if n:
+        return n.group(2)
+    return destino
+
+def calls_directorio(calls):
+    """
+    Destinos de llamada según las reglas de RoadMapCalls (una llamada por línea, CALL
+    antes que CICS, sin líneas con MOVE ni con la columna 8 informada).
+
+    Retorna:
+        list: Destinos en orden de aparición (con repeticiones)
+    """
+    destinos = []
+    for _, call, cics, descartada in calls:
+        if descartada:
+            continue
+        destino = destino_call_directorio(call) if call else "CICS-" + cics
+        if destino:
+            destinos.append(destino.upper())
+    return destinos
+
+def calls_xplain(calls):
+    """
+    Destinos de llamada según las reglas de la vista XPLAIN (última parte tras el guion,
+    al menos 4 caracteres y como mucho 8; CICS con 6 caracteres).
+
+    Retorna:
+        list: Destinos sin repetir
+    """
+    destinos = set()
+    for _, call, cics, _ in calls:
+        if call:
+            prog = call.split('-')[-1]
+            if prog and len(prog) >= 4:
+                destinos.add(prog[:8])
+        if cics:
+            destinos.add("CICS-" + cics[:6])
+    return list(destinos)
+
+# ------------------------------------------------------------
+# ANÁLISIS COMBINADO
+# ------------------------------------------------------------
+
+def analizar_programa(fuente, parrafos=True, sql=True, calls=True):
+    """
+    Analiza un programa en una sola lectura y devuelve todas las vistas pedidas.
+
+    Parámetros:
+        fuente: Ruta o contenido en memoria (ver fuentes_cobol.abrir_fuente)
+        parrafos (bool): Párrafos y llamadas PERFORM (y SQL por párrafo si sql)
+        sql (bool): Bloques EXEC SQL: sentencias por párrafo y modo de acceso a tablas
+        calls (bool): Llamadas CALL / EXEC CICS a otros programas
+
+    Retorna:
+        dict: {
+            'llamadas': GrafoParrafos con las llamadas PERFORM (None si no se piden párrafos),
+            'bloques_sql': número de bloques EXEC SQL,
+            'sql_por_parrafo': párrafo -> lista de (tipo_sentencia, objeto) por bloque,
+            'tablas': tabla -> 'READ' / 'WRITE',
+            'calls': lista de (numero_linea, destino_call, destino_cics, descartada),
+            'lineas_parrafo': párrafo -> líneas de fuente que ocupa (en orden de aparición),
+            'entradas': párrafos con ENTRY o USE (puntos de entrada además del inicio),
+            'thru': lista de (origen, desde, hasta) de cada PERFORM ... THRU,
+            'go_to': lista de (origen, destino) de cada GO TO (no entran en el grafo de llamadas),
+            'secciones': párrafos que son cabecera de SECTION, en orden de aparición,
+        }
+    """
+    grafo = ConstructorGrafo() if parrafos else None
+    sql_por_parrafo = {}
+    tablas = {}
+    lista_calls = []
+    bloques_sql = 0
+    parrafo_actual = '__START__'
+    lineas_parrafo = {}
+    entradas = []
+    rangos_thru = []
+    saltos = []
+    secciones = []
+    inicio_parrafo = 0  # Primera línea del párrafo actual (0 = aún fuera de la PROCEDURE DIVISION)
+
+    # Con --profile: 'lectura' (obtener y decodificar líneas) queda anidada en 'clasificacion'
+    # (lexer, PERFORM y CALL); 'sql' mide el reconocimiento de cada bloque EXEC SQL
+    perfil = perfil_activo()
+    with fase('clasificacion'), abrir_fuente(fuente) as lineas:
+        if perfil is not None:
+            lineas = perfil.medir_lineas(lineas)
+        if calls:
+            lineas = observar_calls(lineas, lista_calls)
+        if parrafos:
+            # Cada línea se clasifica una sola vez en el lexer; aquí sólo se consumen los tokens
+            for tipo, valor, num in tokenizar_cobol(lineas, sql):
+                if tipo == TK_PERFORM:
+                    # Llamada PERFORM dentro del párrafo actual
+                    grafo.agregar_llamada(parrafo_actual, valor)
+                elif tipo == TK_PARRAFO or tipo == TK_SECCION:
+                    # Inicio de un nuevo párrafo: las líneas desde el anterior son suyas
+                    if inicio_parrafo:
+                        lineas_parrafo[parrafo_actual] = lineas_parrafo.get(parrafo_actual, 0) + num - inicio_parrafo
+                    parrafo_actual = valor
+                    inicio_parrafo = num
+                    grafo.agregar_parrafo(parrafo_actual)
+                    if tipo == TK_SECCION:
+                        secciones.append(parrafo_actual)
+                elif tipo == TK_PERFORM_THRU:
+                    # En el grafo cuenta como PERFORM del primer párrafo; el rango se guarda aparte
+                    grafo.agregar_llamada(parrafo_actual, valor[0])
+                    rangos_thru.append((parrafo_actual, valor[0], valor[1]))
+                elif tipo == TK_GO_TO:
+                    saltos.extend((parrafo_actual, destino) for destino in valor)
+                elif tipo == TK_ENTRADA:
+                    entradas.append(parrafo_actual)
+                elif tipo == TK_PROCEDURE:
+                    inicio_parrafo = num + 1
+                elif tipo == TK_EXEC_SQL:
+                    bloques_sql += 1
+                    with fase('sql', len(valor)):
+                        sentencias = list(reconocer_sentencias_sql(valor))
+                        acumular_tablas(tablas, sentencias)
+                    # Orden estable por tipo de sentencia, como extraer_sentencias_sql
+                    sentencias.sort(key=lambda s: ORDEN_SENTENCIAS_SQL[s[0]])
+                    if sentencias:
+                        sql_por_parrafo.setdefault(parrafo_actual, []).extend(sentencias)
+            if inicio_parrafo:
+                # El último párrafo llega hasta la última línea leída
+                lineas_parrafo[parrafo_actual] = lineas_parrafo.get(parrafo_actual, 0) + num + 1 - inicio_parrafo
+        elif sql:
+            for _, bloque in segmentar_bloques_sql(lineas):
+                bloques_sql += 1
+                with fase('sql', len(bloque)):
+                    acumular_tablas(tablas, reconocer_sentencias_sql(bloque))
+        else:
+            for _ in lineas:
+                pass
+
+    llamadas = None
+    if parrafos:
+        with fase('grafo'):
+            llamadas = grafo.construir()
+    return {
+        'llamadas': llamadas,
+        'bloques_sql': bloques_sql,
+        'sql_por_parrafo': sql_por_parrafo,
+        'tablas': consolidar_tablas(tablas),
+        'calls': lista_calls,
+        'lineas_parrafo': lineas_parrafo,
+        'entradas': entradas,
+        'thru': rangos_thru,
+        'go_to': saltos,
+        'secciones': secciones,
+    }
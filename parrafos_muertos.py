@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Informe de párrafos muertos: los que ningún camino alcanza desde el inicio de la
+PROCEDURE DIVISION ni desde otro punto de entrada declarado (ENTRY, procedimientos USE
+de DECLARATIVES o los párrafos que indique el usuario).
+
+Sobre el grafo de llamadas del motor se añaden los caminos de ejecución que no son un
+PERFORM simple, sólo para este informe:
+
+    - PERFORM A THRU B ejecuta todos los párrafos de A a B en orden de fuente
+    - PERFORM de una SECTION ejecuta los párrafos que contiene
+    - GO TO salta a sus destinos
+
+La alcanzabilidad se calcula una vez para todas las entradas con máscaras de bits sobre
+el grafo de ids enteros (GrafoParrafos.alcance_entradas), de modo que una biblioteca
+entera se procesa al ritmo de la lectura de los fuentes. No se sigue la caída de un
+párrafo en el siguiente fuera de las secciones ni los GO TO alterados con ALTER.
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from grafo_parrafos import ConstructorGrafo
+from motor_cobol import analizar_programa
+
+# Párrafo ficticio con el código entre PROCEDURE DIVISION y el primer párrafo
+RAIZ = '__START__'
+
+class InformeMuertos:
+    """
+    Párrafos inalcanzables de un programa.
+
+    Atributos:
+        programa (str): Nombre del programa
+        entradas (list): Párrafos usados como punto de entrada (el inicio primero)
+        ignoradas (list): Entradas pedidas que no son párrafos del programa
+        parrafos (int): Párrafos declarados
+        lineas (int): Líneas de la PROCEDURE DIVISION contadas por párrafo
+        muertos (list): (párrafo, líneas) de cada párrafo inalcanzable, en orden de fuente
+        lineas_muertas (int): Líneas de los párrafos inalcanzables
+    """
+
+    def __init__(self, programa, entradas, ignoradas, parrafos, lineas, muertos):
+        self.programa = programa
+        self.entradas = entradas
+        self.ignoradas = ignoradas
+        self.parrafos = parrafos
+        self.lineas = lineas
+        self.muertos = muertos
+        self.lineas_muertas = sum(lineas for _, lineas in muertos)
+
+def grafo_ejecucion(resultado):
+    """
+    Grafo de llamadas del motor más los caminos de THRU, SECTION y GO TO.
+
+    Parámetros:
+        resultado (dict): Resultado de analizar_programa con parrafos=True
+
+    Retorna:
+        GrafoParrafos: Grafo extendido (sólo para calcular alcanzabilidad)
+    """
+    constructor = ConstructorGrafo()
+    for origen, destinos in resultado['llamadas'].items():
+        constructor.agregar_parrafo(origen)
+        for destino in destinos:
+            constructor.agregar_llamada(origen, destino)
+
+    # Párrafos declarados en orden de fuente
+    orden = [parrafo for parrafo in resultado['lineas_parrafo'] if parrafo != RAIZ]
+    posicion = {parrafo: i for i, parrafo in enumerate(orden)}
+
+    for origen, desde, hasta in resultado['thru']:
+        i, j = posicion.get(desde), posicion.get(hasta)
+        if i is not None and j is not None:
+            for parrafo in orden[i + 1:j + 1]:
+                constructor.agregar_llamada(origen, parrafo)
+
+    secciones = set(resultado['secciones'])
+    seccion = None
+    for parrafo in orden:
+        if parrafo in secciones:
+            seccion = parrafo
+        elif seccion is not None:
+            constructor.agregar_llamada(seccion, parrafo)
+
+    for origen, destino in resultado['go_to']:
+        constructor.agregar_llamada(origen, destino)
+    return constructor.construir()
+
+def informe_resultado(resultado, programa, entradas=()):
+    """
+    Calcula el informe a partir de un resultado de analizar_programa.
+
+    Parámetros:
+        resultado (dict): Resultado de analizar_programa con parrafos=True
+        programa (str): Nombre del programa para el informe
+        entradas (iterable): Párrafos adicionales a considerar punto de entrada
+
+    Retorna:
+        InformeMuertos: Informe del programa
+    """
+    lineas_parrafo = resultado['lineas_parrafo']
+    declarados = [parrafo for parrafo in lineas_parrafo if parrafo != RAIZ]
+    grafo = grafo_ejecucion(resultado)
+
+    # Inicio de la PROCEDURE DIVISION: el código antes del primer párrafo o, si no hay, el primer párrafo
+    nombres_entrada = []
+    if RAIZ in grafo:
+        nombres_entrada.append(RAIZ)
+    elif declarados:
+        nombres_entrada.append(declarados[0])
+    ignoradas = []
+    for nombre in list(resultado['entradas']) + [e.strip().upper() for e in entradas if e.strip()]:
+        if nombre in nombres_entrada:
+            continue
+        if nombre in grafo:
+            nombres_entrada.append(nombre)
+        else:
+            ignoradas.append(nombre)
+
+    alcance = grafo.alcance_entradas([grafo.ids[nombre] for nombre in nombres_entrada])
+    muertos = [(parrafo, lineas_parrafo[parrafo]) for parrafo in declarados if not alcance[grafo.ids[parrafo]]]
+    return InformeMuertos(programa, nombres_entrada, ignoradas, len(declarados),
+                          sum(lineas_parrafo[parrafo] for parrafo in declarados), muertos)
+
+def informe_programa(fuente, entradas=(), programa=None):
+    """
+    Analiza un programa y devuelve su informe de párrafos muertos.
+
+    Parámetros:
+        fuente: Ruta o contenido en memoria (ver fuentes_cobol.abrir_fuente)
+        entradas (iterable): Párrafos adicionales a considerar punto de entrada
+        programa (str): Nombre para el informe (por defecto el del archivo sin extensión)
+
+    Retorna:
+        InformeMuertos: Informe del programa
+    """
+    if programa is None:
+        programa = os.path.splitext(os.path.basename(fuente))[0]
+    resultado = analizar_programa(fuente, parrafos=True, sql=False, calls=False)
+    return informe_resultado(resultado, programa, entradas)
+
+def informes_biblioteca(archivos, entradas=(), jobs=1):
+    """
+    Informes de una lista de fuentes, en paralelo si jobs > 1.
+
+    Parámetros:
+        archivos (list): Rutas de los fuentes
+        entradas (iterable): Párrafos adicionales a considerar punto de entrada en todos
+        jobs (int): Número de procesos (1 = secuencial en este proceso, 0 = todos los núcleos)
+
+    Retorna:
+        generator: InformeMuertos de cada archivo, en el mismo orden que 'archivos'
+    """
+    analizar = partial(informe_programa, entradas=tuple(entradas))
+    if jobs == 1 or len(archivos) < 2:
+        for archivo in archivos:
+            yield analizar(archivo)
+        return
+
+    procesos = jobs if jobs > 0 else (os.cpu_count() or 1)
+    lote = max(1, len(archivos) // (procesos * 16))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        yield from pool.map(analizar, archivos, chunksize=lote)
+
+def escribir_csv(informes, salida):
+    """
+    Escribe una fila (programa, párrafo, líneas) por párrafo muerto en un archivo abierto.
+
+    Retorna:
+        tuple: (programas, párrafos muertos, líneas muertas) escritos
+    """
+    programas = muertos = lineas = 0
+    escritor = csv.writer(salida, delimiter=';')
+    escritor.writerow(['programa', 'parrafo', 'lineas'])
+    for informe in informes:
+        programas += 1
+        for parrafo, lineas_parrafo in informe.muertos:
+            escritor.writerow([informe.programa, parrafo, lineas_parrafo])
+        muertos += len(informe.muertos)
+        lineas += informe.lineas_muertas
+    return programas, muertos, lineas
+
+def guardar_csv(informes, ruta):
+    """Igual que escribir_csv pero en la ruta indicada."""
+    with open(ruta, 'w', encoding='utf-8', newline='') as salida:
+        return escribir_csv(informes, salida)
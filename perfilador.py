@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Perfilador de fases del análisis con temporizadores baratos.
+
+Sustituye al tracer con sys.settrace: en lugar de interceptar cada llamada a función,
+sólo se toma el reloj (time.perf_counter_ns) al entrar y salir de cada fase (lectura,
+clasificación, extracción SQL, construcción del grafo, generación DOT, render), y se
+acumulan tiempo, número de llamadas y bytes procesados. Las fases se anidan, de modo
+que el informe da el tiempo total y el propio de cada una y se puede exportar en el
+formato de pilas plegadas que leen flamegraph.pl y speedscope.
+
+Mientras no haya un perfilador activo (perfilar()), fase() devuelve un objeto nulo
+compartido y el coste para el análisis es una consulta a una ContextVar.
+"""
+
+import json
+from itertools import islice
+from time import perf_counter_ns
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Perfilador activo del hilo/contexto actual (None = perfilado desactivado)
+_perfil_activo = ContextVar('perfil_roadmap', default=None)
+
+class _Fase:
+    """Medida de una fase: context manager que acumula en el perfilador al salir."""
+
+    __slots__ = ('perfil', 'nombre', 'bytes', 'inicio')
+
+    def __init__(self, perfil, nombre, bytes_procesados):
+        self.perfil = perfil
+        self.nombre = nombre
+        self.bytes = bytes_procesados  # Se puede actualizar dentro del with si se conoce al final
+
+    def __enter__(self):
+        pila = self.perfil._pila
+        pila.append(self.nombre)
+        # Registrar la fase al entrar para que el informe siga el orden de las fases
+        self.perfil.fases.setdefault(tuple(pila), [0, 0, 0])
+        self.inicio = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        transcurrido = perf_counter_ns() - self.inicio
+        pila = self.perfil._pila
+        self.perfil.acumular(tuple(pila), transcurrido, 1, self.bytes)
+        pila.pop()
+        return False
+
+class _FaseNula:
+    """Fase sin efecto cuando no se está perfilando (admite 'with ... as f: f.bytes = n')."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def bytes(self):
+        return 0
+
+    @bytes.setter
+    def bytes(self, valor):
+        pass
+
+_FASE_NULA = _FaseNula()
+
+class Perfilador:
+    """
+    Acumula por fase (identificada por su pila de fases, p.ej. ('analisis', 'lectura'))
+    el tiempo en nanosegundos, el número de llamadas y los bytes procesados.
+    """
+
+    def __init__(self):
+        self.fases = {}   # pila (tuple) -> [nanosegundos, llamadas, bytes]
+        self._pila = []
+        self._inicio = perf_counter_ns()
+
+    def fase(self, nombre, bytes_procesados=0):
+        """Context manager que mide una fase anidada en la fase actual."""
+        return _Fase(self, nombre, bytes_procesados)
+
+    def acumular(self, pila, nanosegundos, llamadas=1, bytes_procesados=0):
+        """Suma una medida a la fase identificada por su pila."""
+        medida = self.fases.get(pila)
+        if medida is None:
+            self.fases[pila] = [nanosegundos, llamadas, bytes_procesados]
+        else:
+            medida[0] += nanosegundos
+            medida[1] += llamadas
+            medida[2] += bytes_procesados
+
+    def medir_lineas(self, lineas, nombre='lectura', bloque=1024):
+        """
+        Envuelve un iterable de líneas midiendo sólo el tiempo de obtenerlas (lectura y
+        decodificación). Las líneas se piden por bloques para tomar el reloj una vez por
+        bloque y no por línea. Cuenta como llamadas el número de líneas y como bytes su
+        longitud. La fase queda anidada en la fase actual al crear el envoltorio.
+        """
+        pila = tuple(self._pila) + (nombre,)
+        self.fases.setdefault(pila, [0, 0, 0])
+        reloj = perf_counter_ns
+        iterador = iter(lineas)
+        total = num = procesados = 0
+        try:
+            while True:
+                t = reloj()
+                lote = list(islice(iterador, bloque))
+                total += reloj() - t
+                if not lote:
+                    break
+                num += len(lote)
+                procesados += sum(map(len, lote))
+                yield from lote
+        finally:
+            self.acumular(pila, total, num, procesados)
+
+    def informe(self):
+        """
+        Retorna:
+            dict: Serializable en JSON con el tiempo total y, por fase (en orden de
+                  aparición), tiempo total y propio (sin las subfases), llamadas y bytes
+        """
+        hijos = {}
+        for pila, (ns, _, _) in self.fases.items():
+            if len(pila) > 1:
+                hijos[pila[:-1]] = hijos.get(pila[:-1], 0) + ns
+        fases = []
+        for pila, (ns, llamadas, procesados) in self.fases.items():
+            segundos = ns / 1e9
+            fases.append({
+                'fase': ';'.join(pila),
+                'nombre': pila[-1],
+                'nivel': len(pila) - 1,
+                'segundos': round(segundos, 6),
+                'segundos_propios': round(max(0, ns - hijos.get(pila, 0)) / 1e9, 6),
+                'llamadas': llamadas,
+                'bytes': procesados,
+                'mb_por_segundo': round(procesados / segundos / 1e6, 2) if procesados and segundos else None,
+            })
+        return {'segundos_totales': round((perf_counter_ns() - self._inicio) / 1e9, 6), 'fases': fases}
+
+    def pilas_plegadas(self):
+        """
+        Informe en formato de pilas plegadas ('a;b valor' por línea, valor en microsegundos
+        de tiempo propio), para flamegraph.pl, speedscope o inferno.
+        """
+        lineas = []
+        for fase in self.informe()['fases']:
+            microsegundos = round(fase['segundos_propios'] * 1e6)
+            if microsegundos:
+                lineas.append(f"{fase['fase']} {microsegundos}")
+        return "\n".join(lineas) + "\n"
+
+    def resumen(self):
+        """Tabla de texto con las fases, indentadas según su anidamiento."""
+        lineas = [f"{'Fase':32s} {'Total ms':>10s} {'Propio ms':>10s} {'Llamadas':>10s} {'MB':>8s} {'MB/s':>8s}"]
+        for fase in self.informe()['fases']:
+            nombre = '  ' * fase['nivel'] + fase['nombre']
+            mb = f"{fase['bytes'] / 1e6:8.2f}" if fase['bytes'] else f"{'-':>8s}"
+            velocidad = f"{fase['mb_por_segundo']:8.1f}" if fase['mb_por_segundo'] else f"{'-':>8s}"
+            lineas.append(f"{nombre:32s} {fase['segundos'] * 1000:10.1f} {fase['segundos_propios'] * 1000:10.1f} "
+                          f"{fase['llamadas']:10d} {mb} {velocidad}")
+        return "\n".join(lineas)
+
+    def guardar(self, ruta_json):
+        """
+        Guarda el informe JSON y, junto a él (misma ruta con extensión .folded), las pilas plegadas.
+
+        Retorna:
+            tuple: (ruta_json, ruta_folded)
+        """
+        with open(ruta_json, 'w', encoding='utf-8') as f:
+            json.dump(self.informe(), f, indent=2)
+        ruta_folded = f"{ruta_json[:-5] if ruta_json.endswith('.json') else ruta_json}.folded"
+        with open(ruta_folded, 'w', encoding='utf-8') as f:
+            f.write(self.pilas_plegadas())
+        return ruta_json, ruta_folded
+
+def perfil_activo():
+    """Perfilador activo en el contexto actual, o None."""
+    return _perfil_activo.get()
+
+def fase(nombre, bytes_procesados=0):
+    """
+    Mide una fase en el perfilador activo. Sin perfilador activo no hace nada.
+
+    Uso:
+        with fase('dot') as f:
+            fuente = dot.source
+            f.bytes = len(fuente)
+    """
+    perfil = _perfil_activo.get()
+    if perfil is None:
+        return _FASE_NULA
+    return _Fase(perfil, nombre, bytes_procesados)
+
+@contextmanager
+def perfilar(perfil=None):
+    """
+    Activa un perfilador durante el bloque (en el hilo/contexto actual).
+
+    Retorna:
+        Perfilador: El perfilador activado (uno nuevo si no se pasa)
+    """
+    if perfil is None:
+        perfil = Perfilador()
+    token = _perfil_activo.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _perfil_activo.reset(token)
+
+def activar(perfil=None):
+    """
+    Activa un perfilador hasta el final del proceso (para los scripts de línea de comandos).
+
+    Retorna:
+        Perfilador: El perfilador activado
+    """
+    if perfil is None:
+        perfil = Perfilador()
+    _perfil_activo.set(perfil)
+    return perfil
+
+def informar(perfil, ruta_json):
+    """Muestra el resumen por consola y guarda el informe JSON y las pilas plegadas."""
+    print("\nPerfil de fases:")
+    print(perfil.resumen())
+    ruta_json, ruta_folded = perfil.guardar(ruta_json)
+    print(f"Perfil guardado en: {ruta_json} (pilas plegadas para flamegraph en {ruta_folded})")
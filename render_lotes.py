@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Render en paralelo de lotes de grafos DOT con Graphviz.
+
+El análisis sólo construye el DOT de cada programa y lo encola; un número limitado
+de hilos lanza el ejecutable de Graphviz (cada render es un proceso 'dot' propio, así
+que los hilos no compiten por el GIL) con un tiempo máximo por render. Si un DOT
+idéntico ya se encoló en el mismo lote no se vuelve a renderizar: al terminar se
+copia el resultado del primero, y con una CacheRender tampoco se renderizan los DOT
+que no han cambiado desde una ejecución anterior.
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_render import renderizar
+
+class ColaRender:
+    """
+    Cola de renders con un pool acotado de hilos.
+
+    Parámetros:
+        hilos (int): Renders simultáneos (0 = todos los núcleos)
+        timeout (float): Segundos máximos por render (None = sin límite)
+        formato (str): Formato de salida de Graphviz (pdf, svg, png...)
+        motor (str): Ejecutable de Graphviz (dot, neato...)
+        cache (CacheRender): Caché de renders entre ejecuciones (None = sin caché)
+    """
+
+    def __init__(self, hilos=0, timeout=300, formato='pdf', motor='dot', cache=None):
+        self.hilos = hilos if hilos > 0 else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self.formato = formato
+        self.motor = motor
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos)
+        # Como mucho unos pocos DOT por hilo esperando en memoria: el análisis se frena si el render no da abasto
+        self._huecos = threading.BoundedSemaphore(self.hilos * 4)
+        self._primeros = {}   # hash del DOT -> (future, ruta de salida del primer render)
+        self._duplicados = [] # (hash, ruta de salida) pendientes de copiar
+        self._futuros = []    # (ruta de salida, future)
+
+    def encolar(self, fuente_dot, ruta_base):
+        """
+        Encola el render de un DOT. Como con Digraph.render, el resultado se guarda en
+        '<ruta_base>.<formato>'.
+
+        Parámetros:
+            fuente_dot (str): Código DOT (p.ej. Digraph.source)
+            ruta_base (str): Ruta de salida sin extensión
+
+        Retorna:
+            str: Ruta del archivo que se generará
+        """
+        ruta_salida = f"{ruta_base}.{self.formato}"
+        # Para la deduplicación del lote basta con el DOT: formato y motor son los de la cola
+        clave = hashlib.sha256(fuente_dot.encode('utf-8')).hexdigest()
+        if clave in self._primeros:
+            self._duplicados.append((clave, ruta_salida))
+            return ruta_salida
+        self._huecos.acquire()
+        futuro = self._pool.submit(self._renderizar, fuente_dot, ruta_base)
+        self._primeros[clave] = (futuro, ruta_salida)
+        self._futuros.append((ruta_salida, futuro))
+        return ruta_salida
+
+    def _renderizar(self, fuente_dot, ruta_base):
+        try:
+            _, desde_cache = renderizar(fuente_dot, ruta_base, self.formato, self.motor, self.cache, self.timeout)
+            return desde_cache
+        finally:
+            self._huecos.release()
+
+    def cerrar(self):
+        """
+        Espera a que terminen todos los renders y copia los resultados de los DOT duplicados.
+
+        Retorna:
+            dict: Contadores renderizados / desde_cache / duplicados / fallos / timeouts
+                  y la lista de errores [(ruta, mensaje)]
+        """
+        self._pool.shutdown(wait=True)
+        estadisticas = {'renderizados': 0, 'desde_cache': 0, 'duplicados': 0, 'fallos': 0, 'timeouts': 0, 'errores': []}
+        for ruta_salida, futuro in self._futuros:
+            error = futuro.exception()
+            if error is None:
+                estadisticas['desde_cache' if futuro.result() else 'renderizados'] += 1
+                continue
+            if isinstance(error, subprocess.TimeoutExpired):
+                estadisticas['timeouts'] += 1
+                mensaje = f"render cancelado tras {self.timeout} s"
+            else:
+                estadisticas['fallos'] += 1
+                if isinstance(error, subprocess.CalledProcessError):
+                    mensaje = error.stderr.decode('utf-8', 'replace').strip() or str(error)
+                elif isinstance(error, FileNotFoundError):
+                    mensaje = f"no se encuentra el ejecutable de Graphviz '{self.motor}' en el PATH"
+                else:
+                    mensaje = str(error)
+            estadisticas['errores'].append((ruta_salida, mensaje))
+        for clave, ruta_salida in self._duplicados:
+            futuro, ruta_original = self._primeros[clave]
+            if futuro.exception() is None:
+                if os.path.abspath(ruta_original) != os.path.abspath(ruta_salida):
+                    shutil.copyfile(ruta_original, ruta_salida)
+                estadisticas['duplicados'] += 1
+        return estadisticas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(wait=True)
+        return False
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Resumen por nivel de detalle del grafo de párrafos para el visor de Streamlit.
+
+En programas grandes el diagrama completo tiene miles de cajas y una nota por cada
+sentencia SQL, y Viz.js en el navegador se bloquea. Si el número de nodos supera un
+presupuesto, resumir_grafo aplica por orden, y sólo mientras siga por encima:
+
+    1. Sentencias SQL plegadas en una insignia de tablas dentro de cada párrafo
+    2. Ciclos de PERFORM (componentes fuertemente conexas) fusionados en un nodo
+    3. Cadenas lineales de PERFORM (A -> B -> C sin otras entradas ni salidas) en un nodo
+    4. Párrafos por debajo del nivel que quepa en el presupuesto plegados en un nodo
+       '+N párrafos' bajo su antecesor visible
+
+El resultado es un GrafoParrafos de grupos con las llamadas entre grupos (sumando su
+multiplicidad), que se dibuja como el grafo original; el DOT completo sigue
+disponible para descargarlo.
+"""
+
+from grafo_parrafos import ConstructorGrafo
+
+# Nodos a partir de los cuales el visor del navegador deja de ser interactivo
+PRESUPUESTO_DEFECTO = 400
+
+# Tipo de acceso de cada sentencia para la insignia de tablas
+ACCESO_SQL = {
+    'SELECT': 'R', 'OPEN CURSOR': 'R', 'FETCH CURSOR': 'R', 'CLOSE CURSOR': 'R',
+    'INSERT': 'W', 'UPDATE': 'W', 'DELETE': 'W',
+}
+
+class ResumenGrafo:
+    """
+    Grafo resumido listo para dibujar.
+
+    Atributos:
+        llamadas (GrafoParrafos): Llamadas entre grupos (la raíz es la primera clave)
+        selects (dict): Sentencias SQL por grupo ({} si se plegaron en insignias)
+        etiquetas (dict): Texto a mostrar de los grupos cuyo nombre no basta (saltos de línea como \\n de DOT)
+        tipos (dict): Tipo de cada grupo que no es un párrafo suelto ('ciclo', 'cadena', 'plegado')
+        con_sql (set): Grupos con algún párrafo con SQL
+        pasos (list): Descripción de cada paso de resumen aplicado
+        nodos_original (int): Nodos del diagrama completo (párrafos + notas SQL)
+        nodos_resumen (int): Nodos del diagrama resumido
+    """
+
+    def __init__(self, llamadas, selects, etiquetas, tipos, con_sql, pasos, nodos_original, nodos_resumen):
+        self.llamadas = llamadas
+        self.selects = selects
+        self.etiquetas = etiquetas
+        self.tipos = tipos
+        self.con_sql = con_sql
+        self.pasos = pasos
+        self.nodos_original = nodos_original
+        self.nodos_resumen = nodos_resumen
+
+def insignia_sql(sentencias, maximo=6):
+    """
+    Resume sentencias "TIPO ... OBJETO" (con un posible sufijo ' (xN)') en una línea
+    'TABLA R/W' por objeto, p.ej. 'TAB01 RW · TAB02 R · +3'.
+    """
+    accesos = {}
+    for sentencia in sentencias:
+        tipo, _, objeto = sentencia.partition(' ... ')
+        objeto = objeto.split(' (x')[0].strip()
+        acceso = ACCESO_SQL.get(tipo)
+        if acceso is None or not objeto:
+            continue  # COMMIT / ROLLBACK no tienen tabla
+        accesos.setdefault(objeto, set()).add(acceso)
+    partes = [f"{objeto} {''.join(sorted(tipos))}" for objeto, tipos in accesos.items()]
+    if len(partes) > maximo:
+        partes = partes[:maximo] + [f"+{len(partes) - maximo}"]
+    return ' · '.join(partes)
+
+def _raiz(grafo):
+    # La misma raíz que usa el dibujo: __START__ o el primer párrafo
+    if '__START__' in grafo:
+        return grafo.ids['__START__']
+    return grafo.ids[next(iter(grafo))]
+
+def resumir_grafo(grafo, selects_por_parrafo, analizar_sql=False, presupuesto=PRESUPUESTO_DEFECTO):
+    """
+    Resume el grafo si su diagrama supera el presupuesto de nodos.
+
+    Parámetros:
+        grafo (GrafoParrafos): Llamadas entre párrafos (ya restringidas al párrafo inicial)
+        selects_por_parrafo (dict): Sentencias SQL por párrafo
+        analizar_sql (bool): Si el diagrama incluye las sentencias SQL
+        presupuesto (int): Nodos máximos del diagrama
+
+    Retorna:
+        ResumenGrafo: Grafo resumido, o None si el diagrama completo cabe en el presupuesto
+    """
+    if not len(grafo):
+        return None
+    raiz = _raiz(grafo)
+    visibles = grafo.alcanzables(raiz)
+    nombres = grafo.nombres
+    selects_por_parrafo = selects_por_parrafo if analizar_sql else {}
+    sentencias = sum(len(selects_por_parrafo.get(nombres[i], ())) for i in visibles)
+    nodos_original = len(visibles) + sentencias
+    if nodos_original <= presupuesto:
+        return None
+
+    # Cada párrafo visible empieza en su propio grupo (el id del grupo es el de su primer párrafo)
+    grupo = {i: i for i in visibles}
+    miembros = {i: [i] for i in visibles}
+    tipos = {}
+    pasos = []
+    sql_plegado = False
+
+    def coste():
+        return len(miembros) + (0 if sql_plegado else sentencias)
+
+    def fusionar(ids, tipo):
+        destino = grupo[ids[0]]
+        for g in dict.fromkeys(grupo[i] for i in ids):
+            if g != destino:
+                for i in miembros[g]:
+                    grupo[i] = destino
+                miembros[destino].extend(miembros.pop(g))
+                tipos.pop(g, None)
+        tipos[destino] = tipo
+        return destino
+
+    # 1. Sentencias SQL en insignias de tablas
+    if sentencias and coste() > presupuesto:
+        sql_plegado = True
+        pasos.append(f"{sentencias} sentencias SQL plegadas en insignias de tablas")
+
+    # 2. Ciclos de PERFORM en un único nodo
+    if coste() > presupuesto:
+        _, componentes = grafo.componentes_fuertes(raiz)
+        ciclos = [c for c in componentes if len(c) > 1]
+        for ciclo in ciclos:
+            fusionar(ciclo, 'ciclo')
+        if ciclos:
+            pasos.append(f"{len(ciclos)} ciclos fusionados ({sum(map(len, ciclos))} párrafos)")
+
+    # 3. Cadenas lineales de PERFORM entre grupos
+    if coste() > presupuesto:
+        sucesores, entradas = _llamadas_entre_grupos(grafo, visibles, grupo)
+        raiz_grupo = grupo[raiz]
+        siguiente = {}
+        for g, salientes in sucesores.items():
+            if len(salientes) != 1 or g in tipos:
+                continue
+            (h,) = salientes
+            if entradas.get(h, 0) == 1 and h not in tipos and h != raiz_grupo:
+                siguiente[g] = h
+        enlazados = set(siguiente.values())
+        cadenas = 0
+        colapsados = 0
+        for cabeza in list(siguiente):
+            if cabeza in enlazados:
+                continue
+            cadena = [cabeza]
+            while cadena[-1] in siguiente:
+                cadena.append(siguiente[cadena[-1]])
+            fusionar(cadena, 'cadena')
+            cadenas += 1
+            colapsados += len(cadena)
+        if cadenas:
+            pasos.append(f"{cadenas} cadenas de PERFORM colapsadas ({colapsados} nodos)")
+
+    # 4. Niveles profundos plegados bajo su antecesor visible
+    if coste() > presupuesto:
+        _plegar_niveles(grafo, visibles, grupo, miembros, tipos, raiz, presupuesto - (0 if sql_plegado else sentencias), pasos)
+
+    return _construir_resumen(grafo, visibles, grupo, miembros, tipos, raiz, selects_por_parrafo,
+                              sql_plegado, pasos, nodos_original)
+
+def _llamadas_entre_grupos(grafo, visibles, grupo):
+    # Sucesores distintos de cada grupo (sin bucles) y número de grupos que llaman a cada uno
+    sucesores = {}
+    for i in visibles:
+        g = grupo[i]
+        salientes = sucesores.setdefault(g, {})
+        for d in grafo.sucesores(i):
+            h = grupo[d]
+            if h != g:
+                salientes[h] = None
+    entradas = {}
+    for salientes in sucesores.values():
+        for h in salientes:
+            entradas[h] = entradas.get(h, 0) + 1
+    return sucesores, entradas
+
+def _plegar_niveles(grafo, visibles, grupo, miembros, tipos, raiz, presupuesto, pasos):
+    """
+    Recorrido en amplitud sobre los grupos: se muestran los niveles hasta el más profundo
+    que quepa contando un nodo '+N' por cada grupo del último nivel con descendientes
+    ocultos, y cada grupo oculto se pliega en el de su antecesor visible en el árbol.
+    """
+    sucesores, _ = _llamadas_entre_grupos(grafo, visibles, grupo)
+    raiz_grupo = grupo[raiz]
+    nivel = {raiz_grupo: 0}
+    padre = {}
+    orden = [raiz_grupo]
+    for g in orden:
+        for h in sucesores.get(g, ()):
+            if h not in nivel:
+                nivel[h] = nivel[g] + 1
+                padre[h] = g
+                orden.append(h)
+
+    # Nodos con profundidad <= p: grupos hasta p y un '+N' por cada grupo de nivel p con hijos
+    por_nivel = {}
+    for g in orden:
+        por_nivel[nivel[g]] = por_nivel.get(nivel[g], 0) + 1
+    con_hijos = {}
+    for h, g in padre.items():
+        con_hijos.setdefault(nivel[g], set()).add(g)
+    profundidad = 0
+    acumulado = por_nivel[0]
+    for p in range(1, max(por_nivel) + 1):
+        if acumulado + por_nivel[p] + len(con_hijos.get(p, ())) > presupuesto:
+            break
+        acumulado += por_nivel[p]
+        profundidad = p
+    if profundidad == max(por_nivel):
+        return
+
+    # Antecesor visible (nivel == profundidad) de cada grupo oculto
+    frontera = {}
+    for g in orden:
+        if nivel[g] > profundidad:
+            p = padre[g]
+            frontera[g] = p if nivel[p] == profundidad else frontera[p]
+    plegados = {}
+    ocultos = 0
+    for g, f in frontera.items():
+        ocultos += len(miembros[g])
+        destino = plegados.get(f)
+        if destino is None:
+            plegados[f] = destino = g
+            tipos[g] = ('plegado', f)
+            continue
+        for i in miembros[g]:
+            grupo[i] = destino
+        miembros[destino].extend(miembros.pop(g))
+        tipos.pop(g, None)
+    pasos.append(f"{ocultos} párrafos por debajo del nivel {profundidad} plegados en {len(plegados)} nodos")
+
+def _construir_resumen(grafo, visibles, grupo, miembros, tipos, raiz, selects_por_parrafo,
+                       sql_plegado, pasos, nodos_original):
+    nombres = grafo.nombres
+
+    # Nombre de cada grupo: el del párrafo si está solo y un identificador propio si no
+    nombre_grupo = {}
+    etiquetas = {}
+    for g, ids in miembros.items():
+        tipo = tipos.get(g)
+        primero = nombres[ids[0]]
+        if tipo is None:
+            nombre_grupo[g] = primero
+        elif tipo == 'ciclo':
+            nombre_grupo[g] = f"[ciclo] {primero}"
+            lista = ', '.join(nombres[i] for i in ids[:4]) + (', ...' if len(ids) > 4 else '')
+            etiquetas[nombre_grupo[g]] = f"Ciclo de {len(ids)} párrafos\\n{lista}"
+        elif tipo == 'cadena':
+            nombre_grupo[g] = f"[cadena] {primero}"
+            etiquetas[nombre_grupo[g]] = f"{primero}\\n... {len(ids) - 2} más ...\\n{nombres[ids[-1]]}" if len(ids) > 2 \
+                else f"{primero}\\n{nombres[ids[-1]]}"
+    for g, ids in miembros.items():
+        tipo = tipos.get(g)
+        if isinstance(tipo, tuple):
+            antecesor = nombre_grupo[grupo[miembros[tipo[1]][0]]]
+            nombre_grupo[g] = f"[+] {antecesor}"
+            etiquetas[nombre_grupo[g]] = f"+{len(ids)} párrafos"
+            tipos[g] = 'plegado'
+
+    # SQL por grupo: notas del diagrama o insignia en la etiqueta
+    selects = {}
+    con_sql = set()
+    for g, ids in miembros.items():
+        sentencias = [s for i in ids for s in selects_por_parrafo.get(nombres[i], ())]
+        if not sentencias:
+            continue
+        nombre = nombre_grupo[g]
+        con_sql.add(nombre)
+        if not sql_plegado:
+            selects[nombre] = list(dict.fromkeys(sentencias))
+            continue
+        insignia = insignia_sql(sentencias)
+        if insignia:
+            etiquetas[nombre] = f"{etiquetas.get(nombre, nombre)}\\n[{insignia}]"
+
+    # Llamadas entre grupos en el orden original, sumando multiplicidades; la raíz primero
+    constructor = ConstructorGrafo()
+    constructor.agregar_parrafo(nombre_grupo[grupo[raiz]])
+    marcados = set(visibles)
+    for i in [raiz] + [i for i in grafo.orden_claves if i in marcados and i != raiz]:
+        origen = nombre_grupo[grupo[i]]
+        constructor.agregar_parrafo(origen)
+        for d, veces in grafo.llamadas_con_multiplicidad(i):
+            destino = nombre_grupo[grupo[d]]
+            if destino != origen:
+                constructor.agregar_llamada(origen, destino, veces)
+    llamadas = constructor.construir()
+
+    tipos_nombre = {nombre_grupo[g]: tipo for g, tipo in tipos.items()}
+    nodos_resumen = llamadas.num_nodos + sum(len(v) for v in selects.values())
+    return ResumenGrafo(llamadas, selects, etiquetas, tipos_nombre, con_sql, pasos, nodos_original, nodos_resumen)
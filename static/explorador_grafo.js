@@ -0,0 +1,144 @@
+// Exploración por niveles del diagrama de jerarquía: se dibujan los primeros niveles y cada
+// clic en un párrafo despliega (o pliega) sus llamadas. El grafo completo llega una vez desde
+// el servidor (opciones.explorador, ya cacheado allí) con los fragmentos DOT de cada nodo;
+// cada despliegue arma en el navegador el DOT de lo visible y lo maqueta con RoadmapVisor,
+// de modo que el coste del layout depende de lo que hay en pantalla y no del programa.
+//
+// opciones.explorador = {
+//     cabecera: 'digraph {' con los atributos del grafo y de los nodos, aristas: 'edge [...]',
+//     raiz: id, niveles: K, nombres: [nombre], citados: [nombre citado para DOT],
+//     atributos: ['lista de atributos DOT del nodo'],
+//     hijos: [[[id destino, 'lista de atributos de la arista'], ...]],
+//     sql: [['líneas DOT de los nodos y aristas SQL del párrafo']]
+// }
+(function () {
+    function profundidades(datos) {
+        // Nivel de cada párrafo en anchura desde la raíz sobre el grafo completo
+        var nivel = new Int32Array(datos.nombres.length).fill(-1);
+        var cola = [datos.raiz];
+        nivel[datos.raiz] = 0;
+        for (var i = 0; i < cola.length; i++) {
+            var hijos = datos.hijos[cola[i]];
+            for (var j = 0; j < hijos.length; j++) {
+                if (nivel[hijos[j][0]] < 0) {
+                    nivel[hijos[j][0]] = nivel[cola[i]] + 1;
+                    cola.push(hijos[j][0]);
+                }
+            }
+        }
+        return nivel;
+    }
+
+    function fuenteDot(datos, abiertos) {
+        // Visibles: lo alcanzable desde la raíz pasando sólo por párrafos desplegados
+        var nivel = new Map([[datos.raiz, 0]]);
+        var cola = [datos.raiz];
+        for (var i = 0; i < cola.length; i++) {
+            if (!abiertos.has(cola[i])) {
+                continue;
+            }
+            var hijos = datos.hijos[cola[i]];
+            for (var j = 0; j < hijos.length; j++) {
+                if (!nivel.has(hijos[j][0])) {
+                    nivel.set(hijos[j][0], nivel.get(cola[i]) + 1);
+                    cola.push(hijos[j][0]);
+                }
+            }
+        }
+
+        var porNivel = [];
+        var aristas = [];
+        var sql = [];
+        cola.forEach(function (id) {
+            var hijos = datos.hijos[id];
+            var abierto = abiertos.has(id);
+            var ocultos = abierto ? 0 : datos.sql[id].length;
+            for (var j = 0; j < hijos.length; j++) {
+                if (nivel.has(hijos[j][0])) {
+                    aristas.push('\t\t' + datos.citados[id] + ' -> ' + datos.citados[hijos[j][0]] + ' [' + hijos[j][1] + ']');
+                } else {
+                    ocultos++;
+                }
+            }
+            // Párrafo plegado con llamadas ocultas: doble borde y '+N'
+            var atributos = datos.atributos[id];
+            if (ocultos) {
+                atributos += (atributos ? ' ' : '') + 'peripheries=2 xlabel="+' + ocultos + '"';
+            }
+            var linea = datos.citados[id] + (atributos ? ' [' + atributos + ']' : '');
+            (porNivel[nivel.get(id)] = porNivel[nivel.get(id)] || []).push('\t\t' + linea);
+            if (abierto) {
+                sql.push.apply(sql, datos.sql[id]);
+            }
+        });
+
+        var partes = [datos.cabecera];
+        porNivel.forEach(function (lineas) {
+            partes.push('\t{\n\t\trank=same\n' + lineas.join('\n') + '\n\t}');
+        });
+        if (aristas.length) {
+            partes.push('\t{\n\t\t' + datos.aristas + '\n' + aristas.join('\n') + '\n\t}');
+        }
+        sql.forEach(function (linea) {
+            partes.push('\t' + linea);
+        });
+        partes.push('}\n');
+        return partes.join('\n');
+    }
+
+    function iniciar(opciones, alPintar) {
+        var datos = opciones.explorador;
+        var ids = new Map(datos.nombres.map(function (nombre, id) { return [nombre, id]; }));
+        var nivel = profundidades(datos);
+        var abiertos = new Set();
+        for (var id = 0; id < nivel.length; id++) {
+            if (nivel[id] >= 0 && nivel[id] < datos.niveles - 1) {
+                abiertos.add(id);
+            }
+        }
+
+        function dibujar() {
+            opciones.dot = fuenteDot(datos, abiertos);
+            return RoadmapVisor.pintar(opciones).then(function (panZoom) {
+                alPintar(panZoom);
+                if (panZoom) {
+                    conectar(panZoom);
+                }
+                return panZoom;
+            });
+        }
+
+        function conectar(panZoom) {
+            // Clic (no arrastre del pan) sobre un párrafo: desplegar o plegar sus llamadas
+            var inicio = null;
+            var nodos = document.getElementById(opciones.contenedor).querySelectorAll('g.node');
+            Array.prototype.forEach.call(nodos, function (g) {
+                var titulo = g.querySelector('title');
+                var id = titulo ? ids.get(titulo.textContent) : undefined;
+                if (id === undefined || !(datos.hijos[id].length || datos.sql[id].length)) {
+                    return;
+                }
+                g.style.cursor = 'pointer';
+                g.addEventListener('mousedown', function (evento) {
+                    inicio = [evento.clientX, evento.clientY];
+                });
+                g.addEventListener('click', function (evento) {
+                    if (inicio && Math.abs(evento.clientX - inicio[0]) + Math.abs(evento.clientY - inicio[1]) > 4) {
+                        return;
+                    }
+                    if (abiertos.has(id)) {
+                        abiertos.delete(id);
+                    } else {
+                        abiertos.add(id);
+                    }
+                    panZoom.destroy();
+                    dibujar();
+                });
+            });
+        }
+
+        return dibujar();
+    }
+
+    window.RoadmapExplorador = { iniciar: iniciar, fuenteDot: fuenteDot };
+})();
@@ -0,0 +1,31 @@
+// Layout de grafos DOT fuera del hilo principal del navegador (Viz.js: Graphviz compilado a WebAssembly).
+// visor_grafo.js crea este worker una vez por visor y lo reutiliza entre reejecuciones de Streamlit.
+// Mensajes: {id, dot, motor, vendor} -> {id, svg} o {id, error}; 'vendor' es la URL absoluta
+// del directorio con viz.js y full.render.js (static/vendor o la CDN).
+var viz = null;
+var cargado = null;
+
+function crearViz() {
+    return new Viz({ Module: Module, render: render });
+}
+
+onmessage = function (evento) {
+    var peticion = evento.data;
+    try {
+        if (cargado !== peticion.vendor) {
+            importScripts(peticion.vendor + 'viz.js', peticion.vendor + 'full.render.js');
+            cargado = peticion.vendor;
+            viz = crearViz();
+        }
+    } catch (error) {
+        postMessage({ id: peticion.id, error: 'No se pudo cargar Viz.js desde ' + peticion.vendor + ': ' + error.message });
+        return;
+    }
+    viz.renderString(peticion.dot, { engine: peticion.motor || 'dot', format: 'svg' }).then(function (svg) {
+        postMessage({ id: peticion.id, svg: svg });
+    }).catch(function (error) {
+        // Tras un error la instancia de Viz.js queda inservible: se crea otra
+        viz = crearViz();
+        postMessage({ id: peticion.id, error: String((error && error.message) || error) });
+    });
+};
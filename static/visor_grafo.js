@@ -0,0 +1,126 @@
+// Visor de grafos DOT de RoadMap para los componentes HTML de Streamlit.
+// Cada reejecución de Streamlit crea un iframe nuevo; el worker de layout (render_worker.js)
+// se crea en la ventana de Streamlit, una vez por visor, y se reutiliza entre iframes.
+// visor_grafos.py inserta este archivo en el HTML junto con el código del worker (RoadmapVisorWorker).
+// Con el render en el servidor llega el SVG ya dibujado y comprimido con gzip (opciones.svgz, base64)
+// y no se usa el worker.
+(function () {
+    var contador = 0;
+
+    function anfitrion() {
+        // La ventana de Streamlit sobrevive a los iframes; si no es accesible se usa el propio iframe
+        try {
+            if (window.parent !== window && window.parent.Worker && window.parent.document) {
+                return window.parent;
+            }
+        } catch (e) {}
+        return window;
+    }
+
+    function trabajador(visor) {
+        var ventana = anfitrion();
+        var registro = ventana.__roadmapVisores || (ventana.__roadmapVisores = {});
+        if (!registro[visor]) {
+            // Worker creado desde la ventana de Streamlit para que no muera con este iframe
+            var codigo = new ventana.Blob([window.RoadmapVisorWorker], { type: 'text/javascript' });
+            registro[visor] = new ventana.Worker(ventana.URL.createObjectURL(codigo));
+        }
+        return { registro: registro, worker: registro[visor] };
+    }
+
+    function descomprimir(base64) {
+        if (typeof DecompressionStream === 'undefined') {
+            return Promise.reject(new Error('El navegador no admite DecompressionStream: desactiva el render en el servidor'));
+        }
+        var binario = atob(base64);
+        var bytes = new Uint8Array(binario.length);
+        for (var i = 0; i < binario.length; i++) {
+            bytes[i] = binario.charCodeAt(i);
+        }
+        return new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'))).text();
+    }
+
+    function maquetar(opciones) {
+        var t = trabajador(opciones.visor);
+        var id = opciones.visor + '-' + Date.now().toString(36) + '-' + (contador++) + '-' + Math.random().toString(36).slice(2);
+        // URL absoluta: el worker (blob:) no puede resolver rutas relativas a la aplicación
+        var vendor = new URL(opciones.vendor, document.baseURI).href;
+
+        return new Promise(function (resolver, rechazar) {
+            var pendiente = true;
+            function terminar() {
+                pendiente = false;
+                t.worker.removeEventListener('message', alRecibir);
+                t.worker.removeEventListener('error', alFallar);
+            }
+            function alRecibir(evento) {
+                if (evento.data.id !== id) {
+                    return;
+                }
+                terminar();
+                if (evento.data.error) {
+                    rechazar(new Error(evento.data.error));
+                } else {
+                    resolver(evento.data.svg);
+                }
+            }
+            function alFallar(evento) {
+                terminar();
+                delete t.registro[opciones.visor];
+                rechazar(new Error(evento.message || 'Error en el worker de Viz.js'));
+            }
+            t.worker.addEventListener('message', alRecibir);
+            t.worker.addEventListener('error', alFallar);
+            // Si Streamlit sustituye este iframe con el layout a medias se descarta el worker,
+            // para que el diagrama siguiente no espere a uno que ya no se va a mostrar
+            window.addEventListener('pagehide', function () {
+                if (pendiente) {
+                    terminar();
+                    if (t.registro[opciones.visor] === t.worker) {
+                        t.worker.terminate();
+                        delete t.registro[opciones.visor];
+                    }
+                }
+            });
+            t.worker.postMessage({ id: id, dot: opciones.dot, motor: opciones.motor || 'dot', vendor: vendor });
+        });
+    }
+
+    function pintar(opciones) {
+        var contenedor = document.getElementById(opciones.contenedor);
+        contenedor.innerHTML = '<p style="padding:20px; color:#666;">Calculando el diagrama...</p>';
+        var svg = opciones.svgz ? descomprimir(opciones.svgz) : maquetar(opciones);
+        return svg.then(function (svgTexto) {
+            contenedor.innerHTML = svgTexto;
+            var svg = contenedor.querySelector('svg');
+            svg.setAttribute('width', '100%');
+            svg.setAttribute('height', '100%');
+            svg.style.background = 'white';
+            var ajustes = {
+                zoomEnabled: true,
+                controlIconsEnabled: false,
+                fit: true,
+                center: true,
+                minZoom: 0.05,
+                maxZoom: 20,
+                zoomScaleSensitivity: 0.3
+            };
+            for (var clave in (opciones.zoom || {})) {
+                ajustes[clave] = opciones.zoom[clave];
+            }
+            var panZoom = svgPanZoom(svg, ajustes);
+            // Ajustar zoom inicial para ver todo
+            setTimeout(function () {
+                panZoom.fit();
+                panZoom.center();
+            }, 100);
+            return panZoom;
+        }).catch(function (error) {
+            console.error('Error del visor:', error);
+            contenedor.innerHTML = '<p style="color:red; padding:20px;">Error renderizando diagrama</p>';
+            return null;
+        });
+    }
+
+    window.RoadmapVisor = { pintar: pintar };
+})();
@@ -1,214 +1,429 @@
 import streamlit as st
 import os
 import json
-import re
 from graphviz import Digraph
 from io import StringIO
-import tempfile
 import zipfile
 import importlib.util
 from collections import defaultdict
 import importlib
+import hashlib
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from perfilador import Perfilador, perfilar, fase
+from escritor_dot import EscritorDot, citar, lista_atributos
+from resumen_grafo import resumir_grafo, PRESUPUESTO_DEFECTO
+from visor_grafos import html_visor
+from cache_render import CacheRender, renderizar_svg, MOTOR_PYTHON
+from parrafos_muertos import informe_programa, escribir_csv
 
 # Importar analizadores finales sin ejecutar sus mains
-# Recargar módulos cada vez para reflejar cambios en RoadMap.08.py y RoadMapCalls.05.py
+# Los módulos se cargan una vez y sólo se recargan si cambia el mtime de RoadMap.08.py / RoadMapCalls.05.py
+@st.cache_resource(show_spinner=False)
+def _cargar_modulo(nombre, ruta, mtime_ns):
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def cargar_modulo(nombre, archivo):
+    ruta = os.path.join(os.path.dirname(__file__), archivo)
+    return _cargar_modulo(nombre, ruta, os.stat(ruta).st_mtime_ns)
+
 def load_roadmap08():
-    spec_rm = importlib.util.spec_from_file_location("roadmap08", os.path.join(os.path.dirname(__file__), "RoadMap.08.py"))
-    roadmap08 = importlib.util.module_from_spec(spec_rm)
-    spec_rm.loader.exec_module(roadmap08)
-    return roadmap08
+    return cargar_modulo("roadmap08", "RoadMap.08.py")
 
 def load_roadmapcalls05():
-    spec_calls = importlib.util.spec_from_file_location("roadmapcalls05", os.path.join(os.path.dirname(__file__), "RoadMapCalls.05.py"))
-    roadmapcalls05 = importlib.util.module_from_spec(spec_calls)
-    spec_calls.loader.exec_module(roadmapcalls05)
-    return roadmapcalls05
+    return cargar_modulo("roadmapcalls05", "RoadMapCalls.05.py")
 
 roadmap08 = load_roadmap08()
 roadmapcalls05 = load_roadmapcalls05()
 
+# Módulos del análisis de jerarquía: cambiar cualquiera invalida los resultados cacheados
+MODULOS_ANALISIS = ("RoadMap.08.py", "motor_cobol.py", "grafo_parrafos.py", "parrafos_muertos.py", "fuentes_cobol.py")
+
+def version_analisis():
+    """Clave de versión para st.cache_data: VERSION_ANALIZADOR y mtime de cada módulo del motor."""
+    directorio = os.path.dirname(__file__)
+    return (roadmap08.VERSION_ANALIZADOR,) + tuple(
+        os.stat(os.path.join(directorio, modulo)).st_mtime_ns for modulo in MODULOS_ANALISIS)
+
 st.set_page_config(page_title="COBOL RoadMap Analyzer", layout="wide")
 st.title("COBOL RoadMap Analyzer")
 st.caption("Visualiza jerarquía de párrafos/SQL y llamadas entre programas.")
 
+with st.sidebar:
+    perfilar_analisis = st.checkbox("Perfilar análisis", value=False,
+                                    help="Mide tiempo, llamadas y bytes por fase (lectura, clasificación, SQL, grafo, DOT) "
+                                         "con una pasada sin cachés, y permite descargar el informe JSON y las pilas plegadas para flamegraph.")
+    render_servidor = st.checkbox("Render en el servidor (SVG)", value=False,
+                                  help="Dibuja el diagrama en el servidor (Graphviz o, sin él, un maquetador en Python) "
+                                       "una vez por DOT y envía el SVG comprimido: al recargar o cambiar de pestaña "
+                                       "aparece al instante y el navegador no calcula el layout.")
+
+@st.cache_resource(show_spinner=False)
+def cache_render_app():
+    return CacheRender()
+
+@st.cache_data(show_spinner="Renderizando el diagrama en el servidor...", max_entries=64)
+def svg_servidor(fuente_dot):
+    # En memoria por DOT (st.cache_data) y en disco con la caché de renders, que sobrevive a reinicios
+    return renderizar_svg(fuente_dot, cache_render_app(), timeout=120)
+
+def mostrar_visor(fuente_dot, visor, variable, contenedor, zoom=None, explorador=None):
+    """
+    Visor interactivo: layout en el navegador (Web Worker) o SVG renderizado en el servidor.
+    Con explorador, exploración por niveles (siempre en el navegador: cada despliegue es un layout nuevo).
+    """
+    svg_gzip = None
+    if render_servidor and explorador is None:
+        svg_gzip, motor, _ = svg_servidor(fuente_dot)
+        st.caption(f"SVG renderizado en el servidor con {'Graphviz' if motor != MOTOR_PYTHON else 'el maquetador Python (sin Graphviz)'}"
+                   f" · {len(svg_gzip) / 1024:.0f} KB comprimido")
+    viewer_html = html_visor(fuente_dot, visor, variable, contenedor, zoom=zoom,
+                             servir_local=st.get_option('server.enableStaticServing'), svg_gzip=svg_gzip,
+                             explorador=explorador)
+    st.components.v1.html(viewer_html, height=1000, scrolling=False)
+
+def mostrar_perfil(perfil, nombre):
+    """Tabla de fases del perfil y descargas del informe JSON y de las pilas plegadas."""
+    informe = perfil.informe()
+    with st.expander(f"⏱️ Perfil de fases ({informe['segundos_totales'] * 1000:.0f} ms)", expanded=True):
+        st.dataframe([{'Fase': '\u2003' * f['nivel'] + f['nombre'], 'Total ms': round(f['segundos'] * 1000, 1),
+                       'Propio ms': round(f['segundos_propios'] * 1000, 1), 'Llamadas': f['llamadas'],
+                       'Bytes': f['bytes'], 'MB/s': f['mb_por_segundo']} for f in informe['fases']],
+                     use_container_width=True, hide_index=True)
+        st.caption("El render del diagrama (en el navegador con Viz.js, o en el servidor con su caché) no se incluye en el perfil.")
+        col_json, col_folded = st.columns(2)
+        with col_json:
+            st.download_button("Descargar perfil JSON", json.dumps(informe, indent=2),
+                               file_name=f"{nombre}_perfil.json", mime="application/json")
+        with col_folded:
+            st.download_button("Descargar pilas plegadas (flamegraph)", perfil.pilas_plegadas(),
+                               file_name=f"{nombre}_perfil.folded", mime="text/plain")
+
 mode = st.tabs(["Jerarquía de párrafos", "Llamadas entre programas"])
 
 # --- Tab 1: Jerarquía de párrafos (RoadMap.08) ---
 with mode[0]:
     st.markdown("Analiza la jerarquía de llamadas entre párrafos y las tablas DB2 utilizadas.")
     uploaded = st.file_uploader("Sube un archivo COBOL (.cob/.txt)", type=["cob", "txt"])
-    col1, col2, col3 = st.columns([2,1,1])
+    col1, col2, col3, col4 = st.columns([2,1,1,1])
     with col1:
         parrafo_inicio = st.text_input("Párrafo inicial (opcional)", value="")
     with col2:
         analizar_sql = st.checkbox("Incluir tablas DB2", value=True)
     with col3:
         orientacion = st.selectbox("Orientación", ["Horizontal", "Vertical"], index=0, help="Horizontal (LR) para árboles profundos, Vertical (TB) para árboles anchos")
+    with col4:
+        presupuesto_nodos = st.number_input("Nodos máximos del diagrama", min_value=20, value=PRESUPUESTO_DEFECTO, step=50,
+                                            help="Por encima se resume el diagrama (SQL en insignias, ciclos, cadenas y niveles profundos plegados); el DOT completo sigue descargable")
     
+    col5, col6 = st.columns([1, 1])
+    with col5:
+        explorar = st.checkbox("Exploración por niveles", value=False,
+                               help="Muestra sólo los primeros niveles; un clic en un párrafo despliega o pliega sus llamadas "
+                                    "sin volver a analizar ni a generar el diagrama completo")
+    with col6:
+        niveles_iniciales = st.number_input("Niveles iniciales", min_value=1, value=3, step=1, disabled=not explorar)
+
     run_btn = st.button("Analizar jerarquía", type="primary") 
 
-    def build_graph(diccionario, selects_por_parrafo, analizar_sql=False, orientacion='LR'):
-        dot = Digraph(comment='Llamadas COBOL', format='png', engine='dot')
+    @st.cache_data(show_spinner="Analizando programa...", max_entries=32)
+    def analizar_jerarquia(hash_fuente, _contenido, analizar_sql, version_modulo):
+        """
+        Análisis completo (sin párrafo inicial) de un fuente, cacheado por hash del contenido
+        y opciones. Devuelve datos serializables: llamadas repetidas según su multiplicidad.
+        """
+        # Se analiza directamente desde memoria; debajo, la caché persistente evita
+        # reanalizar el mismo fuente entre reinicios
+        dicc, sql_blocks, selects = roadmap08.analizar_cobol_cache(_contenido, None, analizar_sql, roadmap08.CacheAnalisis(), _contenido)
+        return roadmap08.GrafoParrafos.desde_diccionario(dicc).a_diccionario(con_multiplicidad=True), sql_blocks, selects
+
+    @st.cache_data(show_spinner=False, max_entries=32)
+    def parrafos_muertos_programa(hash_fuente, _contenido, entradas, programa, version_modulo):
+        """
+        Párrafos inalcanzables del programa completo (no depende del párrafo inicial);
+        sólo se recalcula si cambian el fuente o las entradas adicionales.
+        """
+        return informe_programa(_contenido, entradas, programa)
+
+    @st.cache_data(show_spinner=False, max_entries=128)
+    def jerarquia_desde_parrafo(hash_fuente, _contenido, analizar_sql, pi, version_modulo):
+        """
+        Resultado restringido al párrafo inicial y con las sentencias SQL agrupadas;
+        cambiar el párrafo inicial reutiliza el análisis completo cacheado.
+        """
+        dicc, sql_blocks, selects = analizar_jerarquia(hash_fuente, _contenido, analizar_sql, version_modulo)
+        dicc, selects = roadmap08.aplicar_parrafo_inicio(roadmap08.GrafoParrafos.desde_diccionario(dicc), selects, pi)
+        # Si se analiza SQL, computar frecuencias por párrafo y etiquetar con (xN)
+        if analizar_sql and isinstance(selects, dict):
+            from collections import Counter
+            selects_counted = {}
+            for k, v in selects.items():
+                cnt = Counter(v)
+                selects_counted[k] = [f"{stmt} (x{n})" for stmt, n in sorted(cnt.items())]
+            selects = selects_counted
+        # Deduplicar sentencias SQL por párrafo para reducir repeticiones visuales
+        if analizar_sql and isinstance(selects, dict):
+            selects = {k: sorted(list(set(v))) for k, v in selects.items()}
+        return roadmap08.GrafoParrafos.desde_diccionario(dicc).a_diccionario(con_multiplicidad=True), sql_blocks, selects
+
+    # Estilo de los grupos del diagrama resumido (resumen_grafo.py)
+    ESTILO_GRUPO = {
+        'ciclo': {'shape': 'box3d', 'fillcolor': '#F4CCCC'},
+        'cadena': {'style': 'filled,rounded'},
+        'plegado': {'shape': 'folder', 'fillcolor': '#EEEEEE'},
+    }
+
+    # Atributos por defecto de las aristas de llamada entre párrafos
+    ATRIBUTOS_LLAMADA = {'color': 'blue', 'style': 'solid', 'arrowsize': '0.5'}
+
+    def iniciar_grafo(salida, orientacion):
+        # DOT escrito en flujo (escritor_dot.py): los atributos comunes van una vez como valores por defecto
+        dot = EscritorDot(salida, comentario='Llamadas COBOL')
         rankdir = 'LR' if orientacion == 'Horizontal' else 'TB'
-        dot.attr(dpi='300', rankdir=rankdir, nodesep='0.6', ranksep='1.2', bgcolor='white')
-        dot.attr('node', shape='box', style='filled', fillcolor='#E3F2FD', fontname='Helvetica', fontsize='11', fontcolor='black', color='black')
-
-        visitados = set()
-        niveles = {}
-        contador = [1]
-        orden_llamadas = {}
-
-        def asignar_niveles(nodo, nivel=0):
-            if nodo in visitados:
-                return
-            visitados.add(nodo)
-            niveles[nodo] = nivel
-            for hijo in diccionario.get(nodo, []):
-                orden_llamadas[(nodo, hijo)] = contador[0]
-                contador[0] += 1
-                asignar_niveles(hijo, nivel + 1)
+        dot.atributos_grafo(dpi='300', rankdir=rankdir, nodesep='0.6', ranksep='1.2', bgcolor='white')
+        dot.atributos_nodo(shape='box', style='filled', fillcolor='#E3F2FD', fontname='Helvetica', fontsize='11', fontcolor='black', color='black')
+        return dot
+
+    def estilo_sql(sentencia):
+        """Forma, relleno y color de la arista del nodo de una sentencia SQL según su tipo."""
+        tipo = sentencia.split()[0].upper()
+        if tipo == 'SELECT' or 'OPEN' in tipo or 'FETCH' in tipo:
+            return 'cylinder', '#9FC5E8', '#3D85C6'  # azul claro
+        if tipo in ('INSERT', 'UPDATE', 'DELETE'):
+            return 'component', '#F6B26B', '#E69138'  # naranja claro
+        return 'note', '#FFD966', 'orange'  # amarillo para otros (COMMIT/ROLLBACK/CLOSE)
+
+    def etiqueta_llamada(numero, veces):
+        return str(numero) if veces == 1 else f"{numero} (x{veces})"
+
+    def build_graph(diccionario, selects_por_parrafo, analizar_sql=False, orientacion='LR', resumen=None):
+        salida = StringIO()
+        dot = iniciar_grafo(salida, orientacion)
+
+        # Recorrido sobre los ids enteros del grafo compacto de RoadMap.08
+        grafo = roadmap08.GrafoParrafos.desde_diccionario(diccionario)
+        nombres = grafo.nombres
 
         nodo_raiz = '__START__'
-        if nodo_raiz not in diccionario and diccionario:
-            nodo_raiz = next(iter(diccionario))
-        asignar_niveles(nodo_raiz)
+        if nodo_raiz not in grafo and grafo:
+            nodo_raiz = next(iter(grafo))
+        if nodo_raiz in grafo:
+            niveles, orden_llamadas = grafo.recorrido_niveles(grafo.ids[nodo_raiz])
+            # Capas por camino más largo con los ciclos condensados (no dependen del orden de visita)
+            rango, _ = grafo.rangos_condensados(grafo.ids[nodo_raiz])
+        else:
+            niveles, orden_llamadas = {}, []
 
         niveles_invertido = {}
-        for nodo, nivel in niveles.items():
-            niveles_invertido.setdefault(nivel, []).append(nodo)
+        for nodo in niveles:
+            niveles_invertido.setdefault(rango[nodo], []).append(nombres[nodo])
+        if not niveles:
+            niveles_invertido[0] = [nodo_raiz]
 
         for nivel in sorted(niveles_invertido):
-            with dot.subgraph() as s:
-                s.attr(rank='same')
+            with dot.subgrafo(rank='same'):
                 for nodo in niveles_invertido[nivel]:
-                    color = '#E3F2FD'  # azul muy claro
-                    if analizar_sql and nodo in selects_por_parrafo:
-                        color = '#C8E6C9'  # verde muy claro
-                    s.node(nodo, style='filled', fillcolor=color, fontcolor='black', color='black')
+                    atributos = {}
+                    if analizar_sql and (nodo in selects_por_parrafo or (resumen and nodo in resumen.con_sql)):
+                        atributos['fillcolor'] = '#C8E6C9'  # verde muy claro (azul muy claro por defecto)
+                    if resumen:
+                        atributos.update(ESTILO_GRUPO.get(resumen.tipos.get(nodo), {}))
+                        atributos['label'] = resumen.etiquetas.get(nodo)
+                    dot.nodo(nodo, **atributos)
 
-        for (origen, destino), numero in orden_llamadas.items():
-            dot.edge(origen, destino, color='blue', style='solid', arrowsize='0.5', label=str(numero))
+        if orden_llamadas:
+            with dot.subgrafo():
+                dot.atributos_arista(**ATRIBUTOS_LLAMADA)
+                for origen, destino, numero, veces in orden_llamadas:
+                    dot.arista(nombres[origen], nombres[destino], label=etiqueta_llamada(numero, veces))
 
         if analizar_sql:
             for parrafo, selects in selects_por_parrafo.items():
                 for idx, sel in enumerate(selects):
                     nodo_select = f"{parrafo}_SQL_{idx+1}"
-                    # Estilizar según tipo SQL
-                    tipo = sel.split()[0].upper()
-                    if tipo == 'SELECT' or 'OPEN' in tipo or 'FETCH' in tipo:
-                        fill = '#9FC5E8'  # azul claro
-                        shape = 'cylinder'
-                        edge_color = '#3D85C6'
-                    elif tipo in ('INSERT', 'UPDATE', 'DELETE'):
-                        fill = '#F6B26B'  # naranja claro
-                        shape = 'component'
-                        edge_color = '#E69138'
-                    else:
-                        fill = '#FFD966'  # amarillo para otros (COMMIT/ROLLBACK/CLOSE)
-                        shape = 'note'
-                        edge_color = 'orange'
-                    dot.node(nodo_select, label=sel, shape=shape, style='filled', fillcolor=fill, fontcolor='black')
-                    dot.edge(parrafo, nodo_select, style='dashed', color=edge_color)
+                    shape, fill, edge_color = estilo_sql(sel)
+                    dot.nodo(nodo_select, etiqueta=sel, shape=shape, fillcolor=fill)
+                    dot.arista(parrafo, nodo_select, style='dashed', color=edge_color)
 
-        return dot
+        dot.cerrar()
+        return salida.getvalue()
+
+    def datos_explorador(diccionario, selects_por_parrafo, analizar_sql=False, orientacion='LR'):
+        """
+        Grafo para la exploración por niveles (static/explorador_grafo.js): los párrafos
+        alcanzables desde la raíz, en orden de visita, con los fragmentos DOT de cada nodo,
+        de sus llamadas y de sus sentencias SQL, con los mismos estilos que build_graph.
+        El navegador arma con ellos el DOT de lo que está desplegado.
+        """
+        grafo = roadmap08.GrafoParrafos.desde_diccionario(diccionario)
+        nodo_raiz = '__START__'
+        if nodo_raiz not in grafo and grafo:
+            nodo_raiz = next(iter(grafo))
+        if nodo_raiz not in grafo:
+            return None
+        niveles, orden_llamadas = grafo.recorrido_niveles(grafo.ids[nodo_raiz])
+        ids = {nodo: i for i, nodo in enumerate(niveles)}
+        nombres = [grafo.nombres[nodo] for nodo in niveles]
+
+        hijos = [[] for _ in nombres]
+        for origen, destino, numero, veces in orden_llamadas:
+            hijos[ids[origen]].append([ids[destino], lista_atributos({'label': etiqueta_llamada(numero, veces)})])
+        atributos = []
+        sql = []
+        for nombre in nombres:
+            sentencias = selects_por_parrafo.get(nombre, []) if analizar_sql else []
+            atributos.append(lista_atributos({'fillcolor': '#C8E6C9'}) if sentencias else '')
+            lineas = []
+            for idx, sel in enumerate(sentencias):
+                nodo_select = citar(f"{nombre}_SQL_{idx+1}")
+                shape, fill, edge_color = estilo_sql(sel)
+                lineas.append(f"{nodo_select} [{lista_atributos({'label': sel, 'shape': shape, 'fillcolor': fill})}]")
+                lineas.append(f"{citar(nombre)} -> {nodo_select} [{lista_atributos({'style': 'dashed', 'color': edge_color})}]")
+            sql.append(lineas)
+
+        cabecera = StringIO()
+        iniciar_grafo(cabecera, orientacion)
+        return {
+            'cabecera': cabecera.getvalue().rstrip('\n'),
+            'aristas': f"edge [{lista_atributos(ATRIBUTOS_LLAMADA)}]",
+            'raiz': 0,
+            'nombres': nombres,
+            'citados': [citar(nombre) for nombre in nombres],
+            'atributos': atributos,
+            'hijos': hijos,
+            'sql': sql,
+        }
+
+    @st.cache_data(show_spinner=False, max_entries=32)
+    def explorador_jerarquia(hash_fuente, _contenido, analizar_sql, pi, orientacion, version_modulo):
+        """Grafo de la exploración por niveles, desde el análisis ya cacheado."""
+        dicc, _, selects = jerarquia_desde_parrafo(hash_fuente, _contenido, analizar_sql, pi, version_modulo)
+        return datos_explorador(dicc, selects, analizar_sql, orientacion)
 
     def build_tree_text(diccionario, selects_por_parrafo):
         buf = StringIO()
         roadmap08.imprimir_arbol_llamadas(diccionario, selects_por_parrafo, archivo=buf)
         return buf.getvalue()
 
+    def perfilar_jerarquia(contenido, analizar_sql, pi, orientacion, presupuesto):
+        """
+        Pasada completa sin cachés (ni la de Streamlit ni la persistente) midiendo cada fase,
+        para ver dónde va el tiempo con el fuente subido.
+        """
+        with perfilar() as perfil:
+            with fase('analisis'):
+                dicc, _, selects = roadmap08.analizar_cobol(contenido, None, analizar_sql)
+                dicc, selects = roadmap08.aplicar_parrafo_inicio(dicc, selects, pi)
+            with fase('jerarquia'):
+                build_tree_text(dicc, selects)
+            with fase('dot') as f:
+                f.bytes = len(build_graph(dicc, selects, analizar_sql, orientacion))
+            with fase('resumen'):
+                resumen = resumir_grafo(roadmap08.GrafoParrafos.desde_diccionario(dicc), selects, analizar_sql, presupuesto)
+            if resumen is not None:
+                with fase('dot_resumen') as f:
+                    f.bytes = len(build_graph(resumen.llamadas, resumen.selects, analizar_sql, orientacion, resumen))
+        return perfil
+
+    # El análisis queda activo tras pulsar el botón: cambiar la orientación o el párrafo
+    # inicial vuelve a pintar desde los resultados cacheados sin reanalizar el fuente
     if run_btn and uploaded is not None:
-        # Recargar el módulo para obtener los últimos cambios
+        st.session_state['jerarquia_activa'] = True
+    if uploaded is None:
+        st.session_state['jerarquia_activa'] = False
+
+    if st.session_state.get('jerarquia_activa') and uploaded is not None:
+        # Recargar el módulo sólo si RoadMap.08.py cambió
         roadmap08 = load_roadmap08()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".cob") as tmp:
-            tmp.write(uploaded.getvalue())
-            tmp_path = tmp.name
-        try:
-            pi = parrafo_inicio.strip() or None
-            dicc, sql_blocks, selects = roadmap08.analizar_cobol(tmp_path, pi, analizar_sql)
-            # Si se analiza SQL, computar frecuencias por párrafo y etiquetar con (xN)
-            if analizar_sql and isinstance(selects, dict):
-                from collections import Counter
-                selects_counted = {}
-                for k, v in selects.items():
-                    cnt = Counter(v)
-                    selects_counted[k] = [f"{stmt} (x{n})" for stmt, n in sorted(cnt.items())]
-                selects = selects_counted
-            # Deduplicar sentencias SQL por párrafo para reducir repeticiones visuales
-            if analizar_sql and isinstance(selects, dict):
-                selects = {k: sorted(list(set(v))) for k, v in selects.items()}
-
-            st.subheader("Jerarquía (texto)")
-            tree_text = build_tree_text(dicc, selects)
-            st.code(tree_text, language="text")
-
-            st.subheader("Diagrama de jerarquía (zoom con rueda del ratón, arrastrar para mover)")
-            dot = build_graph(dicc, selects, analizar_sql, orientacion)
-
-            # Visor interactivo con zoom y pan
-            dot_escaped = json.dumps(dot.source)
-            viewer_html = f'''
-            <div style="border:1px solid #444; border-radius:8px; background:#fff; margin-bottom:10px;">
-                <div style="padding:8px; background:#f0f0f0; border-bottom:1px solid #ddd; border-radius:8px 8px 0 0;">
-                    <button onclick="panZoomInstance.zoomIn()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➕ Zoom In</button>
-                    <button onclick="panZoomInstance.zoomOut()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➖ Zoom Out</button>
-                    <button onclick="panZoomInstance.fit(); panZoomInstance.center();" style="padding:5px 15px; margin-right:5px; cursor:pointer;">🔄 Reset</button>
-                    <button onclick="panZoomInstance.zoom(0.5); panZoomInstance.center();" style="padding:5px 15px; cursor:pointer;">📐 Alejar</button>
-                </div>
-                <div id="graph-container" style="width:100%; height:100vh; overflow:hidden;"></div>
-            </div>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/viz.js/2.1.2/viz.js"></script>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/viz.js/2.1.2/full.render.js"></script>
-            <script src="https://cdn.jsdelivr.net/npm/svg-pan-zoom@3.6.1/dist/svg-pan-zoom.min.js"></script>
-            <script>
-                var panZoomInstance = null;
-                (function() {{
-                    var dotSrc = {dot_escaped};
-                    var viz = new Viz();
-                    viz.renderSVGElement(dotSrc).then(function(svg) {{
-                        var container = document.getElementById('graph-container');
-                        container.innerHTML = '';
-                        svg.setAttribute('width', '100%');
-                        svg.setAttribute('height', '100%');
-                        svg.style.background = 'white';
-                        container.appendChild(svg);
-                        panZoomInstance = svgPanZoom(svg, {{
-                            zoomEnabled: true,
-                            controlIconsEnabled: false,
-                            fit: true,
-                            center: true,
-                            minZoom: 0.05,
-                            maxZoom: 20,
-                            zoomScaleSensitivity: 0.3
-                        }});
-                        // Ajustar zoom inicial para ver todo
-                        setTimeout(function() {{
-                            panZoomInstance.fit();
-                            panZoomInstance.center();
-                        }}, 100);
-                    }}).catch(function(err) {{
-                        console.error('Viz.js error:', err);
-                        document.getElementById('graph-container').innerHTML = '<p style="color:red; padding:20px;">Error renderizando diagrama</p>';
-                    }});
-                }})();
-            </script>
-            '''
-            st.components.v1.html(viewer_html, height=1000, scrolling=False)
-
-            # Descargar DOT
+        contenido = uploaded.getvalue()
+        hash_fuente = hashlib.sha256(contenido).hexdigest()
+        version_modulo = version_analisis()
+        pi = parrafo_inicio.strip() or None
+        dicc, sql_blocks, selects = jerarquia_desde_parrafo(hash_fuente, contenido, analizar_sql, pi, version_modulo)
+        dicc = roadmap08.GrafoParrafos.desde_diccionario(dicc)
+
+        st.subheader("Jerarquía (texto)")
+        tree_text = build_tree_text(dicc, selects)
+        st.code(tree_text, language="text")
+
+        ciclos = roadmap08.ciclos_perform(dicc)
+        if ciclos:
+            with st.expander(f"🔁 Ciclos de PERFORM ({len(ciclos)})"):
+                st.caption("Párrafos que se llaman entre sí (recursión directa o indirecta); en el diagrama comparten nivel.")
+                for ciclo in ciclos:
+                    st.write(" ↔ ".join(ciclo))
+
+        # Las entradas adicionales se leen del estado antes de dibujar su campo para titular el panel
+        entradas_extra = tuple(e for e in st.session_state.get('entradas_muertos', '').split(',') if e.strip())
+        programa = os.path.splitext(uploaded.name)[0]
+        muertos = parrafos_muertos_programa(hash_fuente, contenido, entradas_extra, programa, version_modulo)
+        with st.expander(f"🪦 Párrafos inalcanzables ({len(muertos.muertos)} de {muertos.parrafos}, "
+                         f"{muertos.lineas_muertas} de {muertos.lineas} líneas)"):
+            st.text_input("Entradas adicionales (separadas por comas)", key='entradas_muertos',
+                          help="Párrafos a los que se llega desde fuera del programa, además del inicio de la "
+                               "PROCEDURE DIVISION y de los ENTRY / USE declarados")
+            st.caption(f"Alcanzables desde {', '.join(muertos.entradas) or '—'} siguiendo PERFORM, PERFORM ... THRU, "
+                       "secciones y GO TO, en todo el programa (sin tener en cuenta el párrafo inicial).")
+            if muertos.ignoradas:
+                st.warning(f"No son párrafos del programa: {', '.join(muertos.ignoradas)}")
+            if muertos.muertos:
+                st.dataframe([{"Párrafo": parrafo, "Líneas": lineas} for parrafo, lineas in muertos.muertos],
+                             use_container_width=True, hide_index=True)
+                salida_csv = StringIO()
+                escribir_csv([muertos], salida_csv)
+                st.download_button("📄 Descargar CSV", data=salida_csv.getvalue(),
+                                   file_name=f"{programa}_muertos.csv", mime="text/csv")
+            else:
+                st.success("Todos los párrafos son alcanzables.")
+
+        st.subheader("Diagrama de jerarquía (zoom con rueda del ratón, arrastrar para mover)")
+        fuente_dot = build_graph(dicc, selects, analizar_sql, orientacion)
+        # Por encima del presupuesto el navegador recibe el diagrama resumido
+        # En la exploración por niveles el navegador sólo maqueta lo desplegado: no hace falta resumir
+        explorador = explorador_jerarquia(hash_fuente, contenido, analizar_sql, pi, orientacion, version_modulo) if explorar else None
+        resumen = None if explorador else resumir_grafo(dicc, selects, analizar_sql, presupuesto_nodos)
+        if resumen is None:
+            fuente_visor = fuente_dot
+        else:
+            fuente_visor = build_graph(resumen.llamadas, resumen.selects, analizar_sql, orientacion, resumen)
+            st.info(f"Diagrama resumido: {resumen.nodos_original} → {resumen.nodos_resumen} nodos "
+                    f"({'; '.join(resumen.pasos)}). El DOT completo se puede descargar debajo del diagrama.")
+        if explorador:
+            explorador = dict(explorador, niveles=niveles_iniciales)
+            st.caption(f"Exploración por niveles ({len(explorador['nombres'])} párrafos): un clic en un párrafo con "
+                       "doble borde (+N llamadas ocultas) lo despliega y otro clic lo pliega.")
+
+        # Visor interactivo con zoom y pan (layout en un Web Worker con Viz.js, o SVG del servidor)
+        mostrar_visor(fuente_visor, 'jerarquia', 'panZoomInstance', 'graph-container', explorador=explorador)
+
+        # Descargar DOT (siempre con todo el detalle)
+        st.download_button(
+            label="📄 Descargar DOT" if resumen is None else "📄 Descargar DOT completo",
+            data=fuente_dot,
+            file_name="jerarquia_parrafos.dot",
+            mime="text/vnd.graphviz",
+            help="Abre en https://dreampuf.github.io/GraphvizOnline/ para exportar PNG/SVG"
+        )
+        if resumen is not None:
             st.download_button(
-                label="📄 Descargar DOT",
-                data=dot.source,
-                file_name="jerarquia_parrafos.dot",
+                label="📄 Descargar DOT resumido",
+                data=fuente_visor,
+                file_name="jerarquia_parrafos_resumen.dot",
                 mime="text/vnd.graphviz",
-                help="Abre en https://dreampuf.github.io/GraphvizOnline/ para exportar PNG/SVG"
             )
 
-            if analizar_sql:
-                st.info(f"Bloques EXEC SQL encontrados: {sql_blocks}")
+        if analizar_sql:
+            st.info(f"Bloques EXEC SQL encontrados: {sql_blocks}")
 
-        finally:
-            os.unlink(tmp_path)
+        if perfilar_analisis:
+            mostrar_perfil(perfilar_jerarquia(contenido, analizar_sql, pi, orientacion, presupuesto_nodos), "jerarquia")
+
+        stats = roadmap08.CacheAnalisis().estadisticas()
+        st.caption(f"Caché de análisis: {stats['aciertos']} aciertos, {stats['fallos']} fallos, "
+                   f"{stats['entradas']} entradas ({stats['bytes'] / 1024:.0f} KB)")
 
 # --- Tab 2: Llamadas entre programas - Estilo XPLAIN ---
 with mode[1]:
@@ -222,74 +437,38 @@ with mode[1]:
         """Extrae nombre del programa (primeros 6 chars del nombre de archivo sin extensión)"""
         return os.path.splitext(os.path.basename(filename))[0].upper()[:6]
 
+    # Extensiones de fuentes COBOL dentro de los zip e hilos para escanearlos
+    EXTENSIONES_COBOL = ('.cob', '.cbl', '.cobol', '.txt')
+    MAX_HILOS_ZIP = min(8, os.cpu_count() or 1)
+
     def detectar_calls_en_archivo(contenido):
-        """Detecta CALL y EXEC CICS LINK/START/INVOKE en contenido COBOL"""
-        calls = []
-        for linea in contenido.split('\n'):
-            linea_u = linea.upper()
-            # Ignorar comentarios
-            if len(linea_u) > 6 and linea_u[6] == '*':
-                continue
-            # CALL 'PROGRAMA' o CALL WS-VARIABLE
-            m = re.search(r"\sCALL\s+['\"]?([\w-]+)['\"]?", linea_u)
-            if m:
-                prog = m.group(1)
-                # Si tiene guión, tomar la segunda parte (nombre real, no prefijo de variable)
-                if '-' in prog:
-                    parts = prog.split('-')
-                    if len(parts) > 1:
-                        prog = parts[-1]  # última parte después del guión
-                if prog and len(prog) >= 4:
-                    calls.append(prog[:8])  # máximo 8 chars
-            # EXEC CICS LINK/START/INVOKE
-            m2 = re.search(r"EXEC\s+CICS\s+(?:LINK|START|INVOKE)\s+PROGRAM\s*\(['\"]?([\w-]+)['\"]?\)", linea_u)
-            if m2:
-                calls.append("CICS-" + m2.group(1)[:6])
-        return list(set(calls))
-
-    def extraer_tablas_db2(contenido):
-        """Extrae nombres de tablas/vistas DB2 desde sentencias EXEC SQL"""
-        tablas = {}  # tabla -> tipo de acceso (SELECT, INSERT, UPDATE, DELETE)
-        
-        # Unir líneas para manejar SQL multilínea
-        contenido_limpio = re.sub(r'\n\s{6}\*.*', '', contenido)  # quitar comentarios COBOL
-        
-        # Buscar SELECT ... FROM tabla
-        for m in re.finditer(r'SELECT\s+.*?\s+FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE | re.DOTALL):
-            tabla = m.group(1).upper()
-            if tabla not in ('DUAL', 'SYSIBM'):
-                tablas[tabla] = tablas.get(tabla, []) + ['SELECT']
-        
-        # Buscar INSERT INTO tabla
-        for m in re.finditer(r'INSERT\s+INTO\s+([\w]+)', contenido_limpio, re.IGNORECASE):
-            tabla = m.group(1).upper()
-            tablas[tabla] = tablas.get(tabla, []) + ['INSERT']
-        
-        # Buscar UPDATE tabla
-        for m in re.finditer(r'UPDATE\s+([\w]+)\s+SET', contenido_limpio, re.IGNORECASE):
-            tabla = m.group(1).upper()
-            tablas[tabla] = tablas.get(tabla, []) + ['UPDATE']
-        
-        # Buscar DELETE FROM tabla
-        for m in re.finditer(r'DELETE\s+FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE):
-            tabla = m.group(1).upper()
-            tablas[tabla] = tablas.get(tabla, []) + ['DELETE']
-        
-        # Buscar OPEN CURSOR ... FOR SELECT ... FROM tabla (cursores)
-        for m in re.finditer(r'DECLARE\s+([\w]+)\s+CURSOR.*?SELECT.*?FROM\s+([\w]+)', contenido_limpio, re.IGNORECASE | re.DOTALL):
-            tabla = m.group(2).upper()
-            tablas[tabla] = tablas.get(tabla, []) + ['CURSOR']
-        
-        # Consolidar tipos
-        resultado = {}
-        for tabla, tipos in tablas.items():
-            tipos_unicos = list(set(tipos))
-            if 'INSERT' in tipos_unicos or 'UPDATE' in tipos_unicos or 'DELETE' in tipos_unicos:
-                resultado[tabla] = 'WRITE'
-            else:
-                resultado[tabla] = 'READ'
-        
-        return resultado
+        """Detecta CALL y EXEC CICS LINK/START/INVOKE en contenido COBOL (texto, bytes o archivo binario) con el motor común"""
+        resultado = roadmap08.analizar_programa(contenido, parrafos=False, sql=False, calls=True)
+        return roadmap08.calls_xplain(resultado['calls'])
+
+    def llamantes_en_zip(archivo_zip, prog_objetivo):
+        """
+        Busca en un zip los programas que llaman al objetivo sin extraerlo a disco: los
+        miembros se filtran por extensión y nombre antes de descomprimirlos y se leen como
+        flujos (ZipFile.open) en un número limitado de hilos.
+        """
+        def llama_al_objetivo(z, info):
+            # El motor lee el miembro por bloques mientras se descomprime (sin copiarlo entero a memoria)
+            with z.open(info) as miembro:
+                calls = detectar_calls_en_archivo(miembro)
+            return prog_objetivo in calls or any(prog_objetivo in c for c in calls)
+
+        with zipfile.ZipFile(archivo_zip, 'r') as z:
+            candidatos = []
+            for info in z.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(EXTENSIONES_COBOL):
+                    continue
+                prog_name = extraer_nombre_programa(info.filename)
+                if prog_name != prog_objetivo:
+                    candidatos.append((prog_name, info))
+            with ThreadPoolExecutor(max_workers=MAX_HILOS_ZIP) as pool:
+                resultados = pool.map(lambda c: llama_al_objetivo(z, c[1]), candidatos)
+                return [prog_name for (prog_name, _), llama in zip(candidatos, resultados) if llama]
 
     def construir_grafo_xplain(prog_objetivo, llamados, tablas_db2, llamantes=None):
         """
@@ -380,43 +559,32 @@ with mode[1]:
 
     if run_xplain and uploaded_xplain:
         # Leer programa objetivo
-        contenido_objetivo = uploaded_xplain.getvalue().decode('latin-1')
+        contenido_objetivo = uploaded_xplain.getvalue()
         prog_objetivo = extraer_nombre_programa(uploaded_xplain.name)
         
-        # Detectar calls y tablas
-        llamados = detectar_calls_en_archivo(contenido_objetivo)
-        tablas_db2 = extraer_tablas_db2(contenido_objetivo)
+        # Con el perfilado activo se miden el análisis del objetivo, la búsqueda de llamantes y el DOT
+        perfil_xplain = Perfilador() if perfilar_analisis else None
+        with perfilar(perfil_xplain) if perfil_xplain else nullcontext():
+            # Detectar calls y tablas en una sola lectura con el motor común
+            with fase('analisis'):
+                resultado_objetivo = roadmap08.analizar_programa(contenido_objetivo, parrafos=False, sql=True, calls=True)
+                llamados = roadmap08.calls_xplain(resultado_objetivo['calls'])
+                tablas_db2 = resultado_objetivo['tablas']
         
-        # Detectar llamantes desde otros archivos
-        llamantes = []
-        if uploaded_others:
-            for f in uploaded_others:
-                if f.name.lower().endswith('.zip'):
-                    # Procesar ZIP
-                    with tempfile.TemporaryDirectory() as tmp_dir:
-                        zip_path = os.path.join(tmp_dir, f.name)
-                        with open(zip_path, 'wb') as zf:
-                            zf.write(f.getvalue())
-                        with zipfile.ZipFile(zip_path, 'r') as z:
-                            z.extractall(tmp_dir)
-                        for root, _, files in os.walk(tmp_dir):
-                            for fname in files:
-                                if fname.lower().endswith(('.cob', '.cbl', '.cobol', '.txt')):
-                                    fpath = os.path.join(root, fname)
-                                    with open(fpath, 'r', encoding='latin-1') as fh:
-                                        contenido = fh.read()
-                                        prog_name = extraer_nombre_programa(fname)
-                                        if prog_name != prog_objetivo:
-                                            calls = detectar_calls_en_archivo(contenido)
-                                            if prog_objetivo in calls or any(prog_objetivo in c for c in calls):
-                                                llamantes.append(prog_name)
-                else:
-                    contenido = f.getvalue().decode('latin-1')
-                    prog_name = extraer_nombre_programa(f.name)
-                    if prog_name != prog_objetivo:
-                        calls = detectar_calls_en_archivo(contenido)
-                        if prog_objetivo in calls or any(prog_objetivo in c for c in calls):
-                            llamantes.append(prog_name)
+            # Detectar llamantes desde otros archivos
+            llamantes = []
+            with fase('llamantes'):
+                if uploaded_others:
+                    for f in uploaded_others:
+                        if f.name.lower().endswith('.zip'):
+                            # Procesar ZIP directamente desde la subida, sin extraerlo a disco
+                            llamantes.extend(llamantes_en_zip(f, prog_objetivo))
+                        else:
+                            prog_name = extraer_nombre_programa(f.name)
+                            if prog_name != prog_objetivo:
+                                calls = detectar_calls_en_archivo(f.getvalue())
+                                if prog_objetivo in calls or any(prog_objetivo in c for c in calls):
+                                    llamantes.append(prog_name)
         
         llamantes = list(set(llamantes))
         
@@ -430,60 +598,16 @@ with mode[1]:
             st.metric("Llamantes detectados", len(llamantes))
         
         # Generar grafo
-        dot_xplain = construir_grafo_xplain(prog_objetivo, llamados, tablas_db2, llamantes if llamantes else None)
+        with perfilar(perfil_xplain) if perfil_xplain else nullcontext():
+            with fase('dot') as f:
+                dot_xplain = construir_grafo_xplain(prog_objetivo, llamados, tablas_db2, llamantes if llamantes else None)
+                f.bytes = len(dot_xplain.source)
         
         st.subheader(f"Diagrama XPLAIN: {prog_objetivo}")
         
         # Visor interactivo
-        dot_escaped = json.dumps(dot_xplain.source)
-        viewer_html = f'''
-        <div style="border:1px solid #444; border-radius:8px; background:#fff; margin-bottom:10px;">
-            <div style="padding:8px; background:#f0f0f0; border-bottom:1px solid #ddd; border-radius:8px 8px 0 0;">
-                <button onclick="panZoomXplain.zoomIn()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➕ Zoom In</button>
-                <button onclick="panZoomXplain.zoomOut()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➖ Zoom Out</button>
-                <button onclick="panZoomXplain.fit(); panZoomXplain.center();" style="padding:5px 15px; margin-right:5px; cursor:pointer;">🔄 Reset</button>
-                <button onclick="panZoomXplain.zoom(0.5); panZoomXplain.center();" style="padding:5px 15px; cursor:pointer;">📐 Alejar</button>
-            </div>
-            <div id="graph-xplain-container" style="width:100%; height:100vh; overflow:hidden;"></div>
-        </div>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/viz.js/2.1.2/viz.js"></script>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/viz.js/2.1.2/full.render.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/svg-pan-zoom@3.6.1/dist/svg-pan-zoom.min.js"></script>
-        <script>
-            var panZoomXplain = null;
-            (function() {{
-                var dotSrc = {dot_escaped};
-                var viz = new Viz();
-                viz.renderSVGElement(dotSrc).then(function(svg) {{
-                    var container = document.getElementById('graph-xplain-container');
-                    container.innerHTML = '';
-                    svg.setAttribute('width', '100%');
-                    svg.setAttribute('height', '100%');
-                    svg.style.background = 'white';
-                    container.appendChild(svg);
-                    panZoomXplain = svgPanZoom(svg, {{
-                        zoomEnabled: true,
-                        controlIconsEnabled: false,
-                        fit: true,
-                        center: true,
-                        minZoom: 0.05,
-                        maxZoom: 20,
-                        zoomScaleSensitivity: 0.3,
-                        initialViewBox: {{ x: 0, y: 0, width: 2000, height: 2000 }}
-                    }});
-                    // Ajustar zoom inicial para ver todo
-                    setTimeout(function() {{
-                        panZoomXplain.fit();
-                        panZoomXplain.center();
-                    }}, 100);
-                }}).catch(function(err) {{
-                    console.error('Viz.js error:', err);
-                    document.getElementById('graph-xplain-container').innerHTML = '<p style="color:red; padding:20px;">Error renderizando diagrama</p>';
-                }});
-            }})();
-        </script>
-        '''
-        st.components.v1.html(viewer_html, height=1000, scrolling=False)
+        mostrar_visor(dot_xplain.source, 'xplain', 'panZoomXplain', 'graph-xplain-container',
+                      zoom={'initialViewBox': {'x': 0, 'y': 0, 'width': 2000, 'height': 2000}})
         
         # Detalles expandibles
         with st.expander("📋 Detalles del análisis"):
@@ -509,4 +633,7 @@ with mode[1]:
             help="Abre en https://dreampuf.github.io/GraphvizOnline/ para exportar PNG/SVG"
         )
 
+        if perfil_xplain:
+            mostrar_perfil(perfil_xplain, f"xplain_{prog_objetivo}")
+
 
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Visor interactivo de grafos DOT para los componentes HTML de Streamlit.
+
+El layout lo hace Viz.js (Graphviz en WebAssembly) en un Web Worker, de modo que la
+página sigue respondiendo mientras se calcula un diagrama grande, y el worker se
+reutiliza entre reejecuciones. Viz.js y svg-pan-zoom se sirven desde static/vendor
+con el servidor estático de Streamlit (.streamlit/config.toml), sin depender de
+redes externas. Cada archivo se verifica con el SHA-256 fijado en
+static/vendor/SHA256SUMS (formato de sha256sum, se sube al repositorio):
+
+    python visor_grafos.py --fijar         # una vez, en una máquina de confianza: descarga y fija las huellas
+    python visor_grafos.py                 # descarga las versiones fijadas a static/vendor
+    python visor_grafos.py --desde DIR     # o las copia de un directorio (red aislada)
+
+Un archivo que no coincide con su huella no se instala. Si faltan en static/vendor, o
+no coinciden, el visor muestra el error en lugar de pedirlos a la CDN en silencio; la
+CDN sólo se usa si se permite expresamente con ROADMAP_VISOR_CDN=1.
+
+Con el render en el servidor (cache_render.renderizar_svg) el componente recibe el SVG
+ya dibujado y comprimido con gzip, y el navegador solo lo descomprime y lo monta. En la
+exploración por niveles (static/explorador_grafo.js) recibe el grafo completo y el
+navegador maqueta sólo los párrafos desplegados.
+"""
+
+import os
+import sys
+import json
+import base64
+import html
+import shutil
+import hashlib
+import argparse
+import urllib.request
+
+DIR_STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIR_VENDOR = os.path.join(DIR_STATIC, 'vendor')
+URL_VENDOR = 'app/static/vendor/'  # Ruta del servidor estático de Streamlit
+
+# Versiones fijadas (las mismas que se usaban desde la CDN)
+CDN_VIZ = 'https://cdnjs.cloudflare.com/ajax/libs/viz.js/2.1.2/'
+CDN_SVG_PAN_ZOOM = 'https://cdn.jsdelivr.net/npm/svg-pan-zoom@3.6.1/dist/'
+ASSETS_VENDOR = {
+    'viz.js': CDN_VIZ + 'viz.js',
+    'full.render.js': CDN_VIZ + 'full.render.js',
+    'svg-pan-zoom.min.js': CDN_SVG_PAN_ZOOM + 'svg-pan-zoom.min.js',
+}
+# SHA-256 fijado de cada asset ('<sha256>  <nombre>' por línea, verificable con sha256sum -c)
+ARCHIVO_HUELLAS = os.path.join(DIR_VENDOR, 'SHA256SUMS')
+# Permite expresamente pedir los assets a la CDN cuando no están en static/vendor
+PERMITIR_CDN = os.environ.get('ROADMAP_VISOR_CDN', '') == '1'
+
+def _leer_static(nombre):
+    with open(os.path.join(DIR_STATIC, nombre), 'r', encoding='utf-8') as f:
+        return f.read()
+
+# Cliente del visor, explorador por niveles y código del worker, insertados en cada componente
+CLIENTE_JS = _leer_static('visor_grafo.js')
+EXPLORADOR_JS = _leer_static('explorador_grafo.js')
+WORKER_JS = _leer_static('render_worker.js')
+
+def leer_huellas():
+    """
+    Retorna:
+        dict: nombre -> SHA-256 fijado en SHA256SUMS ({} si aún no se han fijado)
+    """
+    huellas = {}
+    if os.path.isfile(ARCHIVO_HUELLAS):
+        with open(ARCHIVO_HUELLAS, 'r', encoding='utf-8') as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) == 2:
+                    huellas[partes[1].lstrip('*')] = partes[0].lower()
+    return huellas
+
+# (ruta, mtime_ns, tamaño) -> SHA-256: cada asset se hashea una vez mientras no cambie
+_huellas_calculadas = {}
+
+def _sha256_cacheado(ruta):
+    st = os.stat(ruta)
+    clave = (ruta, st.st_mtime_ns, st.st_size)
+    if clave not in _huellas_calculadas:
+        _huellas_calculadas[clave] = sha256_archivo(ruta)
+    return _huellas_calculadas[clave]
+
+def error_vendor():
+    """
+    Comprueba que Viz.js y svg-pan-zoom están en static/vendor y coinciden con su huella.
+
+    Retorna:
+        str/None: Descripción del problema, None si los assets locales son válidos
+    """
+    huellas = leer_huellas()
+    for nombre in ASSETS_VENDOR:
+        ruta = os.path.join(DIR_VENDOR, nombre)
+        if nombre not in huellas:
+            return f"{nombre} no tiene SHA-256 fijado en static/vendor/SHA256SUMS"
+        if not os.path.isfile(ruta):
+            return f"falta static/vendor/{nombre}"
+        if _sha256_cacheado(ruta) != huellas[nombre]:
+            return f"static/vendor/{nombre} no coincide con su SHA-256 fijado"
+    return None
+
+def vendor_disponible():
+    """True si Viz.js y svg-pan-zoom están en static/vendor y coinciden con su huella."""
+    return error_vendor() is None
+
+def _html_error_visor(contenedor, mensaje):
+    return f'''
+        <div id="{contenedor}" style="border:1px solid #c00; border-radius:8px; background:#fff3f3;
+                    padding:12px; font-family:sans-serif; color:#900;">
+            <b>El visor no puede cargar Viz.js / svg-pan-zoom:</b> {html.escape(mensaje)}.<br>
+            Instálalos en static/vendor con <code>python visor_grafos.py</code>
+            (o <code>--desde DIR</code> en una red aislada), o permite la CDN con
+            <code>ROADMAP_VISOR_CDN=1</code>. El DOT se puede descargar debajo.
+        </div>
+        '''
+
+def _json_script(valor):
+    # JSON seguro dentro de <script>: un '</script>' en una etiqueta no cierra el bloque
+    return json.dumps(valor).replace('</', '<\\/')
+
+def html_visor(fuente_dot, visor, variable, contenedor, zoom=None, servir_local=True, svg_gzip=None, explorador=None):
+    """
+    HTML del visor con barra de zoom para st.components.v1.html.
+
+    Parámetros:
+        fuente_dot (str): Código DOT (se ignora si se pasa svg_gzip o explorador)
+        visor (str): Nombre del visor; cada uno tiene su propio worker
+        variable (str): Variable global JavaScript con la instancia de svg-pan-zoom
+        contenedor (str): id del div donde se dibuja el SVG
+        zoom (dict): Opciones adicionales de svg-pan-zoom
+        servir_local (bool): False si el servidor estático de Streamlit no está activo
+        svg_gzip (bytes): SVG ya renderizado en el servidor y comprimido con gzip
+        explorador (dict): Grafo para la exploración por niveles (ver static/explorador_grafo.js);
+                           el DOT lo arma el navegador con los párrafos desplegados
+
+    Retorna:
+        str: Documento HTML del componente (o un aviso de error si los assets locales no
+             están disponibles o no coinciden con su huella y no se permite la CDN)
+    """
+    error = error_vendor() if servir_local else "el servidor estático de Streamlit no está activo (server.enableStaticServing)"
+    if error is None:
+        vendor, svg_pan_zoom = URL_VENDOR, URL_VENDOR + 'svg-pan-zoom.min.js'
+    elif PERMITIR_CDN:
+        vendor, svg_pan_zoom = CDN_VIZ, ASSETS_VENDOR['svg-pan-zoom.min.js']
+    else:
+        return _html_error_visor(contenedor, error)
+    opciones = {'contenedor': contenedor, 'visor': visor, 'vendor': vendor, 'zoom': zoom or {}}
+    scripts = [f'window.RoadmapVisorWorker = {_json_script(WORKER_JS)};', CLIENTE_JS]
+    if explorador is not None:
+        opciones['explorador'] = explorador
+        scripts.append(EXPLORADOR_JS)
+        inicio = f'RoadmapExplorador.iniciar({_json_script(opciones)}, function (panZoom) {{ {variable} = panZoom; }});'
+    else:
+        if svg_gzip is not None:
+            # SVG del servidor: no hace falta el worker
+            opciones['svgz'] = base64.b64encode(svg_gzip).decode('ascii')
+            scripts.pop(0)
+        else:
+            opciones['dot'] = fuente_dot
+        inicio = f'RoadmapVisor.pintar({_json_script(opciones)}).then(function (panZoom) {{ {variable} = panZoom; }});'
+    codigo = '\n'.join(scripts)
+    return f'''
+        <div style="border:1px solid #444; border-radius:8px; background:#fff; margin-bottom:10px;">
+            <div style="padding:8px; background:#f0f0f0; border-bottom:1px solid #ddd; border-radius:8px 8px 0 0;">
+                <button onclick="{variable}.zoomIn()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➕ Zoom In</button>
+                <button onclick="{variable}.zoomOut()" style="padding:5px 15px; margin-right:5px; cursor:pointer;">➖ Zoom Out</button>
+                <button onclick="{variable}.fit(); {variable}.center();" style="padding:5px 15px; margin-right:5px; cursor:pointer;">🔄 Reset</button>
+                <button onclick="{variable}.zoom(0.5); {variable}.center();" style="padding:5px 15px; cursor:pointer;">📐 Alejar</button>
+            </div>
+            <div id="{contenedor}" style="width:100%; height:100vh; overflow:hidden;"></div>
+        </div>
+        <script src="{svg_pan_zoom}"></script>
+        <script>
+            {codigo}
+        </script>
+        <script>
+            var {variable} = null;
+            {inicio}
+        </script>
+        '''
+
+def sha256_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+def vendorizar(desde=None, fijar=False):
+    """
+    Deja Viz.js y svg-pan-zoom en static/vendor, descargándolos de la CDN o copiándolos
+    de un directorio local. Cada archivo se compara con su SHA-256 fijado en SHA256SUMS y
+    no se instala ninguno si alguno no coincide o no tiene huella.
+
+    Parámetros:
+        desde (str): Directorio con los archivos (sin descargar)
+        fijar (bool): Registrar en SHA256SUMS la huella de los que aún no la tienen (sólo
+                      en una máquina de confianza; después se sube SHA256SUMS al repositorio)
+    """
+    os.makedirs(DIR_VENDOR, exist_ok=True)
+    huellas = leer_huellas()
+    temporales = {}
+    try:
+        for nombre, url in ASSETS_VENDOR.items():
+            temporal = os.path.join(DIR_VENDOR, nombre + '.tmp')
+            temporales[nombre] = temporal
+            if desde:
+                shutil.copyfile(os.path.join(desde, nombre), temporal)
+            else:
+                with urllib.request.urlopen(url, timeout=60) as respuesta, open(temporal, 'wb') as f:
+                    shutil.copyfileobj(respuesta, f)
+            huella = sha256_archivo(temporal)
+            esperada = huellas.get(nombre)
+            if esperada is None:
+                if not fijar:
+                    raise ValueError(f"{nombre} no tiene SHA-256 fijado en {ARCHIVO_HUELLAS}; "
+                                     "ejecutar con --fijar en una maquina de confianza y subir SHA256SUMS")
+                huellas[nombre] = huella
+            elif huella != esperada:
+                raise ValueError(f"{nombre}: SHA-256 {huella} no coincide con el fijado {esperada}; no se instala")
+        # Todos verificados: se instalan juntos
+        for nombre, temporal in temporales.items():
+            destino = os.path.join(DIR_VENDOR, nombre)
+            os.replace(temporal, destino)
+            print(f"{nombre:22s} {os.path.getsize(destino):10d} bytes  sha256 {huellas[nombre]}")
+    finally:
+        for temporal in temporales.values():
+            if os.path.exists(temporal):
+                os.remove(temporal)
+    if fijar:
+        with open(ARCHIVO_HUELLAS, 'w', encoding='utf-8') as f:
+            for nombre in ASSETS_VENDOR:
+                f.write(f"{huellas[nombre]}  {nombre}\n")
+        print(f"Huellas fijadas en: {ARCHIVO_HUELLAS}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Copia Viz.js y svg-pan-zoom a static/vendor para servir el visor sin CDN.")
+    ap.add_argument("--desde", help="Directorio con viz.js, full.render.js y svg-pan-zoom.min.js (sin descargar).")
+    ap.add_argument("--fijar", action="store_true",
+                    help="Registrar en static/vendor/SHA256SUMS la huella de los archivos que aun no la tienen (maquina de confianza).")
+    args = ap.parse_args()
+    try:
+        vendorizar(args.desde, args.fijar)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Assets del visor en: {DIR_VENDOR}")